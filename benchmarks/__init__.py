@@ -0,0 +1,3 @@
+"""
+Benchmarks for the AI Wardrobe Assistant.
+"""
\ No newline at end of file
@@ -0,0 +1,218 @@
+"""
+Offline end-to-end benchmark for WardrobeService and the Flask app.
+
+Starts local stand-ins for the OpenAI Responses API and walmart.com (see
+benchmarks/fake_servers.py), runs recommendation requests at the requested
+concurrency and reports latency percentiles, throughput and a per-stage
+breakdown collected from the agents SDK trace spans.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_e2e [--target service|flask] [--mode handoff|parallel] [--requests N]
+        [--concurrency N] [--model-latency MS] [--retailer-latency MS] [--retailers SPEC] [--warm-cache] [--verbose]
+        [--tier-latency TIER=MS,...] [--latency-budget S]
+
+With --tier-latency each model tier gets its own stand-in model name and
+latency, e.g. `--tier-latency standard=2000,fast=50 --latency-budget 3` makes
+every standard tier turn overrun its share of the budget and fall back to the
+fast tier. The report then counts which tiers served the requests.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from benchmarks.fake_servers import FakeModelHandler, FakeRetailerHandler, start_server
+
+PROMPTS = [
+    "Red Sox fan", "business casual", "minimalist neutral", "beach vacation",
+    "Seattle winter", "college campus", "weekend hiking", "date night",
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["service", "flask"], default="service")
+    parser.add_argument("--mode", choices=["handoff", "parallel"], default="handoff", help="Pipeline mode")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--model-latency", type=float, default=50, help="Milliseconds per model call")
+    parser.add_argument("--retailer-latency", type=float, default=30, help="Milliseconds per retailer page")
+    parser.add_argument("--retailers", default="walmart",
+                        help="RETAILERS value, e.g. walmart,fixture:benchmarks/fixtures/retailer_fixture_outfitters.json")
+    parser.add_argument("--tier-latency", default="",
+                        help="Milliseconds per model call for each model tier, e.g. standard=2000,fast=50")
+    parser.add_argument("--latency-budget", type=float, default=0, help="LATENCY_BUDGET seconds (0 = none)")
+    parser.add_argument("--warm-cache", action="store_true", help="Keep product/recommendation caches and the catalog enabled")
+    parser.add_argument("--verbose", action="store_true", help="Show the service's own output")
+    return parser.parse_args()
+
+def configure_environment(args, model_url: str, retailer_url: str):
+    """Point the service at the stand-in servers. Must run before the service is imported."""
+    os.environ["OPENAI_API_KEY"] = "bench"
+    os.environ["OPENAI_BASE_URL"] = f"{model_url}/v1"
+    os.environ["WALMART_BASE_URL"] = retailer_url
+    os.environ["RETAILERS"] = args.retailers
+    os.environ["LATENCY_BUDGET"] = str(args.latency_budget)
+    if args.tier_latency:
+        os.environ["MODEL_TIERS"] = ",".join(f"{tier}=bench-{tier}" for tier in tier_latencies(args))
+    os.environ.setdefault("WARDROBE_MAX_CONCURRENCY", str(args.concurrency))
+    # The per-host rate limit protects the real retailer, not the local stand-in
+    os.environ.setdefault("UPSTREAM_RATE_LIMIT", "0")
+    if not args.warm_cache:
+        os.environ["PRODUCT_CACHE_SIZE"] = "0"
+        os.environ["PRODUCT_CATALOG_ENABLED"] = "0"
+
+def tier_latencies(args) -> Dict[str, float]:
+    """Tier name -> model latency in seconds, from --tier-latency."""
+    latencies = {}
+    for entry in args.tier_latency.split(","):
+        if entry.strip():
+            tier, _, ms = entry.partition("=")
+            latencies[tier.strip()] = float(ms) / 1000
+    return latencies
+
+class StageTimer:
+    """Trace processor that accumulates span durations per stage."""
+
+    def __init__(self):
+        self._starts = {}
+        self._lock = threading.Lock()
+        # stage -> list of per-span durations (seconds)
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+
+    @staticmethod
+    def stage_of(span) -> str:
+        data = span.span_data
+        name = getattr(data, "name", None)
+        if data.type in ("function", "agent", "guardrail") and name:
+            return f"{data.type}:{name}"
+        return data.type
+
+    def on_trace_start(self, trace):
+        pass
+
+    def on_trace_end(self, trace):
+        pass
+
+    def on_span_start(self, span):
+        with self._lock:
+            self._starts[span.span_id] = time.perf_counter()
+
+    def on_span_end(self, span):
+        end = time.perf_counter()
+        with self._lock:
+            start = self._starts.pop(span.span_id, None)
+            if start is not None:
+                self.durations[self.stage_of(span)].append(end - start)
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self):
+        pass
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+def run_service(args, service, prompts: List[str]) -> List[float]:
+    async def one(prompt: str) -> float:
+        start = time.perf_counter()
+        await service.create_wardrobe_recommendation(prompt, use_cache=args.warm_cache, mode=args.mode)
+        return time.perf_counter() - start
+
+    async def run_all() -> List[float]:
+        limiter = asyncio.Semaphore(args.concurrency)
+
+        async def limited(prompt: str):
+            async with limiter:
+                return await one(prompt)
+
+        return await asyncio.gather(*(limited(p) for p in prompts), return_exceptions=True)
+
+    return asyncio.run(run_all())
+
+def run_flask(args, app, prompts: List[str]) -> List[float]:
+    client = app.test_client()
+    headers = {} if args.warm_cache else {"Cache-Control": "no-cache"}
+
+    def one(prompt: str):
+        start = time.perf_counter()
+        response = client.post("/api/wardrobe/recommend", json={"prompt": prompt, "mode": args.mode}, headers=headers)
+        if response.status_code != 200:
+            return RuntimeError(f"HTTP {response.status_code}: {response.get_json()}")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        return list(pool.map(one, prompts))
+
+def main():
+    args = parse_args()
+    model_latency = {f"bench-{tier}": latency for tier, latency in tier_latencies(args).items()}
+    model_server, model_url = start_server(FakeModelHandler, latency=args.model_latency / 1000, model_latency=model_latency)
+    retailer_server, retailer_url = start_server(FakeRetailerHandler, latency=args.retailer_latency / 1000)
+    configure_environment(args, model_url, retailer_url)
+
+    import logging
+    logging.disable(logging.CRITICAL)
+    from agents import set_trace_processors
+    timer = StageTimer()
+    set_trace_processors([timer])
+
+    prompts = [PROMPTS[i % len(PROMPTS)] for i in range(args.requests)]
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        if args.target == "flask":
+            import main as flask_main
+            start = time.perf_counter()
+            results = run_flask(args, flask_main.app, prompts)
+        else:
+            from wardrobe_service import WardrobeService
+            service = WardrobeService(max_concurrency=args.concurrency)
+            start = time.perf_counter()
+            results = run_service(args, service, prompts)
+        wall = time.perf_counter() - start
+
+    latencies = [r for r in results if isinstance(r, float)]
+    errors = [r for r in results if not isinstance(r, float)]
+
+    print(f"target={args.target} mode={args.mode} requests={args.requests} concurrency={args.concurrency} "
+          f"model_latency={args.model_latency:g}ms retailer_latency={args.retailer_latency:g}ms "
+          f"warm_cache={args.warm_cache} tier_latency={args.tier_latency or '-'} latency_budget={args.latency_budget:g}s")
+    print(f"ok={len(latencies)} errors={len(errors)} wall={wall:.2f}s throughput={len(latencies) / wall:.1f} req/s")
+    if latencies:
+        print(f"latency ms: p50={percentile(latencies, 50) * 1000:.1f} "
+              f"p95={percentile(latencies, 95) * 1000:.1f} p99={percentile(latencies, 99) * 1000:.1f} "
+              f"mean={statistics.mean(latencies) * 1000:.1f}")
+    if errors:
+        print(f"first error: {errors[0]!r}", file=sys.stderr)
+
+    print(f"\n{'stage':<44} {'count':>6} {'mean ms':>9} {'p95 ms':>9} {'ms/request':>11}")
+    for stage, durations in sorted(timer.durations.items()):
+        print(f"{stage:<44} {len(durations):>6} {statistics.mean(durations) * 1000:>9.1f} "
+              f"{percentile(durations, 95) * 1000:>9.1f} {sum(durations) * 1000 / max(len(latencies), 1):>11.1f}")
+
+    from utils.metrics import render_prometheus
+    routes = [line for line in render_prometheus().splitlines()
+              if line.startswith(("wardrobe_model_route_total", "wardrobe_model_turns_total"))]
+    if routes:
+        print("\nmodel routing:")
+        for line in routes:
+            print(f"  {line}")
+
+    model_server.shutdown()
+    retailer_server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Parse-time and peak-memory benchmark for the Walmart extraction engines.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_parse [--iterations N] [--limit N]
+"""
+import argparse
+import pathlib
+import time
+import tracemalloc
+
+from tools.walmart_parser import ENGINES
+
+FIXTURES_DIR = pathlib.Path(__file__).parent / "fixtures"
+
+def bench_engine(engine, html: str, limit: int, iterations: int):
+    """Return (mean parse ms, peak KiB, product count) for one engine on one page."""
+    products = engine.extract(html, limit)  # warm-up
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        engine.extract(html, limit)
+    mean_ms = (time.perf_counter() - start) * 1000 / iterations
+
+    tracemalloc.start()
+    engine.extract(html, limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return mean_ms, peak / 1024, len(products)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=40, help="Products to extract per page")
+    args = parser.parse_args()
+
+    print(f"{'fixture':<34} {'engine':<8} {'KiB in':>8} {'ms/page':>9} {'peak KiB':>10} {'items':>6}")
+    for path in sorted(FIXTURES_DIR.glob("*.html")):
+        html = path.read_text(encoding="utf-8")
+        for engine in ENGINES.values():
+            mean_ms, peak_kib, count = bench_engine(engine, html, args.limit, args.iterations)
+            print(f"{path.name:<34} {engine.name:<8} {len(html) / 1024:>8.0f} {mean_ms:>9.2f} {peak_kib:>10.0f} {count:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Replay benchmark: time recorded agent sessions without a model or retailers.
+
+Each trace (written by the service with WARDROBE_RECORD_DIR set) is replayed
+--runs times through WardrobeService.replay. With the default --speed 0 the
+recorded model and tool durations are skipped, so the timings cover only
+local work: the agent loop, guardrails, parsing, repair and categorization,
+plus serializing the result. Use --speed 1 to replay at the original pace.
+
+Without trace arguments, one session per pipeline mode is first recorded
+against the offline stand-in servers (see benchmarks/fake_servers.py).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_replay [TRACE ...] [--runs N] [--speed S]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from benchmarks.fake_servers import FakeModelHandler, FakeRetailerHandler, start_server
+
+def record_offline_sessions(directory: str) -> List[str]:
+    """Record one handoff and one parallel session against the stand-in servers."""
+    _, model_url = start_server(FakeModelHandler)
+    _, retailer_url = start_server(FakeRetailerHandler)
+    os.environ.update(
+        OPENAI_API_KEY="bench",
+        OPENAI_BASE_URL=f"{model_url}/v1",
+        WALMART_BASE_URL=retailer_url,
+        WARDROBE_RECORD_DIR=directory,
+        UPSTREAM_RATE_LIMIT="0",
+    )
+    from wardrobe_service import WardrobeService
+    service = WardrobeService()
+    for mode in ("handoff", "parallel"):
+        service.create_wardrobe_recommendation_sync("Seattle winter", use_cache=False, mode=mode)
+    return sorted(glob.glob(os.path.join(directory, "*.jsonl.gz")))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="*", help="Trace files (default: record fresh ones offline)")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--speed", type=float, default=0, help="Divides recorded durations; 0 skips them")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.CRITICAL)
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        traces = args.traces or record_offline_sessions(directory)
+        from my_agents.recording import Session
+        from utils.responses import encode_recommendation
+        from wardrobe_service import WardrobeService
+        service = WardrobeService()
+        results = []
+        for trace in traces:
+            session = Session.load(trace)
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                recommendation = service.replay_sync(trace, speed=args.speed)
+                encode_recommendation(recommendation.model_copy())
+                timings.append(time.perf_counter() - start)
+            results.append((os.path.basename(trace), session, timings))
+
+    print(f"{'trace':<40} {'mode':<9} {'events':>6} {'recorded ms':>12} {'median ms':>10} {'min ms':>8}")
+    for name, session, timings in results:
+        print(f"{name:<40} {session.mode:<9} {len(session.events):>6} {session.recorded_duration * 1000:>12.1f} "
+              f"{statistics.median(timings) * 1000:>10.1f} {min(timings) * 1000:>8.1f}")
+
+if __name__ == "__main__":
+    main()
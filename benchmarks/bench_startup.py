@@ -0,0 +1,93 @@
+"""
+Startup benchmark: how long a fresh worker takes to import and become warm.
+
+Each scenario runs in a new Python process (so nothing is cached in
+sys.modules) and is repeated; the median and minimum are reported.
+
+Scenarios:
+    import_main          import main (API server) with background preloading off
+    import_main_warm     import main, then wait for the background preload to finish
+    import_service       import wardrobe_service
+    import_cli           import cli
+    first_request        import main and serve one recommendation (lazy imports on
+                         the request path) against the offline stand-in servers
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup [--runs N] [--scenario NAME ...]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import textwrap
+from typing import Dict, List
+
+SCENARIOS: Dict[str, str] = {
+    "import_main": """
+        os.environ["WARDROBE_PRELOAD"] = "0"
+        start = time.perf_counter()
+        import main
+        elapsed = time.perf_counter() - start
+    """,
+    "import_main_warm": """
+        start = time.perf_counter()
+        import main
+        import threading
+        for thread in threading.enumerate():
+            if thread.name == "wardrobe-warm-up":
+                thread.join()
+        elapsed = time.perf_counter() - start
+    """,
+    "import_service": """
+        start = time.perf_counter()
+        import wardrobe_service
+        elapsed = time.perf_counter() - start
+    """,
+    "import_cli": """
+        start = time.perf_counter()
+        import cli
+        elapsed = time.perf_counter() - start
+    """,
+    "first_request": """
+        from benchmarks.fake_servers import FakeModelHandler, FakeRetailerHandler, start_server
+        _, model_url = start_server(FakeModelHandler)
+        _, retailer_url = start_server(FakeRetailerHandler)
+        os.environ.update(OPENAI_BASE_URL=f"{model_url}/v1", WALMART_BASE_URL=retailer_url, WARDROBE_PRELOAD="0")
+        start = time.perf_counter()
+        import contextlib, io
+        with contextlib.redirect_stdout(io.StringIO()):
+            import main
+            response = main.app.test_client().post("/api/wardrobe/recommend", json={"prompt": "date night"})
+        assert response.status_code == 200, response.get_json()
+        elapsed = time.perf_counter() - start
+    """,
+}
+
+PRELUDE = """
+import json, logging, os, sys, time
+logging.disable(logging.CRITICAL)
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+"""
+
+def run_scenario(name: str) -> float:
+    """Run one scenario in a fresh interpreter and return its elapsed seconds."""
+    code = PRELUDE + textwrap.dedent(SCENARIOS[name]) + "\nprint(json.dumps(elapsed))\n"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Repeat to pick several (default: all)")
+    args = parser.parse_args()
+
+    # Warm the bytecode cache so the first run is not penalized by compilation
+    run_scenario("import_main_warm")
+
+    print(f"{'scenario':<20} {'median ms':>10} {'min ms':>10}")
+    for name in args.scenario or list(SCENARIOS):
+        timings: List[float] = [run_scenario(name) for _ in range(args.runs)]
+        print(f"{name:<20} {statistics.median(timings) * 1000:>10.1f} {min(timings) * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Local stand-ins for the OpenAI Responses API and walmart.com.
+
+`FakeModelHandler` answers `POST /v1/responses` with scripted outputs that
+walk the real agent graph: the wardrobe agent hands off to the product search
+agent, which calls `search_real_products_batch` and then returns the found
+items as JSON. `FakeRetailerHandler` serves a saved Walmart search page (with
+other product ids on later result pages) for every `/search` request. Both
+can add a fixed artificial latency; the model server can also take a
+different latency per requested model, to exercise model tier fallback.
+
+Only non-streaming model calls are supported.
+"""
+import ast
+import itertools
+import json
+import pathlib
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = pathlib.Path(__file__).parent / "fixtures"
+
+BENCH_CATEGORIES = ["shirt", "pants", "jacket", "hat", "sneakers", "scarf"]
+
+_ids = itertools.count(1)
+
+def _next_id(prefix: str) -> str:
+    return f"{prefix}_{next(_ids):08d}"
+
+def start_server(handler_class, **attributes) -> Tuple[ThreadingHTTPServer, str]:
+    """Start a handler on a free local port in a daemon thread; returns (server, base URL)."""
+    handler = type(handler_class.__name__, (handler_class,), attributes)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (e.g. a model turn cancelled for a faster tier)
+            self.close_connection = True
+
+class FakeRetailerHandler(_QuietHandler):
+    """
+    Serve a saved search results page for any /search request.
+
+    Pages 2 to `pages` (the `page` query parameter) repeat the saved page with
+    different product ids and URLs; later pages have no results.
+    """
+
+    fixture = FIXTURES_DIR / "walmart_search_next_data.html"
+    pages = 5
+    _bodies: Optional[Dict[int, bytes]] = None
+
+    def _page_body(self, page: int) -> bytes:
+        bodies = type(self)._bodies
+        if bodies is None:
+            bodies = type(self)._bodies = {1: pathlib.Path(self.fixture).read_bytes()}
+        if page not in bodies:
+            if page > self.pages:
+                bodies[page] = b"<html><body><p>No results found.</p></body></html>"
+            else:
+                # Ids appear as "usItemId": "1000000" and at the end of /ip/<slug>/1000000 URLs
+                suffix = f"-p{page}\"".encode("ascii")
+                bodies[page] = re.sub(rb'("usItemId": "|/ip/[^"/]+/)(\d+)"', lambda m: m.group(1) + m.group(2) + suffix, bodies[1])
+        return bodies[page]
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != "/search":
+            self._send(404, b"not found", "text/plain")
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        page = int(parse_qs(url.query).get("page", ["1"])[0])
+        self._send(200, self._page_body(page), "text/html; charset=utf-8")
+
+class FakeModelHandler(_QuietHandler):
+    """Scripted replacement for the OpenAI Responses API."""
+
+    # Requested model -> latency (seconds), overriding `latency`
+    model_latency: Dict[str, float] = {}
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/responses"):
+            self._send(404, b'{"error": {"message": "not found"}}', "application/json")
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if request.get("stream"):
+            self._send(400, b'{"error": {"message": "streaming is not supported"}}', "application/json")
+            return
+        latency = self.model_latency.get(request.get("model"), self.latency)
+        if latency:
+            time.sleep(latency)
+        output = self.script(request)
+        self._send(200, json.dumps(self._response(request, output)).encode("utf-8"), "application/json")
+
+    def script(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Choose the next output items from the agent's instructions and conversation so far."""
+        instructions = request.get("instructions") or ""
+        items = request.get("input")
+        if isinstance(items, str):
+            items = [{"role": "user", "content": items}]
+        tool_names = [tool.get("name") for tool in request.get("tools") or []]
+
+        if "personal shopping assistant" in instructions:
+            handoff = next((name for name in tool_names if name and name.startswith("transfer_to_")), None)
+            if handoff and not self._outputs_since_last_user(items):
+                return [self._function_call(handoff, {})]
+            return [self._message(json.dumps(self._recommendation(items)))]
+
+        if "finding clothing items" in instructions:
+            outputs = [item for item in items if item.get("type") == "function_call_output"]
+            search_outputs = [self._decode_output(item["output"]) for item in outputs]
+            searches = [output for output in search_outputs if isinstance(output, dict) and "searches" in output]
+            if not searches:
+                theme = self._user_prompt(items)
+                return [self._function_call("search_real_products_batch", {"queries": [
+                    {"query": theme, "item_type": item_type, "max_results": 2}
+                    for item_type in BENCH_CATEGORIES
+                ]})]
+            products = [
+                self._item(product)
+                for search in searches[-1]["searches"]
+                for product in search.get("r", search.get("results", []))
+            ]
+            return [self._message(json.dumps({"items": products}))]
+
+        # Style advisor or any other agent
+        return [self._message(json.dumps(self._recommendation(items)))]
+
+    @staticmethod
+    def _decode_output(output: Any) -> Any:
+        if not isinstance(output, str):
+            return output
+        try:
+            return json.loads(output)
+        except json.JSONDecodeError:
+            try:
+                return ast.literal_eval(output)
+            except (ValueError, SyntaxError):
+                return output
+
+    @staticmethod
+    def _item(product: Dict[str, Any]) -> Dict[str, Any]:
+        """A recommendation item from a compact ("ref", "n", "p", "d") or verbose search result."""
+        if "ref" in product:
+            return {
+                "name": product["n"],
+                "price": product["p"],
+                "image_url": f"ref:{product['ref']}",
+                "product_url": f"ref:{product['ref']}",
+                "description": product.get("d", "")
+            }
+        return {
+            "name": product["name"],
+            "price": product["price"],
+            "image_url": product["image_url"],
+            "product_url": product["product_url"],
+            "description": product.get("description", "")
+        }
+
+    @staticmethod
+    def _user_prompt(items: List[Dict[str, Any]]) -> str:
+        for item in items:
+            if item.get("role") == "user":
+                content = item.get("content")
+                if isinstance(content, list):
+                    content = " ".join(part.get("text", "") for part in content)
+                return content
+        return ""
+
+    @staticmethod
+    def _outputs_since_last_user(items: List[Dict[str, Any]]) -> bool:
+        for item in reversed(items):
+            if item.get("role") == "user":
+                return False
+            if item.get("type") == "function_call_output":
+                return True
+        return False
+
+    def _recommendation(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "theme": self._user_prompt(items).title(),
+            "styling_tips": "Layer neutral basics and add one statement piece.",
+            "tops": [], "bottoms": [], "outerwear": [],
+            "headwear": [], "footwear": [], "accessories": []
+        }
+
+    @staticmethod
+    def _function_call(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "type": "function_call",
+            "id": _next_id("fc"),
+            "call_id": _next_id("call"),
+            "name": name,
+            "arguments": json.dumps(arguments),
+            "status": "completed"
+        }
+
+    @staticmethod
+    def _message(text: str) -> Dict[str, Any]:
+        return {
+            "type": "message",
+            "id": _next_id("msg"),
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}]
+        }
+
+    @staticmethod
+    def _response(request: Dict[str, Any], output: List[Dict[str, Any]]) -> Dict[str, Any]:
+        input_tokens = len(json.dumps(request.get("input"))) // 4 + len(request.get("instructions") or "") // 4
+        output_tokens = len(json.dumps(output)) // 4
+        return {
+            "id": _next_id("resp"),
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": request.get("model") or "fake-model",
+            "status": "completed",
+            "output": output,
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": input_tokens,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": output_tokens,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": input_tokens + output_tokens
+            }
+        }
@@ -0,0 +1,70 @@
+"""
+Command-line interface for the AI Wardrobe Assistant.
+
+Kept out of wardrobe_service so that the API server does not import the
+terminal formatting dependencies.
+"""
+from colorama import init, Fore, Style, Back
+from models.clothing import ClothingItem
+from wardrobe_service import WardrobeService
+
+# Initialize colorama
+init()
+
+def print_item(item: ClothingItem):
+    """Print a single clothing item with formatting."""
+    print(f"\n{Fore.WHITE}{Style.BRIGHT}• {item.name}{Style.RESET_ALL}")
+    print(f"  {Fore.YELLOW}Price:{Style.RESET_ALL} {item.price}")
+    if item.description:
+        print(f"  {Fore.CYAN}Description:{Style.RESET_ALL} {item.description}")
+    print(f"  {Fore.BLUE}Product URL:{Style.RESET_ALL} {item.product_url}")
+    print(f"  {Fore.MAGENTA}Image URL:{Style.RESET_ALL} {item.image_url}")
+
+def print_section(title: str, items: list[ClothingItem]):
+    """Print a section of clothing items with formatting."""
+    print(f"\n{Back.WHITE}{Fore.BLACK}{Style.BRIGHT}=== {title} ==={Style.RESET_ALL}")
+    if not items:
+        print(f"{Fore.RED}No items found{Style.RESET_ALL}")
+    for item in items:
+        print_item(item)
+
+def main():
+    """Test the wardrobe service with a sample prompt."""
+    # import agentops
+    # agentops.init(os.getenv("AGENTOPS_API_KEY"))
+    service = WardrobeService()
+    
+    test_prompt = str(input("Enter a prompt: "))
+
+    
+    try:
+        # Print request
+        print(f"\n{Back.BLUE}{Fore.WHITE}{Style.BRIGHT} WARDROBE REQUEST {Style.RESET_ALL}")
+        print(f"{Fore.CYAN}Prompt:{Style.RESET_ALL} {test_prompt}")
+        
+        # Get recommendation
+        recommendation = service.create_wardrobe_recommendation_sync(test_prompt)
+        
+        # Print theme and styling tips
+        print(f"\n{Back.GREEN}{Fore.BLACK}{Style.BRIGHT} WARDROBE RECOMMENDATION {Style.RESET_ALL}")
+        print(f"\n{Fore.GREEN}{Style.BRIGHT}Theme:{Style.RESET_ALL} {recommendation.theme}")
+        print(f"\n{Fore.GREEN}{Style.BRIGHT}Styling Tips:{Style.RESET_ALL} {recommendation.styling_tips}")
+        
+        # Print each section
+        print_section("TOPS", recommendation.tops)
+        print_section("BOTTOMS", recommendation.bottoms)
+        print_section("OUTERWEAR", recommendation.outerwear)
+        print_section("HEADWEAR", recommendation.headwear)
+        print_section("FOOTWEAR", recommendation.footwear)
+        print_section("ACCESSORIES", recommendation.accessories)
+        if recommendation.uncategorized:
+            print_section("UNCATEGORIZED", recommendation.uncategorized)
+            
+    except Exception as e:
+        print(f"\n{Back.RED}{Fore.WHITE}{Style.BRIGHT} ERROR {Style.RESET_ALL}")
+        print(f"{Fore.RED}{str(e)}{Style.RESET_ALL}")
+
+    # agentops.end_session('Success')
+
+if __name__ == "__main__":
+    main()
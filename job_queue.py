@@ -0,0 +1,179 @@
+"""
+Background job queue for bulk wardrobe recommendation generation.
+
+Jobs run on the WardrobeService background event loop with their own
+concurrency limit, kept below the service-wide limit so that bulk work
+cannot take every slot away from interactive requests.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from wardrobe_service import WardrobeService
+
+JOB_MAX_CONCURRENCY = int(os.getenv("JOB_MAX_CONCURRENCY", "4"))
+JOB_MAX_RETAINED = int(os.getenv("JOB_MAX_RETAINED", "100"))
+JOB_RESULTS_DIR = os.getenv("JOB_RESULTS_DIR")
+
+class Job:
+    """A batch of prompts processed in the background."""
+
+    def __init__(self, prompts: List[str], use_cache: bool = True, mode: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.prompts = prompts
+        self.use_cache = use_cache
+        self.mode = mode
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.completed = 0
+        self.failed = 0
+        # Results in completion order: {"index", "prompt", "recommendation" | "error"}
+        self.results: List[Dict[str, Any]] = []
+        self.future = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "cancelled", "failed")
+
+    def add_result(self, result: Dict[str, Any]):
+        with self._lock:
+            self.results.append(result)
+            if "error" in result:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def to_dict(self, since: int = 0) -> Dict[str, Any]:
+        """Job status plus results from position `since` onwards (for incremental polling)."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+                "progress": {
+                    "total": len(self.prompts),
+                    "completed": self.completed,
+                    "failed": self.failed,
+                },
+                "next": len(self.results),
+                "results": self.results[since:],
+            }
+
+class JobManager:
+    """Submit, track and cancel bulk recommendation jobs."""
+
+    def __init__(
+        self,
+        service: WardrobeService,
+        max_concurrency: int = JOB_MAX_CONCURRENCY,
+        max_retained: int = JOB_MAX_RETAINED,
+        results_dir: Optional[str] = JOB_RESULTS_DIR
+    ):
+        self.service = service
+        self.max_concurrency = max_concurrency
+        self.max_retained = max_retained
+        self.results_dir = results_dir
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._semaphore = None
+        if results_dir:
+            os.makedirs(results_dir, exist_ok=True)
+
+    def submit(self, prompts: List[str], use_cache: bool = True, mode: Optional[str] = None) -> Job:
+        """Queue a job and start processing it in the background."""
+        job = Job(prompts, use_cache=use_cache, mode=mode)
+        with self._lock:
+            self.jobs[job.id] = job
+            self._evict_finished()
+        job.future = asyncio.run_coroutine_threadsafe(
+            self._run(job), self.service._get_background_loop()
+        )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job; finished results are kept. Returns False if the job is unknown.
+
+        A job that has not started is "cancelled" at once; a running one is
+        "cancelling" until its in-flight runs have stopped.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        if not job.done and job.future is not None:
+            job.future.cancel()
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = time.time()
+            else:
+                job.status = "cancelling"
+        return True
+
+    def _evict_finished(self):
+        """Drop the oldest finished jobs beyond max_retained."""
+        excess = len(self.jobs) - self.max_retained
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.done][:max(excess, 0)]:
+            del self.jobs[job_id]
+
+    async def _run(self, job: Job):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if job.status != "queued":
+            # Cancelled before it started
+            return
+        job.status = "running"
+        # A few workers take prompts in turn, so a bulk job holds a bounded number of tasks
+        prompts = iter(enumerate(job.prompts))
+        workers = [
+            asyncio.ensure_future(self._work(job, prompts))
+            for _ in range(min(self.max_concurrency, len(job.prompts)))
+        ]
+        status = "completed"
+        try:
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            status = "cancelled"
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            status = "failed"
+        finally:
+            # Stop the remaining workers and wait until their runs have stopped
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            job.status = status
+            job.finished_at = time.time()
+
+    async def _work(self, job: Job, prompts: Iterator[Tuple[int, str]]):
+        for index, prompt in prompts:
+            await self._run_prompt(job, index, prompt)
+
+    async def _run_prompt(self, job: Job, index: int, prompt: str):
+        async with self._semaphore:
+            try:
+                recommendation = await self.service.create_wardrobe_recommendation(
+                    prompt, use_cache=job.use_cache, mode=job.mode
+                )
+                result = {"index": index, "prompt": prompt, "recommendation": recommendation.model_dump()}
+            except Exception as e:
+                result = {"index": index, "prompt": prompt, "error": str(e)}
+        job.add_result(result)
+        self._store_result(job, result)
+
+    def _store_result(self, job: Job, result: Dict[str, Any]):
+        """Append a result to the job's JSON Lines file when a results directory is configured."""
+        if not self.results_dir:
+            return
+        with open(os.path.join(self.results_dir, f"{job.id}.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
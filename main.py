@@ -1,7 +1,15 @@
-from flask import Flask, request, jsonify
-from wardrobe_service import WardrobeService
-from models.clothing import ClothingItem
+from flask import Flask, Response, request, jsonify, stream_with_context
+from asgiref.wsgi import WsgiToAsgi
+from wardrobe_service import PIPELINE_MODES, WardrobeService
+from job_queue import JobManager
+from utils.streaming import format_sse
+from utils.metrics import render_prometheus
+from utils.price_filters import PriceOptions, apply_price_options
+from utils.responses import encode_recommendation, log_payload, recommendation_response
+import json
 import logging
+import os
+import threading
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -9,51 +17,338 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 wardrobe_service = WardrobeService()
+job_manager = JobManager(wardrobe_service)
+
+# Import the agents stack and warm the weather cache for the most common
+# locations in the background, so a new worker starts serving immediately
+WARDROBE_PRELOAD = os.getenv("WARDROBE_PRELOAD", "1") == "1"
+
+def warm_up():
+    if WARDROBE_PRELOAD:
+        wardrobe_service.preload()
+    if os.getenv("WEATHER_PREFETCH_LOCATIONS"):
+        from tools.weather import WEATHER_PREFETCH_LOCATIONS
+        wardrobe_service.prefetch_weather_sync(WEATHER_PREFETCH_LOCATIONS)
+
+if WARDROBE_PRELOAD or os.getenv("WEATHER_PREFETCH_LOCATIONS"):
+    threading.Thread(target=warm_up, name="wardrobe-warm-up", daemon=True).start()
+
+def wants_cache_bypass(data: dict, cache_control: str) -> bool:
+    """Whether the client asked to skip cached recommendations (body flag or Cache-Control)."""
+    return bool(data.get('bypass_cache')) or 'no-cache' in (cache_control or '').lower()
+
+def invalid_mode_error(data: dict):
+    """Error message if the request names an unknown pipeline mode, else None."""
+    mode = data.get('mode')
+    if mode is not None and mode not in PIPELINE_MODES:
+        return f'Unknown mode {mode!r}; expected one of {list(PIPELINE_MODES)}'
+    return None
+
+def invalid_latency_budget_error(data: dict):
+    """Error message if the request's latency budget is not a non-negative number of seconds, else None."""
+    budget = data.get('latency_budget')
+    if budget is not None and (isinstance(budget, bool) or not isinstance(budget, (int, float)) or budget < 0):
+        return f'Invalid latency_budget {budget!r}; expected a number of seconds'
+    return None
 
 @app.route('/api/wardrobe/recommend', methods=['POST'])
 def get_wardrobe_recommendation():
     """
     Generate a wardrobe recommendation based on user prompt.
-    
+
     Request body:
     {
-        "prompt": "string"  // User's wardrobe request
+        "prompt": "string",  // User's wardrobe request
+        "bypass_cache": bool,  // Optional, skip cached results (same as Cache-Control: no-cache)
+        "mode": "handoff" | "parallel",  // Optional, pipeline mode (default WARDROBE_PIPELINE_MODE)
+        "min_price": number,  // Optional, drop items cheaper than this (dollars)
+        "max_price": number,  // Optional, drop items more expensive than this (dollars)
+        "sort": "price_asc" | "price_desc",  // Optional, order items by price
+        "budget": number,  // Optional, keep one item per category with a total within this (dollars)
+        "latency_budget": number  // Optional, seconds for the model turns (default LATENCY_BUDGET, 0 = none)
     }
     """
     try:
         logger.debug("Received wardrobe recommendation request")
         data = request.get_json()
-        logger.debug(f"Request data: {data}")
-        
+        logger.debug("Request data: %s", data)
+
         if not data or 'prompt' not in data:
             logger.error("Missing prompt in request body")
             return jsonify({'error': 'Missing prompt in request body'}), 400
-            
+
+        request_error = invalid_mode_error(data) or invalid_latency_budget_error(data)
+        if request_error:
+            logger.error(request_error)
+            return jsonify({'error': request_error}), 400
+
+        try:
+            price_options = PriceOptions.from_request(data)
+        except ValueError as e:
+            logger.error(str(e))
+            return jsonify({'error': str(e)}), 400
+
         prompt = data['prompt']
-        logger.debug(f"Processing prompt: {prompt}")
-        
-        recommendation = wardrobe_service.create_wardrobe_recommendation(prompt)
+        logger.debug("Processing prompt: %s", prompt)
+
+        use_cache = not wants_cache_bypass(data, request.headers.get('Cache-Control'))
+        recommendation = wardrobe_service.create_wardrobe_recommendation_sync(
+            prompt, use_cache=use_cache, mode=data.get('mode'), latency_budget=data.get('latency_budget')
+        )
+        recommendation = apply_price_options(recommendation, price_options)
         logger.debug("Generated recommendation")
-        
-        # Convert recommendation to dictionary
-        result = {
-            'theme': recommendation.theme,
-            'styling_tips': recommendation.styling_tips,
-            'tops': [item.__dict__ for item in recommendation.tops],
-            'bottoms': [item.__dict__ for item in recommendation.bottoms],
-            'outerwear': [item.__dict__ for item in recommendation.outerwear],
-            'headwear': [item.__dict__ for item in recommendation.headwear],
-            'footwear': [item.__dict__ for item in recommendation.footwear],
-            'accessories': [item.__dict__ for item in recommendation.accessories]
-        }
-        
-        logger.debug(f"Sending response: {result}")
-        return jsonify(result)
-        
+
+        status, body, headers = recommendation_response(
+            recommendation,
+            accept_encoding=request.headers.get('Accept-Encoding'),
+            if_none_match=request.headers.get('If-None-Match')
+        )
+        log_payload(logger, "Sending response", lambda: encode_recommendation(recommendation).body)
+        return Response(body, status=status, headers=headers)
+
+    except TimeoutError as e:
+        # Latency budget exhausted with nothing cached to fall back on
+        logger.error(f"Recommendation timed out: {str(e)}")
+        return jsonify({'error': str(e)}), 504
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
+
+@app.route('/api/wardrobe/recommend/stream', methods=['POST'])
+def stream_wardrobe_recommendation():
+    """
+    Stream a wardrobe recommendation as Server-Sent Events.
+
+    Takes the same request body as /api/wardrobe/recommend. Emits `status`,
+    `theme`, `styling_tips` and `item` events as they become available, then a
+    final `recommendation` event with the full payload (or an `error` event).
+    """
+    data = request.get_json(silent=True)
+    if not data or 'prompt' not in data:
+        logger.error("Missing prompt in request body")
+        return jsonify({'error': 'Missing prompt in request body'}), 400
+
+    use_cache = not wants_cache_bypass(data, request.headers.get('Cache-Control'))
+
+    def generate():
+        try:
+            for event in wardrobe_service.stream_wardrobe_recommendation_sync(data['prompt'], use_cache=use_cache):
+                yield format_sse(event['event'], event['data'])
+        except Exception as e:
+            logger.error(f"Error streaming recommendation: {str(e)}", exc_info=True)
+            yield format_sse('error', {'error': str(e)})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+@app.route('/api/wardrobe/jobs', methods=['POST'])
+def submit_wardrobe_job():
+    """
+    Submit a bulk recommendation job.
+
+    Request body:
+    {
+        "prompts": ["string", ...],  // Prompts to generate recommendations for
+        "bypass_cache": bool,  // Optional, skip cached results
+        "mode": "handoff" | "parallel"  // Optional, pipeline mode
+    }
+
+    Returns 202 with the job status; poll GET /api/wardrobe/jobs/<id>.
+    """
+    data = request.get_json(silent=True)
+    prompts = data.get('prompts') if isinstance(data, dict) else None
+    if not isinstance(prompts, list) or not prompts or not all(isinstance(p, str) for p in prompts):
+        logger.error("Missing prompts in request body")
+        return jsonify({'error': 'Request body must contain a non-empty "prompts" list of strings'}), 400
+    mode_error = invalid_mode_error(data)
+    if mode_error:
+        logger.error(mode_error)
+        return jsonify({'error': mode_error}), 400
+
+    job = job_manager.submit(
+        prompts,
+        use_cache=not wants_cache_bypass(data, request.headers.get('Cache-Control')),
+        mode=data.get('mode')
+    )
+    logger.info(f"Submitted job {job.id} with {len(prompts)} prompts")
+    return jsonify(job.to_dict()), 202
+
+@app.route('/api/wardrobe/jobs/<job_id>', methods=['GET'])
+def get_wardrobe_job(job_id: str):
+    """
+    Get a job's status and results.
+
+    Pass `?since=N` (the `next` value of the previous poll) to receive only
+    results that completed since then.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    since = request.args.get('since', default=0, type=int)
+    return jsonify(job.to_dict(since=max(since, 0)))
+
+@app.route('/api/wardrobe/jobs/<job_id>', methods=['DELETE'])
+def cancel_wardrobe_job(job_id: str):
+    """Cancel a job. Results that already completed are kept."""
+    if not job_manager.cancel(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_manager.get(job_id).to_dict())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Per-stage latency histograms, counters and cache gauges in Prometheus text format."""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+# --- ASGI application ---
+#
+# Serve with an ASGI server (e.g. `uvicorn main:asgi_app`) to run many agent
+# sessions concurrently on a single event loop. Routes listed in ASGI_ROUTES are
+# handled natively; everything else falls through to the Flask app.
+
+flask_asgi_app = WsgiToAsgi(app)
+
+async def _read_body(receive) -> bytes:
+    """Read the full request body from an ASGI receive channel."""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+async def _send_json(send, status: int, payload: dict):
+    """Send a complete JSON response over an ASGI send channel."""
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def asgi_wardrobe_recommendation(scope, receive, send):
+    """Async version of /api/wardrobe/recommend."""
+    try:
+        logger.debug("Received wardrobe recommendation request (ASGI)")
+        try:
+            data = json.loads(await _read_body(receive) or b"null")
+        except json.JSONDecodeError:
+            data = None
+
+        if not isinstance(data, dict) or 'prompt' not in data:
+            logger.error("Missing prompt in request body")
+            await _send_json(send, 400, {'error': 'Missing prompt in request body'})
+            return
+        request_error = invalid_mode_error(data) or invalid_latency_budget_error(data)
+        if request_error:
+            logger.error(request_error)
+            await _send_json(send, 400, {'error': request_error})
+            return
+        try:
+            price_options = PriceOptions.from_request(data)
+        except ValueError as e:
+            logger.error(str(e))
+            await _send_json(send, 400, {'error': str(e)})
+            return
+
+        headers = dict(scope.get("headers") or [])
+        cache_control = headers.get(b"cache-control", b"").decode("latin-1")
+        recommendation = await wardrobe_service.create_wardrobe_recommendation(
+            data['prompt'],
+            use_cache=not wants_cache_bypass(data, cache_control),
+            mode=data.get('mode'),
+            latency_budget=data.get('latency_budget')
+        )
+        recommendation = apply_price_options(recommendation, price_options)
+        logger.debug("Generated recommendation")
+
+        status, body, response_headers = recommendation_response(
+            recommendation,
+            accept_encoding=headers.get(b"accept-encoding", b"").decode("latin-1"),
+            if_none_match=headers.get(b"if-none-match", b"").decode("latin-1")
+        )
+        log_payload(logger, "Sending response", lambda: encode_recommendation(recommendation).body)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in response_headers]
+            + [(b"content-length", str(len(body)).encode("ascii"))],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    except TimeoutError as e:
+        logger.error(f"Recommendation timed out: {str(e)}")
+        await _send_json(send, 504, {'error': str(e)})
+    except Exception as e:
+        logger.error(f"Error processing request: {str(e)}", exc_info=True)
+        await _send_json(send, 500, {'error': str(e)})
+
+async def asgi_stream_wardrobe_recommendation(scope, receive, send):
+    """Async version of /api/wardrobe/recommend/stream."""
+    try:
+        data = json.loads(await _read_body(receive) or b"null")
+    except json.JSONDecodeError:
+        data = None
+
+    if not isinstance(data, dict) or 'prompt' not in data:
+        logger.error("Missing prompt in request body")
+        await _send_json(send, 400, {'error': 'Missing prompt in request body'})
+        return
+
+    headers = dict(scope.get("headers") or [])
+    cache_control = headers.get(b"cache-control", b"").decode("latin-1")
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/event-stream")] + [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in SSE_HEADERS.items()
+        ],
+    })
+    try:
+        async for event in wardrobe_service.stream_wardrobe_recommendation(
+            data['prompt'],
+            use_cache=not wants_cache_bypass(data, cache_control)
+        ):
+            message = format_sse(event['event'], event['data'])
+            await send({"type": "http.response.body", "body": message.encode("utf-8"), "more_body": True})
+    except Exception as e:
+        logger.error(f"Error streaming recommendation: {str(e)}", exc_info=True)
+        message = format_sse('error', {'error': str(e)})
+        await send({"type": "http.response.body", "body": message.encode("utf-8"), "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+ASGI_ROUTES = {
+    ("POST", "/api/wardrobe/recommend"): asgi_wardrobe_recommendation,
+    ("POST", "/api/wardrobe/recommend/stream"): asgi_stream_wardrobe_recommendation,
+}
+
+async def asgi_app(scope, receive, send):
+    """ASGI entry point: native async routes first, then the Flask app."""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    handler = None
+    if scope["type"] == "http":
+        handler = ASGI_ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        handler = flask_asgi_app
+    await handler(scope, receive, send)
+
 if __name__ == '__main__':
     logger.info("Starting Flask server...")
     app.run(debug=True, port=5000)
\ No newline at end of file
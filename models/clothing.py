@@ -1,5 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+from pydantic.json_schema import SkipJsonSchema
 from typing import List, Optional
+from utils.pricing import parse_price
 
 class ClothingItem(BaseModel):
     name: str = Field(..., description="Name of the clothing item")
@@ -7,13 +9,24 @@ class ClothingItem(BaseModel):
     image_url: str = Field(..., description="URL to the image of the product")
     product_url: str = Field(..., description="URL to purchase the product")
     description: Optional[str] = Field(None, description="Brief description of the item")
+    # Parsed from `price` once when the item is created (or supplied by the scraper);
+    # left out of the JSON schema so the agents never have to produce them
+    price_cents: SkipJsonSchema[Optional[int]] = Field(None, description="Price in integer cents")
+    currency: SkipJsonSchema[Optional[str]] = Field(None, description="ISO 4217 currency code of the price")
+
+    @model_validator(mode="after")
+    def parse_price_fields(self):
+        if self.price_cents is None:
+            self.price_cents, self.currency = parse_price(self.price)
+        return self
     
 class WardrobeRecommendation(BaseModel):
     theme: str = Field(..., description="The theme or style of this wardrobe")
-    tops: List[ClothingItem] = Field(default_factory=list, description="Recommended shirts, t-shirts, jerseys, etc.")
+    tops: List[ClothingItem] = Field(default_factory=list, description="Recommended shirts, t-shirts, jerseys, dresses, etc.")
     bottoms: List[ClothingItem] = Field(default_factory=list, description="Recommended pants, shorts, skirts, etc.")
     outerwear: List[ClothingItem] = Field(default_factory=list, description="Recommended jackets, hoodies, etc.")
     headwear: List[ClothingItem] = Field(default_factory=list, description="Recommended hats, caps, beanies, etc.")
     footwear: Optional[List[ClothingItem]] = Field(default_factory=list, description="Recommended shoes, socks, etc.")
     accessories: Optional[List[ClothingItem]] = Field(default_factory=list, description="Recommended accessories like bags, jewelry, etc.")
+    uncategorized: Optional[List[ClothingItem]] = Field(default_factory=list, description="Items that do not fit any of the categories above")
     styling_tips: str = Field(..., description="Tips on how to combine these items and wear them") 
\ No newline at end of file
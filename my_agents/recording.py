@@ -0,0 +1,312 @@
+"""
+Record and replay agent sessions.
+
+A session is everything one recommendation needs from the outside world: the
+model responses of every agent turn and the outputs of the function tools
+(product search, weather). Recording wraps the model provider and the tools;
+the session is written as a gzipped JSON Lines trace:
+
+    {"type": "session", "version": 1, "prompt": ..., "mode": ..., "recorded_at": ..., "duration": ..., "refs": {...}}
+    {"type": "model", "key": <instructions hash>, "duration": ..., "output": [...], "usage": {...}, ...}
+    {"type": "tool", "name": ..., "arguments": ..., "output": ..., "duration": ...}
+
+Replaying serves those recorded responses and tool outputs instead of calling
+the model and the retailers, optionally waiting the recorded durations
+(scaled by `speed`), so parsing, categorization and serialization can be
+timed offline against real traffic. Model responses are matched per agent (by
+a hash of its instructions) in order; tool outputs by tool name and arguments.
+
+Compact tool outputs carry product references instead of URLs (see
+utils/compact.py), and the reference registry lives in process memory. The
+header's "refs" keeps the URLs of every reference the recorded tools
+returned, and replaying registers them again, so a trace replayed in another
+process resolves to the recorded URLs.
+
+The active session lives in a context variable, so concurrent runs (parallel
+mode, other requests) each see their own. Streaming runs are not recorded.
+"""
+import asyncio
+import contextvars
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from agents import Agent, FunctionTool, Model, ModelProvider, ModelResponse
+from agents.models.multi_provider import MultiProvider
+from agents.usage import deserialize_usage, serialize_usage
+from openai.types.responses import ResponseOutputItem
+from pydantic import TypeAdapter
+
+from utils.compact import product_refs
+
+# Directory each agent session is written to (one trace file per recommendation)
+WARDROBE_RECORD_DIR = os.getenv("WARDROBE_RECORD_DIR")
+TRACE_VERSION = 1
+
+_output_item = TypeAdapter(ResponseOutputItem)
+
+current_session: contextvars.ContextVar[Optional["Session"]] = contextvars.ContextVar("wardrobe_session", default=None)
+
+class ReplayMismatch(Exception):
+    """The run asked for a model response or tool output the trace does not have."""
+
+def instructions_key(system_instructions: Optional[str]) -> str:
+    return hashlib.blake2s((system_instructions or "").encode("utf-8"), digest_size=6).hexdigest()
+
+class Session:
+    """Events of one agent session, being recorded or replayed."""
+
+    def __init__(self, prompt: str, mode: str, events: Optional[List[Dict[str, Any]]] = None,
+                 replaying: bool = False, speed: float = 1.0):
+        self.prompt = prompt
+        self.mode = mode
+        self.events: List[Dict[str, Any]] = events or []
+        self.replaying = replaying
+        self.speed = speed
+        self.started = time.perf_counter()
+        self.recorded_at = time.time()
+        # Wall time of the recorded session (set on loaded traces)
+        self.recorded_duration: Optional[float] = None
+        # Product reference -> {"image_url", "product_url"} for the refs in tool outputs
+        self.refs: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        # Replay queues: model events per instructions key, tool events per (name, arguments) and per name
+        self._models = defaultdict(deque)
+        self._tools = defaultdict(deque)
+        self._tools_by_name = defaultdict(deque)
+        for event in self.events:
+            if event["type"] == "model":
+                self._models[event["key"]].append(event)
+            elif event["type"] == "tool":
+                self._tools[(event["name"], event["arguments"])].append(event)
+                self._tools_by_name[event["name"]].append(event)
+
+    # --- Recording ---
+
+    def record(self, event: Dict[str, Any]):
+        with self._lock:
+            self.events.append(event)
+
+    def record_model(self, system_instructions: Optional[str], response: ModelResponse, duration: float):
+        self.record({
+            "type": "model",
+            "key": instructions_key(system_instructions),
+            "duration": round(duration, 4),
+            "output": [item.model_dump(mode="json") for item in response.output],
+            "usage": serialize_usage(response.usage),
+            "response_id": response.response_id,
+        })
+
+    def record_tool(self, name: str, arguments: str, output: Any, duration: float):
+        self.record({"type": "tool", "name": name, "arguments": arguments, "output": output, "duration": round(duration, 4)})
+        refs = {}
+        for ref in _refs_in(output):
+            urls = product_refs.get(ref)
+            if urls is not None:
+                refs[ref] = urls
+        with self._lock:
+            self.refs.update(refs)
+
+    def save(self, path: str):
+        """Write the session as a gzipped JSON Lines trace."""
+        header = {
+            "type": "session",
+            "version": TRACE_VERSION,
+            "prompt": self.prompt,
+            "mode": self.mode,
+            "recorded_at": self.recorded_at,
+            "duration": round(time.perf_counter() - self.started, 4),
+            "refs": self.refs,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for event in [header] + self.events:
+                f.write(json.dumps(event, separators=(",", ":"), default=str) + "\n")
+
+    # --- Replay ---
+
+    @classmethod
+    def load(cls, path: str, speed: float = 1.0) -> "Session":
+        """Read a trace for replay; `speed` scales the recorded waits (0 = no waiting)."""
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        if not lines or lines[0].get("type") != "session":
+            raise ValueError(f"{path} is not a session trace")
+        header = lines[0]
+        if header.get("version") != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version {header.get('version')} in {path}")
+        session = cls(header["prompt"], header["mode"], lines[1:], replaying=True, speed=speed)
+        session.recorded_at = header.get("recorded_at")
+        session.recorded_duration = header.get("duration")
+        session.refs = header.get("refs") or {}
+        return session
+
+    async def _wait(self, event: Dict[str, Any]):
+        if self.speed > 0 and event.get("duration"):
+            await asyncio.sleep(event["duration"] / self.speed)
+
+    def _take(self, queue: deque) -> Optional[Dict[str, Any]]:
+        # An event consumed through one index must not be served again through another
+        while queue:
+            event = queue.popleft()
+            if not event.get("_used"):
+                event["_used"] = True
+                return event
+        return None
+
+    async def replay_model(self, system_instructions: Optional[str]) -> ModelResponse:
+        key = instructions_key(system_instructions)
+        with self._lock:
+            event = self._take(self._models[key])
+            if event is None:
+                # Instructions changed since recording: fall back to the next unused response
+                event = next((e for e in self.events if e["type"] == "model" and not e.get("_used")), None)
+                if event is None:
+                    raise ReplayMismatch(f"No recorded model response left for instructions {key}")
+                event["_used"] = True
+                print(f"Replay: no response recorded for instructions {key}, using the next one in order")
+        await self._wait(event)
+        return ModelResponse(
+            output=[_output_item.validate_python(item) for item in event["output"]],
+            usage=deserialize_usage(event["usage"]),
+            response_id=event.get("response_id"),
+        )
+
+    async def replay_tool(self, name: str, arguments: str) -> Any:
+        with self._lock:
+            event = self._take(self._tools[(name, arguments)]) or self._take(self._tools_by_name[name])
+        if event is None:
+            raise ReplayMismatch(f"No recorded output left for tool {name}({arguments})")
+        await self._wait(event)
+        return event["output"]
+
+def _refs_in(output: Any) -> Iterator[str]:
+    """Product references ("ref" values) anywhere in a tool output."""
+    if isinstance(output, dict):
+        for key, value in output.items():
+            if key == "ref" and isinstance(value, str):
+                yield value
+            else:
+                yield from _refs_in(value)
+    elif isinstance(output, list):
+        for value in output:
+            yield from _refs_in(value)
+
+# --- Model wrappers ---
+
+class RecordingModel(Model):
+    """Passes calls through to the real model and records the responses."""
+
+    def __init__(self, model: Model, session: Session):
+        self.model = model
+        self.session = session
+
+    async def get_response(self, system_instructions, *args, **kwargs) -> ModelResponse:
+        start = time.perf_counter()
+        response = await self.model.get_response(system_instructions, *args, **kwargs)
+        self.session.record_model(system_instructions, response, time.perf_counter() - start)
+        return response
+
+    def stream_response(self, *args, **kwargs):
+        return self.model.stream_response(*args, **kwargs)
+
+class ReplayModel(Model):
+    """Serves recorded responses; never contacts a model."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def get_response(self, system_instructions, *args, **kwargs) -> ModelResponse:
+        return await self.session.replay_model(system_instructions)
+
+    def stream_response(self, *args, **kwargs):
+        raise ReplayMismatch("Streaming runs cannot be replayed")
+
+class SessionModelProvider(ModelProvider):
+    """Resolves models through `provider`, wrapped to record or replay the session."""
+
+    def __init__(self, session: Session, provider: Optional[ModelProvider] = None):
+        self.session = session
+        self.provider = provider
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        if self.session.replaying:
+            return ReplayModel(self.session)
+        return RecordingModel(self.provider.get_model(model_name), self.session)
+
+# Shared so every run reuses the provider's clients
+_default_provider: Optional[ModelProvider] = None
+
+def model_provider() -> ModelProvider:
+    """Model provider for agent runs, recording or replaying the active session if there is one."""
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = MultiProvider()
+    session = current_session.get()
+    if session is None:
+        return _default_provider
+    return SessionModelProvider(session, _default_provider)
+
+# --- Tool wrappers ---
+
+def instrument_tools(agents: List[Agent]):
+    """Wrap the agents' function tools (once) so sessions record or replay their outputs."""
+    for agent in agents:
+        for tool in agent.tools:
+            if isinstance(tool, FunctionTool) and not getattr(tool, "_session_instrumented", False):
+                tool.on_invoke_tool = _session_tool(tool.name, tool.on_invoke_tool)
+                tool._session_instrumented = True
+
+def _session_tool(name: str, invoke):
+    async def on_invoke_tool(context, arguments: str):
+        session = current_session.get()
+        if session is None:
+            return await invoke(context, arguments)
+        if session.replaying:
+            return await session.replay_tool(name, arguments)
+        start = time.perf_counter()
+        output = await invoke(context, arguments)
+        session.record_tool(name, arguments, output, time.perf_counter() - start)
+        return output
+    return on_invoke_tool
+
+# --- Sessions ---
+
+@contextmanager
+def recording(prompt: str, mode: str, directory: Optional[str] = WARDROBE_RECORD_DIR) -> Iterator[Optional[Session]]:
+    """
+    Record the agent runs inside the block into `directory`, if set.
+
+    Yields the session, or None when recording is off or a session (e.g. a
+    replay) is already active. The trace is written even if the runs fail.
+    """
+    if not directory or current_session.get() is not None:
+        yield None
+        return
+    session = Session(prompt, mode)
+    token = current_session.set(session)
+    try:
+        yield session
+    finally:
+        current_session.reset(token)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl.gz")
+        session.save(path)
+        print(f"Recorded agent session to {path}")
+
+@contextmanager
+def replaying(session: Session) -> Iterator[Session]:
+    """Serve the agent runs inside the block from a loaded session, with its product references registered."""
+    for ref, urls in session.refs.items():
+        product_refs.set(ref, urls)
+    token = current_session.set(session)
+    try:
+        yield session
+    finally:
+        current_session.reset(token)
@@ -0,0 +1,172 @@
+"""
+Per-agent model tiers, per-request latency budgets and model fallback.
+
+Model tiers are ordered from the most capable to the fastest (MODEL_TIERS) and
+every agent is routed to one of them (AGENT_MODEL_TIERS), so mechanical work
+such as assembling found products into JSON can run on a smaller model.
+
+A request may carry a latency budget (LATENCY_BUDGET by default). A model
+turn on any but the fastest tier is cancelled once it runs past its share of
+the remaining budget (LATENCY_BUDGET_TURN_SHARE) and retried on the next
+faster tier; the fastest tier gets whatever is left. When the budget runs out
+LatencyBudgetExceeded is raised, and the service falls back to a cached or
+partial answer.
+
+Every turn is recorded on the request's LatencyBudget (the tier it was routed
+to and the tier that served it), exported as metrics and logged per request.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from agents import Model, ModelProvider, ModelResponse, RunConfig
+from my_agents.recording import model_provider
+from utils.metrics import increment, observe
+
+def _parse_pairs(value: str) -> Dict[str, str]:
+    """Parse "name=value,name=value" settings, keeping their order."""
+    pairs = {}
+    for entry in value.split(","):
+        if entry.strip():
+            name, _, setting = entry.partition("=")
+            pairs[name.strip()] = setting.strip()
+    return pairs
+
+# Tier name -> model, from the most capable to the fastest. An empty model
+# means the agents SDK default model.
+MODEL_TIERS = _parse_pairs(os.getenv("MODEL_TIERS", "standard=,fast=gpt-4.1-mini"))
+# Agent key (as used for the prompt cache key) -> tier name
+AGENT_MODEL_TIERS = _parse_pairs(os.getenv(
+    "AGENT_MODEL_TIERS", "wardrobe=standard,style-advisor=standard,product-search=fast"
+))
+for _agent_key, _tier in AGENT_MODEL_TIERS.items():
+    if _tier not in MODEL_TIERS:
+        raise ValueError(f"AGENT_MODEL_TIERS routes {_agent_key} to unknown tier {_tier!r}; "
+                         f"expected one of {list(MODEL_TIERS)}")
+
+# Default seconds a recommendation may spend on model turns (0 = no budget)
+LATENCY_BUDGET = float(os.getenv("LATENCY_BUDGET", "0"))
+# Fraction of the remaining budget a turn may use before falling back to a faster tier
+LATENCY_BUDGET_TURN_SHARE = float(os.getenv("LATENCY_BUDGET_TURN_SHARE", "0.5"))
+
+class LatencyBudgetExceeded(TimeoutError):
+    """A request's latency budget ran out before its model turns finished."""
+
+def agent_model(agent_key: str) -> Optional[str]:
+    """Model of the tier an agent is routed to (None for the SDK default)."""
+    return MODEL_TIERS[AGENT_MODEL_TIERS.get(agent_key, next(iter(MODEL_TIERS)))] or None
+
+class LatencyBudget:
+    """Deadline of one request and the record of which tier served each of its model turns."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds if seconds > 0 else None
+        # (routed tier, serving tier, seconds, outcome) per attempt
+        self.turns: List[Tuple[str, str, float, str]] = []
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None without a budget."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def record(self, routed: str, tier: str, seconds: float, outcome: str):
+        self.turns.append((routed, tier, seconds, outcome))
+        increment("wardrobe_model_turns_total", "Model turn attempts by routed and serving tier",
+                  routed=routed, tier=tier, outcome=outcome)
+        observe("wardrobe_model_turn_seconds", "Model turn duration per serving tier", seconds, tier=tier)
+
+    @property
+    def fell_back(self) -> bool:
+        return any(outcome == "timeout" for _, _, _, outcome in self.turns)
+
+    @property
+    def served_by(self) -> str:
+        """The tiers that served the turns, most capable first (e.g. "standard+fast")."""
+        served = {tier for _, tier, _, outcome in self.turns if outcome == "ok"}
+        return "+".join(tier for tier in MODEL_TIERS if tier in served) or "none"
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{routed}->{tier} {seconds * 1000:.0f}ms" + ("" if outcome == "ok" else f" ({outcome})")
+            for routed, tier, seconds, outcome in self.turns
+        )
+
+current_budget: contextvars.ContextVar[Optional[LatencyBudget]] = contextvars.ContextVar("wardrobe_budget", default=None)
+
+@contextmanager
+def budgeted(budget: LatencyBudget) -> Iterator[LatencyBudget]:
+    """Run the agent runs inside the block under `budget`."""
+    token = current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        current_budget.reset(token)
+
+class FallbackModel(Model):
+    """
+    Runs each turn on the first of `tiers`, falling back to the next (faster)
+    tier when the turn overruns its share of the request's latency budget.
+    Streaming always uses the first tier.
+    """
+
+    def __init__(self, tiers: List[Tuple[str, Model]]):
+        self.tiers = tiers
+
+    async def get_response(self, *args, **kwargs) -> ModelResponse:
+        budget = current_budget.get()
+        routed = self.tiers[0][0]
+        if budget is None or budget.deadline is None:
+            start = time.perf_counter()
+            response = await self.tiers[0][1].get_response(*args, **kwargs)
+            if budget is not None:
+                budget.record(routed, routed, time.perf_counter() - start, "ok")
+            return response
+
+        for position, (tier, model) in enumerate(self.tiers):
+            remaining = budget.remaining()
+            if remaining <= 0:
+                break
+            last = position == len(self.tiers) - 1
+            timeout = remaining if last else remaining * LATENCY_BUDGET_TURN_SHARE
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(model.get_response(*args, **kwargs), timeout)
+            except asyncio.TimeoutError:
+                budget.record(routed, tier, time.perf_counter() - start, "timeout")
+                if not last:
+                    print(f"Model tier {tier} exceeded {timeout:.1f}s, falling back to {self.tiers[position + 1][0]}")
+                continue
+            budget.record(routed, tier, time.perf_counter() - start, "ok")
+            return response
+        raise LatencyBudgetExceeded(f"Latency budget of {budget.seconds:g}s exceeded ({budget.summary()})")
+
+    def stream_response(self, *args, **kwargs):
+        return self.tiers[0][1].stream_response(*args, **kwargs)
+
+class TieredModelProvider(ModelProvider):
+    """Resolves tier models through `provider`, each with the faster tiers as fallbacks."""
+
+    def __init__(self, provider: ModelProvider):
+        self.provider = provider
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        names = list(MODEL_TIERS)
+        models = [MODEL_TIERS[name] or None for name in names]
+        if model_name not in models:
+            # Not a tier model (e.g. set directly on an agent): no fallback
+            return self.provider.get_model(model_name)
+        tiers, seen = [], set()
+        for name, model in list(zip(names, models))[models.index(model_name):]:
+            if model not in seen:
+                seen.add(model)
+                tiers.append((name, self.provider.get_model(model)))
+        return FallbackModel(tiers)
+
+def run_config() -> RunConfig:
+    """RunConfig routing model turns through the tiers, recording or replaying the active session."""
+    return RunConfig(model_provider=TieredModelProvider(model_provider()))
@@ -1,70 +1,77 @@
-from agents import Agent, WebSearchTool
-from tools.clothing_search import search_real_products
+from agents import Agent, ModelSettings, WebSearchTool
+from tools.clothing_search import search_real_products, search_real_products_batch
 from tools.weather import get_weather_information
 from models.clothing import WardrobeRecommendation
-from utils.guardrails import validate_price_range, validate_image_urls
+from my_agents.recording import instrument_tools
+from my_agents.routing import agent_model
+from utils.compact import COMPACT_FORMAT_NOTE, COMPACT_TOOL_RESULTS
+from utils.guardrails import validate_price_range
+from utils.repair import PLACEHOLDER_IMAGE_URL, PLACEHOLDER_PRODUCT_URL
+import os
+import textwrap
+
+# Instructions are fully static and start with a block shared by every agent, so
+# the provider can serve the common prompt prefix from its prompt cache. Agent
+# specific text follows; nothing per-request is ever put into instructions.
+PROMPT_CACHE_KEY_PREFIX = os.getenv("PROMPT_CACHE_KEY_PREFIX", "wardrobe")
+
+SHARED_INSTRUCTIONS = textwrap.dedent(f"""
+    Clothing items are JSON objects with the fields name, price (a string such as "$29.99"), image_url, product_url and description.
+    {COMPACT_FORMAT_NOTE if COMPACT_TOOL_RESULTS else ""}
+    If no real URL is available, use "{PLACEHOLDER_IMAGE_URL}" as image_url and "{PLACEHOLDER_PRODUCT_URL}" as product_url.
+    Return ONLY valid JSON, with no other text or formatting.
+""").strip()
+
+def build_instructions(text: str) -> str:
+    """Shared prefix followed by the agent's own instructions, without indentation."""
+    return f"{SHARED_INSTRUCTIONS}\n\n{textwrap.dedent(text).strip()}"
+
+def cached_prompt_settings(agent_key: str) -> ModelSettings:
+    """Route every request of an agent to the same provider prompt cache."""
+    return ModelSettings(extra_args={"prompt_cache_key": f"{PROMPT_CACHE_KEY_PREFIX}-{agent_key}"})
 
 # Create specialized agents
 product_search_agent = Agent(
     name="Clothing Search Specialist",
-    instructions="""
+    instructions=build_instructions("""
     You are a specialist in finding clothing items based on specific themes and preferences.
-    
+
     CRITICAL: You MUST return ONLY a JSON object with clothing items. DO NOT include any other text or formatting.
-    
+
     Example output format:
-    {
-        "items": [
-            {
-                "name": "",
-                "price": "",
-                "image_url": "",
-                "product_url": "",
-                "description": ""
-            }
-        ]
-    }
-    
+    {"items": [{"name": "", "price": "", "image_url": "", "product_url": "", "description": ""}]}
+
     Requirements:
     1. Return ONLY valid JSON - no other text or formatting
     2. Each item must have all fields (name, price, image_url, product_url, description)
-    3. Use placeholder URLs if real ones aren't available
+    3. Use ref: URLs for found products and placeholder URLs if real ones aren't available
     4. Match items to the user's specific requests and preferences
     5. Consider seasonal appropriateness and location
-    """,
-    tools=[search_real_products, WebSearchTool()]
+    6. When you need items from several categories, search them all in one search_real_products_batch call
+    """),
+    tools=[search_real_products, search_real_products_batch, WebSearchTool()],
+    model=agent_model("product-search"),
+    model_settings=cached_prompt_settings("product-search")
 )
 
 style_advisor_agent = Agent(
     name="Style Advisor",
-    instructions="""
+    instructions=build_instructions("""
     You are a fashion advisor specializing in creating cohesive wardrobes based on themes.
-    
+
     CRITICAL: You MUST return ONLY a JSON object that can be incorporated into a wardrobe recommendation.
     DO NOT include any other text or formatting.
-    
+
     Required JSON structure:
     {
-        "theme": "Brief theme description",
-        "styling_tips": "Detailed styling advice",
-        "suggested_items": {
-            "tops": [
-                {
-                    "name": "Item name",
-                    "price": "Price as string (e.g. '$29.99')",
-                    "image_url": "URL to product image",
-                    "product_url": "URL to purchase product",
-                    "description": "Brief item description"
-                }
-            ],
-            "bottoms": [],
-            "outerwear": [],
-            "headwear": [],
-            "footwear": [],
-            "accessories": []
-        }
+      "theme": "Brief theme description",
+      "styling_tips": "Detailed styling advice",
+      "suggested_items": {
+        "tops": [{"name": "Item name", "price": "$29.99", "image_url": "URL to product image", "product_url": "URL to purchase product", "description": "Brief item description"}],
+        "bottoms": [], "outerwear": [], "headwear": [], "footwear": [], "accessories": []
+      }
     }
-    
+
     Requirements:
     1. Return ONLY valid JSON matching the exact structure above
     2. ALL fields shown above are REQUIRED - do not omit any
@@ -74,41 +81,43 @@ style_advisor_agent = Agent(
     6. Focus on versatility and appropriate seasonal wear
     7. DO NOT add any fields not shown in the structure above
     8. DO NOT return any other format or include any explanatory text
-    """,
-    tools=[get_weather_information, WebSearchTool()]
+    """),
+    tools=[get_weather_information, WebSearchTool()],
+    model=agent_model("style-advisor"),
+    model_settings=cached_prompt_settings("style-advisor")
 )
 
 # Main wardrobe agent
 wardrobe_agent = Agent(
     name="Wardrobe Assistant",
-    instructions="""
+    instructions=build_instructions("""
     You are a personal shopping assistant helping users build a new wardrobe based on their preferences.
-    
+
     Process:
     1. Get style advice and suggested items from the style advisor
     2. Get specific product recommendations from the product search specialist
     3. Return ONLY this exact structure, with no nesting:
     {
-        "theme": "Theme description",
-        "tops": [items from suggested_items.tops],
-        "bottoms": [items from suggested_items.bottoms],
-        "outerwear": [items from suggested_items.outerwear],
-        "headwear": [items from suggested_items.headwear],
-        "footwear": [items from suggested_items.footwear],
-        "accessories": [items from suggested_items.accessories],
-        "styling_tips": "Styling advice"
+      "theme": "Theme description",
+      "tops": [items from suggested_items.tops],
+      "bottoms": [items from suggested_items.bottoms],
+      "outerwear": [items from suggested_items.outerwear],
+      "headwear": [items from suggested_items.headwear],
+      "footwear": [items from suggested_items.footwear],
+      "accessories": [items from suggested_items.accessories],
+      "styling_tips": "Styling advice"
     }
-    
+
     CRITICAL: You MUST return ONLY a JSON object matching the WardrobeRecommendation model structure EXACTLY.
     DO NOT include any other text, explanations, or formatting.
     DO NOT keep items nested under suggested_items.
-    
+
     Requirements:
     1. Return ONLY valid JSON matching the exact structure above
     2. ALL fields shown above are REQUIRED - do not omit any
     3. Each clothing category (tops, bottoms, etc.) must be a list, even if empty
     4. Each clothing item must have all fields (name, price, image_url, product_url, description)
-    5. Use placeholder URLs if real ones aren't available
+    5. Use ref: URLs for found products and placeholder URLs if real ones aren't available
     6. Ensure the response matches the user's location, preferences, and specific requests
     7. DO NOT add any fields not shown in the structure above
     8. DO NOT return any other format or include any explanatory text
@@ -116,8 +125,13 @@ wardrobe_agent = Agent(
     10. Use the style advisor's theme and styling tips in the final output
     11. DO NOT keep the suggested_items structure in the output
     12. Move all items to their respective top-level arrays
-    """,
+    """),
     handoffs=[product_search_agent],
-    output_guardrails=[validate_price_range, validate_image_urls],
-    output_type=WardrobeRecommendation
-) 
\ No newline at end of file
+    output_guardrails=[validate_price_range],
+    output_type=WardrobeRecommendation,
+    model=agent_model("wardrobe"),
+    model_settings=cached_prompt_settings("wardrobe")
+)
+
+# Let recorded and replayed sessions capture or serve the function tool outputs
+instrument_tools([product_search_agent, style_advisor_agent, wardrobe_agent])
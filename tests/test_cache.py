@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from utils.cache import SQLiteCache, TTLCache
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "memory":
+            return TTLCache(**kwargs)
+        return SQLiteCache(str(tmp_path / "cache.db"), **kwargs)
+    return make
+
+def test_get_set_and_delete(make_cache):
+    cache = make_cache()
+    assert cache.get("k") is None
+    cache.set("k", {"items": [1, 2]})
+    assert cache.get("k") == {"items": [1, 2]}
+    cache.delete("k")
+    assert cache.get("k") is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+def test_entries_expire(make_cache, monkeypatch):
+    cache = make_cache(ttl=10)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl=1)
+    monkeypatch.setattr(time, "time", lambda: now + 5)
+    assert cache.get("short") is None
+    assert cache.get("default") == 1
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("default") is None
+    assert cache.stats()["expirations"] == 2
+    assert len(cache) == 0
+
+def test_least_recently_used_entry_is_evicted(make_cache, monkeypatch):
+    cache = make_cache(max_size=2)
+    clock = iter(range(1000))
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + next(clock))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
+
+def test_sqlite_cache_is_shared_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteCache(path).set("k", ["shirt"])
+    assert SQLiteCache(path).get("k") == ["shirt"]
@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+import pytest
+
+from tools import clothing_search, retailers
+from tools.catalog import ProductCatalog
+
+SHIRTS = [
+    {"id": "1", "name": "Red Plaid Flannel Shirt", "price": "$25", "theme": "lumberjack"},
+    {"id": "2", "name": "Boston Celtics Graphic Shirt", "price": "$30", "theme": "basketball"},
+    {"id": "3", "name": "Fan Favorite Shirt", "price": "$15", "theme": "casual"},
+    {"id": "4", "name": "Boston Red Sox Fan Shirt", "price": "$35", "theme": "baseball"},
+]
+
+@pytest.fixture(params=[True, False], ids=["fts", "like"])
+def catalog(request):
+    catalog = ProductCatalog()
+    catalog.fts_enabled = catalog.fts_enabled and request.param
+    catalog.ingest(SHIRTS)
+    return catalog
+
+def test_any_keyword_matches_by_default(catalog):
+    assert len(catalog.search("Boston Red Sox fan", required="shirt", limit=10)) == 4
+
+def test_match_all_requires_every_keyword(catalog):
+    rows = catalog.search("Boston Red Sox fan", required="shirt", limit=3, match_all=True)
+    assert [row["name"] for row in rows] == ["Boston Red Sox Fan Shirt"]
+
+def test_match_all_without_a_full_match_finds_nothing():
+    catalog = ProductCatalog()
+    catalog.ingest(SHIRTS[:3])
+    assert catalog.search("Boston Red Sox fan", required="shirt", limit=3, match_all=True) == []
+
+def test_partial_catalog_matches_do_not_replace_retailers(monkeypatch, tmp_path):
+    catalog = ProductCatalog()
+    catalog.ingest(SHIRTS[:3])
+    monkeypatch.setattr(clothing_search, "product_catalog", catalog)
+    path = tmp_path / "shop.json"
+    path.write_text(json.dumps([{"name": "Boston Red Sox Fan Shirt", "price": "$35",
+                                 "product_url": "https://shop.test/sox"}]))
+    monkeypatch.setattr(retailers, "retailers", [retailers.FixtureRetailerAdapter(str(path))])
+
+    products, source, error = asyncio.run(
+        clothing_search._search_uncached("test-partial", "Boston Red Sox fan", "shirt", 3)
+    )
+    assert (source, error) == ("retailers", None)
+    assert [product["name"] for product in products] == ["Boston Red Sox Fan Shirt"]
+
+def test_failed_ingest_is_rolled_back():
+    catalog = ProductCatalog()
+    with pytest.raises(Exception):
+        catalog.ingest([SHIRTS[0], {"id": "bad", "name": "Bad Shirt", "price": "$1", "theme": {"not": "text"}}])
+    assert len(catalog) == 0
+    assert catalog.ingest(SHIRTS) == 4
+    assert len(catalog) == 4
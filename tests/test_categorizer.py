@@ -0,0 +1,47 @@
+from utils.categorizer import UNCATEGORIZED, Categorizer
+from utils.repair import repair_recommendation
+from wardrobe_service import WardrobeService
+
+def product(name: str, url: str = "") -> dict:
+    return {"name": name, "price": "$10", "image_url": "https://img.test/1.jpg",
+            "product_url": url or f"https://shop.test/{name.replace(' ', '-')}"}
+
+def test_classify_whole_words_and_plurals():
+    categorizer = Categorizer()
+    assert categorizer.classify("Capri Pants") == ["bottoms"]
+    assert categorizer.classify("Baseball Caps") == ["headwear"]
+    assert categorizer.classify("Tank Top") == ["tops"]
+    assert categorizer.classify("Mystery Item") == []
+
+def test_item_matching_several_categories_goes_to_one():
+    categorizer = Categorizer()
+    assert categorizer.classify("Hoodie Sweatshirt") == ["outerwear", "tops"]
+    buckets = categorizer.categorize([product("Hoodie Sweatshirt"), product("Mystery Item")])
+    placed = {category: [item.name for item in items] for category, items in buckets.items() if items}
+    assert placed == {"tops": ["Hoodie Sweatshirt"], UNCATEGORIZED: ["Mystery Item"]}
+
+def test_dresses_and_one_piece_garments_are_tops():
+    categorizer = Categorizer()
+    for name in ("Floral Maxi Dresses", "Evening Gown", "Denim Jumpsuit", "Linen Romper"):
+        assert categorizer.category(name) == "tops", name
+
+def test_most_specific_keyword_wins_over_taxonomy_order():
+    categorizer = Categorizer()
+    assert categorizer.category("Top Hat") == "headwear"
+    assert categorizer.category("Dress Shoes") == "footwear"
+    assert categorizer.category("Dress Pants") == "bottoms"
+    assert categorizer.category("Black Tank Top Dress") == "tops"
+
+def test_custom_taxonomy():
+    categorizer = Categorizer({"tops": ["kurta"], "bottoms": ["dhoti"]})
+    buckets = categorizer.categorize([product("Silk Kurtas"), product("Cotton Dhoti")])
+    assert [item.name for item in buckets["tops"]] == ["Silk Kurtas"]
+    assert [item.name for item in buckets["bottoms"]] == ["Cotton Dhoti"]
+
+def test_categorized_items_need_no_duplicate_repair():
+    recommendation = WardrobeService()._create_from_categorized(
+        [product("Hoodie Sweatshirt"), product("Denim Jeans")], theme="t", styling_tips="s"
+    )
+    assert "duplicate" not in repair_recommendation(recommendation)
+    assert [item.name for item in recommendation.tops] == ["Hoodie Sweatshirt"]
+    assert recommendation.outerwear == []
@@ -0,0 +1,41 @@
+import asyncio
+import http.server
+import threading
+
+import pytest
+
+from tools.http_client import aclose_async_client, close_client, fetch, fetch_async, get_client
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = self.path.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+def test_sync_client_is_shared(server_url):
+    try:
+        assert fetch(f"{server_url}/sync").text == "/sync"
+        assert get_client() is get_client()
+    finally:
+        close_client()
+
+def test_async_client(server_url):
+    async def main():
+        try:
+            return (await fetch_async(f"{server_url}/async")).text
+        finally:
+            await aclose_async_client()
+
+    assert asyncio.run(main()) == "/async"
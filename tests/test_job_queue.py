@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from job_queue import JobManager
+from models.clothing import WardrobeRecommendation
+from wardrobe_service import WardrobeService
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+class StubService(WardrobeService):
+    """Agent runs replaced by sleeps, counting how many are running."""
+
+    def __init__(self, seconds: float):
+        super().__init__()
+        self.seconds = seconds
+        self.running = self.max_running = self.started = 0
+
+    async def _generate_and_cache(self, cache_key, user_prompt, mode="handoff", latency_budget=None):
+        self.started += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.seconds)
+        finally:
+            self.running -= 1
+        return WardrobeRecommendation(theme=user_prompt, styling_tips="")
+
+def test_jobs_run_prompts_through_a_bounded_pool():
+    service = StubService(0.01)
+    job = JobManager(service, max_concurrency=3).submit([f"prompt {n}" for n in range(20)], use_cache=False)
+    wait_for(lambda: job.done)
+    assert job.status == "completed"
+    assert sorted(result["index"] for result in job.results) == list(range(20))
+    assert service.max_running == 3
+
+def test_cancel_stops_the_runs_in_flight():
+    service = StubService(30)
+    manager = JobManager(service, max_concurrency=2)
+    job = manager.submit([f"prompt {n}" for n in range(10)], use_cache=False)
+    wait_for(lambda: service.running == 2)
+    assert manager.cancel(job.id)
+    wait_for(lambda: job.done)
+    assert job.status == "cancelled"
+    assert (service.running, service.started) == (0, 2)
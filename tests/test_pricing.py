@@ -0,0 +1,77 @@
+import pytest
+
+from models.clothing import ClothingItem, WardrobeRecommendation
+from tools.catalog import ProductCatalog
+from utils.price_filters import PriceOptions, apply_price_options, assemble_outfit, filter_by_price, sort_by_price
+from utils.pricing import format_cents, parse_price, price_to_cents
+
+def item(name: str, price: str) -> ClothingItem:
+    return ClothingItem(name=name, price=price, image_url="", product_url="")
+
+@pytest.mark.parametrize("price, expected", [
+    ("$34.99", (3499, "USD")),
+    ("$1,234.5", (123450, "USD")),
+    ("$1,234", (123400, "USD")),
+    ("$12", (1200, "USD")),
+    ("€12,50", (1250, "EUR")),
+    ("1.234,50 EUR", (123450, "EUR")),
+    ("£5", (500, "GBP")),
+    ("Now $29.99, was $40", (2999, "USD")),
+    ("", (None, None)),
+    ("Price unavailable", (None, None)),
+])
+def test_parse_price(price, expected):
+    assert parse_price(price) == expected
+
+def test_format_cents():
+    assert format_cents(123450) == "$1,234.50"
+    assert price_to_cents(format_cents(905)) == 905
+
+def test_item_parses_price_once():
+    assert (item("Tee", "€12,50").price_cents, item("Tee", "€12,50").currency) == (1250, "EUR")
+
+def test_filter_and_sort_by_price():
+    items = [item("A", "$30"), item("B", "$10"), item("C", "n/a"), item("D", "$20")]
+    assert [i.name for i in filter_by_price(items, 1000, 2000)] == ["B", "D"]
+    assert [i.name for i in filter_by_price(items)] == ["A", "B", "C", "D"]
+    assert [i.name for i in sort_by_price(items, descending=True)] == ["A", "D", "B", "C"]
+
+def test_assemble_outfit_stays_within_budget():
+    buckets = {
+        "tops": [item("Tee", "$10"), item("Shirt", "$40")],
+        "bottoms": [item("Jeans", "$30"), item("Chinos", "$50")],
+        "footwear": [item("Boots", "$200")],
+    }
+    outfit = assemble_outfit(buckets, 8000)
+    assert outfit["footwear"] == []
+    chosen = [items[0] for items in outfit.values() if items]
+    assert {i.name for i in chosen} == {"Tee", "Chinos"}
+    assert sum(i.price_cents for i in chosen) <= 8000
+
+def test_price_options_from_request():
+    options = PriceOptions.from_request({"min_price": 10, "max_price": "$49.99", "sort": "price_asc", "budget": 100})
+    assert (options.min_cents, options.max_cents, options.budget_cents) == (1000, 4999, 10000)
+    bad_requests = (
+        {"sort": "cheapest"}, {"budget": -1}, {"max_price": True}, {"min_price": "cheap"},
+        {"budget": float("inf")}, {"max_price": float("-inf")}, {"min_price": float("nan")},
+    )
+    for bad in bad_requests:
+        with pytest.raises(ValueError):
+            PriceOptions.from_request(bad)
+
+def test_apply_price_options_returns_copy():
+    recommendation = WardrobeRecommendation(theme="t", styling_tips="s", tops=[item("A", "$30"), item("B", "$10")])
+    filtered = apply_price_options(recommendation, PriceOptions(max_cents=2000))
+    assert [i.name for i in filtered.tops] == ["B"]
+    assert len(recommendation.tops) == 2
+    assert apply_price_options(recommendation, PriceOptions()) is recommendation
+
+def test_catalog_keeps_currency(tmp_path):
+    catalog = ProductCatalog(str(tmp_path / "catalog.db"))
+    catalog.ingest([
+        {"id": "1", "name": "Wool Scarf", "price": "€12,50"},
+        {"id": "2", "name": "Silk Scarf", "price": "$5.00", "price_cents": 500, "currency": "USD"},
+    ])
+    rows = {row["id"]: row for row in catalog.search("scarf")}
+    assert (rows["1"]["price_cents"], rows["1"]["currency"]) == (1250, "EUR")
+    assert (rows["2"]["price_cents"], rows["2"]["currency"]) == (500, "USD")
@@ -0,0 +1,52 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RECORD = """
+import sys
+from benchmarks.bench_replay import record_offline_sessions
+print("\\n".join(record_offline_sessions(sys.argv[1])))
+"""
+
+REPLAY = """
+import json, sys
+from utils.categorizer import CATEGORIES, UNCATEGORIZED
+from wardrobe_service import WardrobeService
+recommendation = WardrobeService().replay_sync(sys.argv[1], speed=0)
+items = [item for category in CATEGORIES + [UNCATEGORIZED] for item in getattr(recommendation, category) or []]
+print(json.dumps([[item.image_url, item.product_url] for item in items]))
+"""
+
+def run(script: str, *args: str) -> str:
+    env = {**os.environ, "OPENAI_API_KEY": "test", "OPENAI_AGENTS_DISABLE_TRACING": "1"}
+    env.pop("WARDROBE_RECORD_DIR", None)
+    result = subprocess.run([sys.executable, "-c", script, *args], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]
+
+@pytest.fixture(scope="module")
+def trace(tmp_path_factory):
+    pytest.importorskip("agents")
+    directory = tmp_path_factory.mktemp("traces")
+    run(RECORD, str(directory))
+    return sorted(str(path) for path in directory.glob("*.jsonl.gz"))[0]
+
+def test_trace_keeps_the_urls_of_its_product_refs(trace):
+    with gzip.open(trace, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+    assert header["refs"]
+    assert all(urls["product_url"].startswith("http") for urls in header["refs"].values())
+
+def test_replay_in_a_new_process_resolves_recorded_urls(trace):
+    with gzip.open(trace, "rt", encoding="utf-8") as f:
+        recorded = {urls["product_url"] for urls in json.loads(f.readline())["refs"].values()}
+    urls = json.loads(run(REPLAY, trace))
+    assert urls
+    assert {product_url for _, product_url in urls} <= recorded
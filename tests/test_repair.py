@@ -0,0 +1,59 @@
+from models.clothing import ClothingItem, WardrobeRecommendation
+from utils.compact import compact_product
+from utils.repair import PLACEHOLDER_IMAGE_URL, PLACEHOLDER_PRODUCT_URL, PRICE_UNAVAILABLE, repair_recommendation
+
+def item(name: str, price: str = "$10.00", image_url: str = "https://img.test/a.jpg",
+         product_url: str = "https://shop.test/a") -> ClothingItem:
+    return ClothingItem(name=name, price=price, image_url=image_url, product_url=product_url)
+
+def test_repairs_defects_in_place():
+    recommendation = WardrobeRecommendation(
+        theme=" ",
+        styling_tips="Layer up",
+        tops=[item(" Tee ", price="34.9"), item("Polo", price="", product_url="https://example.com/polo")],
+        accessories=None,
+    )
+    repairs = repair_recommendation(recommendation)
+    assert repairs == {"theme": 1, "price": 2, "product_url": 1, "missing_category": 1}
+    tee, polo = recommendation.tops
+    assert (tee.name, tee.price) == ("Tee", "$34.90")
+    assert (polo.price, polo.product_url) == (PRICE_UNAVAILABLE, PLACEHOLDER_PRODUCT_URL)
+    assert recommendation.accessories == []
+    # Repairing again changes nothing
+    assert repair_recommendation(recommendation) == {}
+
+def test_non_usd_prices_are_kept():
+    recommendation = WardrobeRecommendation(theme="t", styling_tips="s", tops=[item("Tee", price="€12,50")])
+    repair_recommendation(recommendation)
+    assert recommendation.tops[0].price == "€12,50"
+
+def test_drops_duplicates_across_categories():
+    recommendation = WardrobeRecommendation(
+        theme="t", styling_tips="s",
+        tops=[item("Rain Shell")], outerwear=[item("rain  shell"), item("Parka", product_url="https://shop.test/b")],
+    )
+    assert repair_recommendation(recommendation) == {"duplicate": 1}
+    assert [i.name for i in recommendation.outerwear] == ["Parka"]
+
+def test_resolves_refs_and_replaces_unknown_ones():
+    ref = compact_product({"name": "Scarf", "image_url": "https://img.test/s.jpg", "product_url": "https://shop.test/s"})["ref"]
+    recommendation = WardrobeRecommendation(theme="t", styling_tips="s", accessories=[
+        item("Scarf", image_url=f"ref:{ref}", product_url=f"ref:{ref}"),
+        item("Gloves", image_url="ref:ffffffffffffffff", product_url="ref:ffffffffffffffff"),
+    ])
+    repair_recommendation(recommendation)
+    scarf, gloves = recommendation.accessories
+    assert (scarf.image_url, scarf.product_url) == ("https://img.test/s.jpg", "https://shop.test/s")
+    assert (gloves.image_url, gloves.product_url) == (PLACEHOLDER_IMAGE_URL, PLACEHOLDER_PRODUCT_URL)
+
+def test_guardrail_only_trips_on_unrepairable_output():
+    from utils.guardrails import validate_price_range
+
+    fake_urls = WardrobeRecommendation(theme="t", styling_tips="s", tops=[item("Tee", image_url="")])
+    result = validate_price_range.guardrail_function(None, None, fake_urls)
+    assert not result.tripwire_triggered
+    # Repair is left to the service, which runs it once on the final output
+    assert fake_urls.tops[0].image_url == ""
+
+    single_tier = WardrobeRecommendation(theme="t", styling_tips="Buy only luxury pieces")
+    assert validate_price_range.guardrail_function(None, None, single_tier).tripwire_triggered
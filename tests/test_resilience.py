@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from tools import resilience
+from tools.resilience import CircuitBreaker, HostGuard, TokenBucket, UpstreamUnavailable
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+def test_token_bucket_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate=2, burst=2)
+    assert [bucket.reserve(), bucket.reserve()] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    clock.now += 1.5
+    assert bucket.reserve() == 0.0
+    clock.now += 10
+    assert [bucket.reserve(), bucket.reserve()] == [0.0, 0.0]
+    assert bucket.reserve() > 0
+
+def test_token_bucket_pause(clock):
+    bucket = TokenBucket(rate=10, burst=10)
+    bucket.pause(2)
+    assert bucket.reserve() == pytest.approx(2.1)
+
+def test_breaker_opens_half_opens_and_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29
+    assert not breaker.allow()
+
+@pytest.fixture
+def guard(monkeypatch):
+    monkeypatch.setattr(resilience, "UPSTREAM_BREAKER_FAILURES", 3)
+    monkeypatch.setattr(resilience, "UPSTREAM_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(resilience, "UPSTREAM_BACKOFF_BASE", 0.001)
+    return HostGuard("retailer.test")
+
+def responses(*statuses, retry_after: str = "0.1"):
+    sent = []
+
+    async def request():
+        sent.append(time.monotonic())
+        status = statuses[min(len(sent), len(statuses)) - 1]
+        return httpx.Response(status, headers={"Retry-After": retry_after} if status == 429 else {})
+    return request, sent
+
+def test_retry_after_is_honoured(guard):
+    request, sent = responses(429, 200)
+    response = asyncio.run(guard.call_async(request))
+    assert response.status_code == 200
+    assert sent[1] - sent[0] >= 0.1
+
+def test_open_breaker_fails_fast(guard):
+    request, sent = responses(503)
+    with pytest.raises(UpstreamUnavailable) as failed:
+        asyncio.run(guard.call_async(request))
+    assert (failed.value.reason, len(sent)) == ("error", 3)
+
+    with pytest.raises(UpstreamUnavailable) as failed:
+        asyncio.run(guard.call_async(request))
+    assert (failed.value.reason, len(sent)) == ("circuit_open", 3)
+
+def test_retry_after_beyond_the_deadline_gives_up(guard):
+    request, sent = responses(429, retry_after="5")
+    with pytest.raises(UpstreamUnavailable) as failed:
+        asyncio.run(guard.call_async(request, deadline=1))
+    assert (failed.value.reason, len(sent)) == ("deadline", 1)
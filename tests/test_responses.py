@@ -0,0 +1,26 @@
+import logging
+
+from utils import responses
+from utils.responses import log_payload
+
+def test_payload_is_only_encoded_when_sampled(monkeypatch, caplog):
+    calls = []
+
+    def payload() -> bytes:
+        calls.append(1)
+        return b'{"theme": "t"}'
+
+    logger = logging.getLogger("test_responses")
+    caplog.set_level(logging.DEBUG, logger="test_responses")
+    monkeypatch.setattr(responses, "PAYLOAD_LOG_SAMPLE_RATE", 0)
+    log_payload(logger, "Sending response", payload)
+    assert calls == []
+
+    monkeypatch.setattr(responses, "PAYLOAD_LOG_SAMPLE_RATE", 1)
+    log_payload(logger, "Sending response", payload)
+    assert calls == [1]
+    assert 'Sending response (14 bytes): {"theme": "t"}' in caplog.text
+
+    caplog.set_level(logging.INFO, logger="test_responses")
+    log_payload(logger, "Sending response", payload)
+    assert calls == [1]
@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+import pytest
+
+from tools.resilience import UpstreamUnavailable
+from tools.retailers import FixtureRetailerAdapter, RetailerAdapter, federated_search, product_key
+
+class PagedAdapter(RetailerAdapter):
+    """Yields one page of products, then stalls or fails."""
+
+    name = "paged"
+
+    def __init__(self, retailer: str, names, then: str = "stall"):
+        self.retailer = retailer
+        self.names = names
+        self.then = then
+
+    async def search(self, query, theme, max_results):
+        for name in self.names:
+            yield {"id": f"{self.retailer}-{name}", "name": name, "price": "$10.00", "price_cents": 1000,
+                   "currency": "USD", "retailer": self.retailer, "image_url": "",
+                   "product_url": f"https://{self.retailer}.test/{name}", "theme": theme, "description": name}
+        if self.then == "fail":
+            raise UpstreamUnavailable(f"{self.retailer}.test", "error", "HTTP 503")
+        await asyncio.sleep(60)
+
+@pytest.fixture
+def fixture_adapter(tmp_path):
+    path = tmp_path / "shop.json"
+    path.write_text(json.dumps({"retailer": "Shop", "products": [
+        {"name": "Blue Oxford Shirt", "price": "$30", "product_url": "https://shop.test/oxford"},
+        {"name": "Blue Shirt", "price": "$20", "product_url": "https://shop.test/blue"},
+        {"name": "Red Scarf", "price": "$15", "product_url": "https://shop.test/scarf"},
+    ]}))
+    return FixtureRetailerAdapter(str(path))
+
+def test_adapters_must_implement_search():
+    with pytest.raises(TypeError):
+        RetailerAdapter()
+
+def test_results_are_ranked_and_deduplicated(fixture_adapter):
+    products, errors = asyncio.run(federated_search("blue shirt", "casual", 5, [fixture_adapter, fixture_adapter]))
+    assert [product["name"] for product in products] == ["Blue Shirt", "Blue Oxford Shirt"]
+    assert errors == {}
+    assert products[0]["theme"] == "casual"
+
+def test_deadline_keeps_products_already_yielded(fixture_adapter):
+    slow = PagedAdapter("Slow", ["Blue Shirt Slim"])
+    products, errors = asyncio.run(federated_search("blue shirt", "casual", 5, [fixture_adapter, slow], deadline=0.05))
+    assert "Blue Shirt Slim" in [product["name"] for product in products]
+    assert errors == {"Slow": "timed out after 0.05s (1 products kept)"}
+
+def test_failed_retailer_keeps_products_already_yielded():
+    failing = PagedAdapter("Flaky", ["Blue Shirt"], then="fail")
+    products, errors = asyncio.run(federated_search("blue shirt", "casual", 5, [failing], deadline=1))
+    assert [product["name"] for product in products] == ["Blue Shirt"]
+    assert errors["Flaky"].startswith("Flaky.test unavailable (error)")
+
+def test_product_key_ignores_case_punctuation_and_query():
+    assert product_key({"name": "Men's Tee", "product_url": "https://Shop.test/tee/?utm=1"}) == \
+        product_key({"name": "mens tee", "product_url": "http://shop.test/tee"})
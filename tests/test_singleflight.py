@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("k", compute) for _ in range(5)))
+        assert flight.in_flight() == 0
+        return results
+
+    assert asyncio.run(main()) == [1] * 5
+    assert calls == 1
+
+def test_exceptions_reach_every_caller():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(main())] == [ValueError, ValueError]
+
+def test_caller_timeout_does_not_cancel_the_shared_call():
+    flight = SingleFlight("test")
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        patient = asyncio.ensure_future(flight.do("k", compute))
+        with pytest.raises(asyncio.TimeoutError):
+            await flight.do("k", compute, timeout=0.01)
+        return await patient
+
+    assert asyncio.run(main()) == "done"
+
+def test_cancelling_the_last_caller_cancels_the_call():
+    flight = SingleFlight("test")
+    started = []
+
+    async def compute():
+        started.append(asyncio.current_task())
+        await asyncio.sleep(10)
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("k", compute))
+        second = asyncio.ensure_future(flight.do("k", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not started[0].done()
+        second.cancel()
+        await asyncio.sleep(0.01)
+        return started[0].cancelled()
+
+    assert asyncio.run(main())
@@ -0,0 +1,61 @@
+import json
+
+from models.clothing import WardrobeRecommendation
+from utils.compact import compact_product
+from utils.repair import PLACEHOLDER_PRODUCT_URL, repair_recommendation
+from utils.streaming import RecommendationStreamParser
+
+def stream(text: str, chunk: int = 7) -> list:
+    """Feed `text` to a parser in small chunks and collect every event."""
+    parser = RecommendationStreamParser()
+    events = []
+    for start in range(0, len(text), chunk):
+        events.extend(parser.feed(text[start:start + chunk]))
+    return events
+
+def test_streamed_items_match_the_repaired_recommendation():
+    ref = compact_product({"name": "Wool Beanie", "image_url": "https://img.test/b.jpg",
+                           "product_url": "https://shop.test/b"})["ref"]
+    output = {
+        "theme": "Winter", "styling_tips": "Layer up",
+        "headwear": [{"name": "Wool Beanie", "price": "19.5", "image_url": f"ref:{ref}", "product_url": f"ref:{ref}"}],
+        "accessories": [{"name": "Scarf", "price": "$12", "image_url": "ref:0000000000000000",
+                         "product_url": "https://example.com/scarf"}],
+    }
+    streamed = [event["data"]["item"] for event in stream(json.dumps(output)) if event["event"] == "item"]
+    recommendation = WardrobeRecommendation(**output)
+    repair_recommendation(recommendation)
+    final = [item.model_dump() for item in recommendation.headwear + recommendation.accessories]
+    assert streamed == final
+    assert streamed[0]["product_url"] == "https://shop.test/b"
+    assert streamed[1]["product_url"] == PLACEHOLDER_PRODUCT_URL
+
+def test_refs_are_64_bit():
+    ref = compact_product({"image_url": "https://img.test/x.jpg", "product_url": "https://shop.test/x"})["ref"]
+    assert len(ref) == 16
+
+def test_fields_are_emitted_once_complete():
+    parser = RecommendationStreamParser()
+    assert parser.feed('{"theme": "Minim') == []
+    assert parser.feed('alist", "styling_tips": "Keep it ') == [{"event": "theme", "data": "Minimalist"}]
+    assert parser.feed('simple", "tops": [') == [{"event": "styling_tips", "data": "Keep it simple"}]
+    item = {"name": "White Tee", "price": "$15.00", "image_url": "https://img.test/t.jpg",
+            "product_url": "https://shop.test/t"}
+    assert parser.feed(json.dumps(item)[:-3]) == []
+    events = parser.feed(json.dumps(item)[-3:] + "]}")
+    assert [(e["event"], e["data"]["category"], e["data"]["item"]["name"]) for e in events] == [("item", "tops", "White Tee")]
+
+def test_flat_item_lists_are_categorized_and_invalid_items_skipped():
+    items = [
+        {"name": "Denim Jeans", "price": "$40.00", "image_url": "https://img.test/j.jpg", "product_url": "https://shop.test/j"},
+        {"name": "No Price"},
+        "not an item",
+        {"name": "Hoodie Sweatshirt", "price": "$30.00", "image_url": "https://img.test/h.jpg", "product_url": "https://shop.test/h"},
+    ]
+    events = stream(json.dumps({"items": items}), chunk=3)
+    assert [(e["data"]["category"], e["data"]["item"]["name"]) for e in events] == [
+        ("bottoms", "Denim Jeans"), ("tops", "Hoodie Sweatshirt")
+    ]
+
+def test_non_list_category_is_ignored():
+    assert stream('{"tops": null, "theme": "T"}') == [{"event": "theme", "data": "T"}]
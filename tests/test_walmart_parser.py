@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from tools.walmart_parser import ExtractionEngine, JsonPayloadExtractor, extract_products
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+def fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+def test_engines_must_implement_extract():
+    with pytest.raises(TypeError):
+        ExtractionEngine()
+
+def test_json_payload_is_read_without_the_dom():
+    products = JsonPayloadExtractor().extract(fixture("walmart_search_next_data.html"), 3)
+    assert len(products) == 3
+    assert products[0]["price"] == "$88.00"
+    assert products[0]["url"].endswith("/1000000")
+
+def test_pages_without_a_payload_fall_back_to_tiles():
+    products = extract_products(fixture("walmart_search_tiles.html"), 2)
+    assert [(product["price_cents"], product["currency"]) for product in products][:1] == [(8800, "USD")]
+    assert len(products) == 2
@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from tools import weather
+from tools.weather import (
+    DEFAULT_WEATHER, OpenMeteoWeatherProvider, StaticWeatherProvider, WeatherProvider,
+    lookup_weather, normalize_location, prefetch_weather, set_weather_provider,
+)
+
+class CountingProvider(WeatherProvider):
+    name = "counting"
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.lookups = []
+        self.in_flight = self.max_in_flight = 0
+
+    async def lookup(self, location_key):
+        self.lookups.append(location_key)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if self.fail:
+            raise RuntimeError("provider down")
+        return {**DEFAULT_WEATHER, "conditions": location_key}
+
+@pytest.fixture(autouse=True)
+def restore_provider():
+    yield
+    set_weather_provider(StaticWeatherProvider())
+
+def test_static_provider_matches_location_words():
+    provider = StaticWeatherProvider()
+    assert asyncio.run(provider.lookup(normalize_location("Downtown Boston, MA")))["conditions"] == "Partly cloudy"
+    assert asyncio.run(provider.lookup("paris")) is None
+
+def test_reports_are_cached_per_normalized_location():
+    provider = CountingProvider()
+    set_weather_provider(provider)
+    first = asyncio.run(lookup_weather("Boston, MA"))
+    second = asyncio.run(lookup_weather(" boston ma"))
+    assert provider.lookups == ["boston ma"]
+    assert (first["location"], second["location"]) == ("Boston, MA", " boston ma")
+
+def test_failed_lookups_serve_the_default_uncached():
+    provider = CountingProvider(fail=True)
+    set_weather_provider(provider)
+    assert asyncio.run(lookup_weather("Boston"))["conditions"] == DEFAULT_WEATHER["conditions"]
+    asyncio.run(lookup_weather("Boston"))
+    assert len(provider.lookups) == 2
+
+def test_prefetch_bounds_concurrency_and_keeps_order():
+    provider = CountingProvider()
+    set_weather_provider(provider)
+    locations = [f"City {n}" for n in range(6)]
+    reports = asyncio.run(prefetch_weather(locations, max_concurrency=2))
+    assert [report["location"] for report in reports] == locations
+    assert provider.max_in_flight == 2
+
+def test_open_meteo_lookup_goes_through_the_async_client(monkeypatch):
+    responses = {
+        OpenMeteoWeatherProvider.geocoding_url: {"results": [{"latitude": 42.4, "longitude": -71.1}]},
+        OpenMeteoWeatherProvider.forecast_url: {
+            "current": {"temperature_2m": 44.6, "weather_code": 2},
+            "daily": {"temperature_2m_min": [30, 28.4], "temperature_2m_max": [50, 55.2],
+                      "precipitation_sum": [0.1, None]},
+        },
+    }
+
+    async def fake_fetch_async(url, headers=None):
+        return httpx.Response(200, content=json.dumps(responses[url.split("?")[0]]),
+                              request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(weather, "fetch_async", fake_fetch_async)
+    report = asyncio.run(OpenMeteoWeatherProvider().lookup("boston"))
+    assert report == {
+        "current_temp": "45°F",
+        "conditions": "Partly cloudy",
+        "seasonal_range": "28°F to 55°F over the next 7 days",
+        "precipitation": "0.1 in expected over the next 7 days",
+    }
+
+def test_providers_must_implement_lookup():
+    with pytest.raises(TypeError):
+        WeatherProvider()
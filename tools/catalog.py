@@ -0,0 +1,212 @@
+"""
+Local product catalog with full-text search.
+
+Every scraped product is ingested into a SQLite database with an FTS5 index
+over name and theme. `search_real_products` consults the catalog before going
+to the network, so recurring products are served locally, and a pre-seeded
+catalog allows fully offline operation. Falls back to LIKE matching when the
+SQLite build lacks FTS5.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.pricing import parse_price
+
+_TOKEN = re.compile(r"\w+")
+
+PRODUCT_COLUMNS = [
+    "id", "name", "price", "price_cents", "currency", "retailer", "image_url",
+    "product_url", "theme", "description", "updated_at",
+]
+
+class ProductCatalog:
+    """SQLite-backed product store with ranked keyword and price-range queries."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS products ("
+            " id TEXT PRIMARY KEY,"
+            " name TEXT NOT NULL,"
+            " price TEXT,"
+            " price_cents INTEGER,"
+            " currency TEXT,"
+            " retailer TEXT,"
+            " image_url TEXT,"
+            " product_url TEXT,"
+            " theme TEXT,"
+            " description TEXT,"
+            " updated_at REAL NOT NULL)"
+        )
+        # Catalogs created before prices carried a currency
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(products)")}
+        if "currency" not in columns:
+            self._conn.execute("ALTER TABLE products ADD COLUMN currency TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS products_price ON products (price_cents)")
+        self.fts_enabled = self._create_fts_index()
+
+    def _create_fts_index(self) -> bool:
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+                " name, theme, content='products', content_rowid='rowid',"
+                " tokenize='porter unicode61')"
+            )
+        except sqlite3.OperationalError:
+            return False
+        self._conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts (rowid, name, theme) VALUES (new.rowid, new.name, new.theme);
+            END;
+            CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts (products_fts, rowid, name, theme) VALUES ('delete', old.rowid, old.name, old.theme);
+            END;
+            CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE ON products BEGIN
+                INSERT INTO products_fts (products_fts, rowid, name, theme) VALUES ('delete', old.rowid, old.name, old.theme);
+                INSERT INTO products_fts (rowid, name, theme) VALUES (new.rowid, new.name, new.theme);
+            END;
+        """)
+        return True
+
+    def ingest(self, products: Iterable[Dict[str, Any]]) -> int:
+        """Insert or refresh products (keyed by id). Returns the number stored."""
+        now = time.time()
+        rows = [
+            (
+                str(product["id"]),
+                product["name"],
+                product.get("price"),
+                *self._parsed_price(product),
+                product.get("retailer"),
+                product.get("image_url"),
+                product.get("product_url"),
+                product.get("theme"),
+                product.get("description"),
+                now,
+            )
+            for product in products
+            if product.get("id") and product.get("name")
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO products (id, name, price, price_cents, currency, retailer, image_url,"
+                    " product_url, theme, description, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (id) DO UPDATE SET"
+                    " name = excluded.name, price = excluded.price, price_cents = excluded.price_cents,"
+                    " currency = excluded.currency,"
+                    " retailer = excluded.retailer, image_url = excluded.image_url,"
+                    " product_url = excluded.product_url, theme = excluded.theme,"
+                    " description = excluded.description, updated_at = excluded.updated_at",
+                    rows
+                )
+            except BaseException:
+                # Leave the shared connection usable for the next ingest
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return len(rows)
+
+    @staticmethod
+    def _parsed_price(product: Dict[str, Any]) -> tuple:
+        """(price_cents, currency) as set by the scraper, else parsed from the price string."""
+        if product.get("price_cents") is not None:
+            return product["price_cents"], product.get("currency")
+        return parse_price(product.get("price"))
+
+    def seed_from_file(self, path: str) -> int:
+        """Ingest products from a JSON file containing a list of product dicts."""
+        with open(path, encoding="utf-8") as f:
+            return self.ingest(json.load(f))
+
+    def search(
+        self,
+        query: str,
+        required: Optional[str] = None,
+        min_price_cents: Optional[int] = None,
+        max_price_cents: Optional[int] = None,
+        max_age: Optional[float] = None,
+        limit: int = 10,
+        match_all: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Return products ranked by keyword relevance.
+
+        Args:
+            query: Keywords; a product matching any of them (all of them with
+                match_all) is a candidate
+            required: Keywords of which at least one must match (e.g. the item type)
+            min_price_cents: Optional lower price bound
+            max_price_cents: Optional upper price bound
+            max_age: Only return products refreshed within this many seconds
+            limit: Maximum number of products
+            match_all: Require every query keyword, e.g. when the results
+                replace a retailer search rather than fill in for one
+
+        Returns:
+            List of product dicts, best match first
+        """
+        query_tokens = _TOKEN.findall(query.lower())
+        required_tokens = _TOKEN.findall((required or "").lower())
+        if not query_tokens and not required_tokens:
+            return []
+
+        filters, params = [], []
+        if min_price_cents is not None:
+            filters.append("p.price_cents >= ?")
+            params.append(min_price_cents)
+        if max_price_cents is not None:
+            filters.append("p.price_cents <= ?")
+            params.append(max_price_cents)
+        if max_age is not None:
+            filters.append("p.updated_at >= ?")
+            params.append(time.time() - max_age)
+        columns = ", ".join(f"p.{column}" for column in PRODUCT_COLUMNS)
+
+        query_join = " AND " if match_all else " OR "
+        if self.fts_enabled:
+            match = " AND ".join(
+                "(" + joiner.join(f'"{token}"' for token in tokens) + ")"
+                for tokens, joiner in ((query_tokens, query_join), (required_tokens, " OR ")) if tokens
+            )
+            sql = (
+                f"SELECT {columns} FROM products_fts f JOIN products p ON p.rowid = f.rowid"
+                f" WHERE products_fts MATCH ?"
+                + "".join(f" AND {condition}" for condition in filters)
+                + " ORDER BY bm25(products_fts) LIMIT ?"
+            )
+            params = [match] + params + [limit]
+        else:
+            conditions = list(filters)
+            like_params = []
+            if required_tokens:
+                conditions.insert(0, "(" + " OR ".join("lower(p.name) LIKE ?" for _ in required_tokens) + ")")
+                like_params += [f"%{token}%" for token in required_tokens]
+            if query_tokens:
+                conditions.insert(0, "(" + query_join.join("lower(p.name || ' ' || coalesce(p.theme, '')) LIKE ?" for _ in query_tokens) + ")")
+                like_params = [f"%{token}%" for token in query_tokens] + like_params
+            sql = (
+                f"SELECT {columns} FROM products p WHERE " + " AND ".join(conditions)
+                + " ORDER BY p.updated_at DESC LIMIT ?"
+            )
+            params = like_params + params + [limit]
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM products").fetchone()
+        return count
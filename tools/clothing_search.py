@@ -1,8 +1,14 @@
 from agents import function_tool
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, List, Any
-import requests
-from bs4 import BeautifulSoup
-import re
+import asyncio
+import os
+from tools.retailers import federated_search
+from tools.catalog import ProductCatalog
+from utils.cache import TTLCache, SQLiteCache
+from utils.compact import compact_search, compact_searches
+from utils.metrics import span, register_cache_gauges
+from utils.singleflight import SingleFlight
 
 @function_tool
 def search_clothing_items(
@@ -83,111 +89,136 @@ def get_product_details(product_id: str, theme: str, item_type: str):
         "description": f"This {item_type} features {theme} styling with premium quality materials."
     }
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    "Accept-Language": "en-US,en;q=0.5",
-}
-
-def extract_product_name(item: BeautifulSoup) -> Optional[str]:
-    """Extract product name from a Walmart item."""
-    name_elem = (
-        item.select_one("span[data-automation-id='product-title']") or
-        item.select_one("span.w_iUH7") or
-        item.select_one("span.normal")
-    )
-    return name_elem.text.strip() if name_elem else None
-
-def extract_product_url(item: BeautifulSoup) -> Optional[str]:
-    """Extract product URL from a Walmart item."""
-    product_id = item.get('data-item-id')
-    if not product_id:
-        return None
-        
-    for link in item.select("a"):
-        href = link.get('href', '')
-        if product_id in href or '/ip/' in href:
-            url = href
-            if not url.startswith('http'):
-                url = f"https://www.walmart.com{url}"
-            return url.split('?')[0] if '?' in url else url
-    return None
-
-def extract_product_price(item: BeautifulSoup) -> Optional[str]:
-    """Extract product price from a Walmart item."""
-    price_elem = (
-        item.select_one("span[data-automation-id='product-price-1']") or
-        item.select_one("div[data-automation-id='product-price']") or
-        item.select_one("div.b_Wu1_") or
-        item.select_one("span.price-main")
-    )
-    if not price_elem:
-        return None
-        
-    price_text = price_elem.text.strip()
-    price_match = re.search(r'\$\d+\.?\d{0,2}', price_text)
-    return price_match.group(0) if price_match else None
-
-def extract_product_image(item: BeautifulSoup) -> Optional[str]:
-    """Extract product image URL from a Walmart item."""
-    img_elem = (
-        item.select_one("img[data-automation-id='product-image']") or
-        item.select_one("img.absolute") or
-        item.select_one("img")
-    )
-    if not img_elem:
-        return None
-        
-    image = img_elem.get('src')
-    if not image or image.startswith('data:'):
-        image = img_elem.get('data-src')
-    return image
-
-def scrape_walmart_products(query: str, theme: str, max_results: int) -> List[Dict[str, Any]]:
-    """Scrape products from Walmart search results."""
-    walmart_url = f"https://www.walmart.com/search?q={query.replace(' ', '+')}"
-    print(f"Searching Walmart for: {query}")
-    
-    try:
-        response = requests.get(walmart_url, headers=HEADERS)
-        soup = BeautifulSoup(response.text, "html.parser")
-        items = soup.select("div[data-item-id]")
-        print(f"Found {len(items)} items on Walmart")
-        
-        products = []
-        for item in items[:min(max_results, 3)]:
-            try:
-                name = extract_product_name(item)
-                url = extract_product_url(item)
-                price = extract_product_price(item)
-                image = extract_product_image(item)
-                
-                if name and price and url:
-                    products.append({
-                        "id": item.get('data-item-id', ''),
-                        "name": name,
-                        "price": price,
-                        "retailer": "Walmart",
-                        "image_url": image or "https://example.com/placeholder.jpg",
-                        "product_url": url,
-                        "theme": theme,
-                        "description": f"{name} - Available at Walmart"
-                    })
-            except Exception as e:
-                print(f"Error processing item: {e}")
-                continue
-            
-            if len(products) >= max_results:
-                break
-                
-        return products
-    except Exception as e:
-        print(f"Error searching Walmart: {e}")
+# Cache of scraped product lists, keyed on the normalized search parameters.
+# Set PRODUCT_CACHE_PATH to a SQLite file to persist it and share it across workers.
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "3600"))
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "2048"))
+PRODUCT_CACHE_PATH = os.getenv("PRODUCT_CACHE_PATH")
+
+if PRODUCT_CACHE_PATH:
+    product_cache = SQLiteCache(PRODUCT_CACHE_PATH, max_size=PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
+else:
+    product_cache = TTLCache(max_size=PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
+register_cache_gauges("products", product_cache)
+
+# Local catalog of every scraped product, consulted before scraping. Products older
+# than PRODUCT_CATALOG_MAX_AGE seconds are ignored. PRODUCT_CATALOG_SEED pre-loads
+# a JSON list of products (e.g. for offline use).
+PRODUCT_CATALOG_ENABLED = os.getenv("PRODUCT_CATALOG_ENABLED", "1") == "1"
+PRODUCT_CATALOG_PATH = os.getenv("PRODUCT_CATALOG_PATH", ":memory:")
+PRODUCT_CATALOG_MAX_AGE = float(os.getenv("PRODUCT_CATALOG_MAX_AGE", "86400"))
+PRODUCT_CATALOG_SEED = os.getenv("PRODUCT_CATALOG_SEED")
+
+product_catalog = ProductCatalog(PRODUCT_CATALOG_PATH) if PRODUCT_CATALOG_ENABLED else None
+if product_catalog is not None and PRODUCT_CATALOG_SEED:
+    product_catalog.seed_from_file(PRODUCT_CATALOG_SEED)
+
+def search_catalog(
+    query: str,
+    item_type: str,
+    max_results: int,
+    max_age: Optional[float] = PRODUCT_CATALOG_MAX_AGE,
+    match_all: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Catalog matches for a search (fresh ones unless max_age is None), shaped like scraped products.
+
+    With match_all, a product must match every word of the query, not just one.
+    """
+    if product_catalog is None:
         return []
+    rows = product_catalog.search(query, required=item_type, max_age=max_age, limit=max_results,
+                                  match_all=match_all)
+    return [{
+        "id": row["id"],
+        "name": row["name"],
+        "price": row["price"],
+        "price_cents": row["price_cents"],
+        "currency": row["currency"],
+        "retailer": row["retailer"],
+        "image_url": row["image_url"],
+        "product_url": row["product_url"],
+        "theme": query,
+        "description": row["description"]
+    } for row in rows]
+
+def normalize_search_key(query: str, item_type: str, max_results: int) -> str:
+    """Build a cache key that ignores case and whitespace differences."""
+    return "|".join([
+        " ".join(query.lower().split()),
+        " ".join(item_type.lower().split()),
+        str(max_results)
+    ])
+
+# Identical searches in flight at the same time share one catalog lookup and scrape
+search_flight = SingleFlight("product_search")
+
+async def _search_uncached(cache_key: str, query: str, item_type: str, max_results: int) -> tuple:
+    """
+    Catalog lookup, then a federated search of every enabled retailer; fills the cache.
+
+    Returns:
+        (products, source, error); error is set when some retailer failed or
+        timed out, in which case catalog matches (stale ones included) make up
+        for missing products
+    """
+    # Products matching only some of the query's words are not good enough to skip the retailers
+    products = search_catalog(query, item_type, max_results, match_all=True)
+    source = "catalog"
+    # Only a catalog hit that fully satisfies the request avoids searching retailers
+    if len(products) < max_results:
+        found, errors = await federated_search(f"{query} {item_type}", query, max_results)
+        if found and product_catalog is not None:
+            product_catalog.ingest(found)
+        if errors:
+            error = "; ".join(f"{retailer}: {message}" for retailer, message in errors.items())
+            print(f"Retailer search incomplete, adding catalog results: {error}")
+            known = {product["id"] for product in found}
+            fallback = [product for product in search_catalog(query, item_type, max_results, max_age=None)
+                        if product["id"] not in known]
+            # Degraded results are not cached, so the next search tries the retailers again
+            return (found + fallback)[:max_results], "catalog_fallback" if not found else "partial", error
+        products, source = found, "retailers"
+    if products:
+        product_cache.set(cache_key, products)
+    return products, source, None
+
+async def find_real_products(query: str, item_type: str, max_results: int) -> Dict[str, Any]:
+    """
+    Retailer search behind the cache and local catalog; shared by the search tools.
+
+    The result's "status" is "ok", "degraded" (some retailer failed or timed
+    out, results may be incomplete or partly from the catalog) or
+    "unavailable" (nothing found and a retailer failed); the last two carry an "error".
+    """
+    error = None
+    with span("product_search", query=query, item_type=item_type) as search_span:
+        cache_key = normalize_search_key(query, item_type, max_results)
+        products = product_cache.get(cache_key)
+        source = "cache"
+        if products is None:
+            products, source, error = await search_flight.do(
+                cache_key,
+                lambda: _search_uncached(cache_key, query, item_type, max_results)
+            )
+        search_span.set(source=source, items=len(products))
+    
+    result = {
+        "query": query,
+        "item_type": item_type,
+        "theme": query,
+        "status": "ok",
+        "results": products
+    }
+    if error:
+        result["status"] = "degraded" if products else "unavailable"
+        result["error"] = error
+    return result
 
 @function_tool
-def search_real_products(query: str, item_type: str, max_results: int):
+async def search_real_products(query: str, item_type: str, max_results: int):
     """
-    Search for real products using Walmart's website.
+    Search for real products at the enabled retailers (Walmart by default).
     
     Args:
         query: Search query including theme and item details
@@ -195,27 +226,60 @@ def search_real_products(query: str, item_type: str, max_results: int):
         max_results: Maximum number of results to return
         
     Returns:
-        Dictionary containing query info and list of real products
+        Compact search result: "q" query, "t" item type, "r" products with "ref", "n" name,
+        "p" price and optional "d" description; "s" status and "e" error when a retailer was unavailable
     """
-    search_query = f"{query} {item_type}"
-    products = scrape_walmart_products(search_query, query, max_results)
-    
-    # If no products found, return mock data
-    if not products:
-        products = [{
-            "id": f"{query.replace(' ', '-')}-{i}",
-            "name": f"{query.title()} {item_type.title()} - Style {i}",
-            "price": f"${20*i}.99",
-            "retailer": ["Amazon", "Nordstrom", "Macy's", "Target"][i % 4],
-            "image_url": f"https://example.com/products/{query.replace(' ', '-')}-{i}.jpg",
-            "product_url": f"https://example.com/shop/{query.replace(' ', '-')}-{i}",
-            "theme": query,
-            "description": f"Example {item_type} matching {query} theme"
-        } for i in range(1, max_results + 1)]
+    return compact_search(await find_real_products(query, item_type, max_results))
+
+class ProductQuery(BaseModel):
+    query: str = Field(..., description="Search query including theme and item details")
+    item_type: str = Field(..., description="Type of clothing item")
+    max_results: int = Field(..., description="Maximum number of results to return")
+
+# Bounds for search_real_products_batch
+BATCH_SEARCH_CONCURRENCY = int(os.getenv("BATCH_SEARCH_CONCURRENCY", "6"))
+BATCH_SEARCH_TIMEOUT = float(os.getenv("BATCH_SEARCH_TIMEOUT", "20"))
+
+async def find_real_products_batch(queries: List[ProductQuery]) -> Dict[str, Any]:
+    """Run several searches concurrently; a failed or slow search only affects its own entry."""
+    semaphore = asyncio.Semaphore(BATCH_SEARCH_CONCURRENCY)
+
+    async def run_one(product_query: ProductQuery) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    find_real_products(product_query.query, product_query.item_type, product_query.max_results),
+                    BATCH_SEARCH_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                error = f"Search timed out after {BATCH_SEARCH_TIMEOUT:g}s"
+            except Exception as e:
+                error = str(e)
+            print(f"Batch search failed for '{product_query.query} {product_query.item_type}': {error}")
+            return {
+                "query": product_query.query,
+                "item_type": product_query.item_type,
+                "theme": product_query.query,
+                "status": "unavailable",
+                "results": [],
+                "error": error
+            }
+
+    searches = await asyncio.gather(*(run_one(q) for q in queries))
+    return {"searches": list(searches)}
+
+@function_tool
+async def search_real_products_batch(queries: List[ProductQuery]):
+    """
+    Search for real products in several categories at once at the enabled retailers.
+    Prefer this over repeated search_real_products calls when you need more than one category.
     
-    return {
-        "query": query,
-        "item_type": item_type,
-        "theme": query,
-        "results": products
-    } 
\ No newline at end of file
+    Args:
+        queries: One entry per search, e.g. one per clothing category
+        
+    Returns:
+        Dictionary with a "searches" list holding one search_real_products result per query,
+        in the same order; failed searches have an "s" status, an "e" error and empty "r" results
+    """
+    batch = await find_real_products_batch(queries)
+    return {"searches": compact_searches(batch["searches"])}
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+Shared, pooled HTTP clients for outbound requests made by the tools.
+
+Both the sync and async clients keep connections alive between tool calls,
+negotiate HTTP/2 when the `h2` package is installed, enforce connect/read
+timeouts and cap the number of concurrent requests per host.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+def _http2_available() -> bool:
+    """HTTP/2 support in httpx requires the optional `h2` package."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") == "1" and _http2_available()
+
+def _client_options() -> dict:
+    return {
+        "http2": HTTP2_ENABLED,
+        "follow_redirects": True,
+        "timeout": httpx.Timeout(
+            HTTP_READ_TIMEOUT,
+            connect=HTTP_CONNECT_TIMEOUT,
+            read=HTTP_READ_TIMEOUT
+        ),
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        ),
+    }
+
+def _host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+# --- Sync client ---
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+def get_client() -> httpx.Client:
+    """Return the process-wide sync client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(**_client_options())
+        return _client
+
+def _host_semaphore(host: str) -> threading.BoundedSemaphore:
+    with _client_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(HTTP_MAX_CONNECTIONS_PER_HOST)
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+def fetch(url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    """GET a URL with the shared sync client, respecting the per-host cap."""
+    with _host_semaphore(_host_of(url)):
+        return get_client().get(url, headers=headers)
+
+# --- Async client ---
+#
+# httpx.AsyncClient connections are bound to the event loop that opened them,
+# so there is one client (and one set of per-host semaphores) per loop.
+
+_async_clients = weakref.WeakKeyDictionary()
+_async_host_semaphores = weakref.WeakKeyDictionary()
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the async client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(**_client_options())
+        _async_clients[loop] = client
+    return client
+
+def _async_host_semaphore(host: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphores = _async_host_semaphores.setdefault(loop, {})
+    semaphore = semaphores.get(host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(HTTP_MAX_CONNECTIONS_PER_HOST)
+        semaphores[host] = semaphore
+    return semaphore
+
+async def fetch_async(url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    """GET a URL with the loop's async client, respecting the per-host cap."""
+    async with _async_host_semaphore(_host_of(url)):
+        return await get_async_client().get(url, headers=headers)
+
+async def aclose_async_client():
+    """Close the async client of the running event loop, if one was created."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def close_client():
+    """Close the shared sync client."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
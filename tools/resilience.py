@@ -0,0 +1,339 @@
+"""
+Per-host protection for outbound scraping requests.
+
+Every request to a host goes through that host's `HostGuard`, which combines:
+- a token bucket capping the request rate (a 429 with Retry-After pauses it),
+- an adaptive concurrency limit (AIMD): one more slot per window of fast,
+  successful responses, halved on 429, 5xx, transport errors or slow responses,
+- bounded retries with jittered exponential backoff, all within a deadline,
+- a circuit breaker that fails fast while the host keeps failing and lets one
+  probe request through after a cool-down.
+
+When a request cannot succeed in time, `UpstreamUnavailable` is raised so the
+caller can fall back to cached or catalog results and say so.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.metrics import increment, registry, METRICS_ENABLED
+
+UPSTREAM_RATE_LIMIT = float(os.getenv("UPSTREAM_RATE_LIMIT", "5"))  # requests/s per host, 0 disables
+UPSTREAM_RATE_BURST = int(os.getenv("UPSTREAM_RATE_BURST", "10"))
+UPSTREAM_CONCURRENCY_INITIAL = int(os.getenv("UPSTREAM_CONCURRENCY_INITIAL", "4"))
+UPSTREAM_CONCURRENCY_MIN = int(os.getenv("UPSTREAM_CONCURRENCY_MIN", "1"))
+UPSTREAM_CONCURRENCY_MAX = int(os.getenv("UPSTREAM_CONCURRENCY_MAX", "10"))
+# Responses slower than this count as congestion
+UPSTREAM_SLOW_SECONDS = float(os.getenv("UPSTREAM_SLOW_SECONDS", "3"))
+UPSTREAM_MAX_ATTEMPTS = int(os.getenv("UPSTREAM_MAX_ATTEMPTS", "3"))
+UPSTREAM_BACKOFF_BASE = float(os.getenv("UPSTREAM_BACKOFF_BASE", "0.2"))
+UPSTREAM_BACKOFF_MAX = float(os.getenv("UPSTREAM_BACKOFF_MAX", "2"))
+# Total time a request may take, including waits and retries
+UPSTREAM_DEADLINE = float(os.getenv("UPSTREAM_DEADLINE", "8"))
+UPSTREAM_BREAKER_FAILURES = int(os.getenv("UPSTREAM_BREAKER_FAILURES", "5"))
+UPSTREAM_BREAKER_RESET = float(os.getenv("UPSTREAM_BREAKER_RESET", "30"))
+
+class UpstreamUnavailable(Exception):
+    """A host could not be reached in time; `reason` is circuit_open, deadline, throttled or error."""
+
+    def __init__(self, host: str, reason: str, detail: str = ""):
+        self.host = host
+        self.reason = reason
+        message = f"{host} unavailable ({reason})"
+        super().__init__(f"{message}: {detail}" if detail else message)
+
+class TokenBucket:
+    """Thread-safe token bucket; callers reserve a token and wait the returned delay."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it (0 if available now)."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for the next `seconds` (e.g. a Retry-After)."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+class AdaptiveLimit:
+    """
+    Concurrency limit adjusted by additive increase / multiplicative decrease.
+
+    Usable from any event loop: waiters are woken through their own loop when
+    a slot frees up.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self._waiters = deque()  # wake callbacks
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self) -> bool:
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        return False
+
+    def _wake(self):
+        # Called with the lock held; woken waiters re-check the limit
+        for _ in range(min(len(self._waiters), int(self.limit) - self.in_flight)):
+            self._waiters.popleft()()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._try_acquire():
+                    return
+                future = loop.create_future()
+                wake = lambda: loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+                self._waiters.append(wake)
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._lock:
+                    if wake in self._waiters:
+                        self._waiters.remove(wake)
+                    else:
+                        # Woken but cancelled: hand the wake-up to the next waiter
+                        self._wake()
+                raise
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._wake()
+
+    def on_success(self):
+        with self._lock:
+            # About +1 per `limit` successes, i.e. one slot per window
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._wake()
+
+    def on_congestion(self, latency: float):
+        with self._lock:
+            now = time.monotonic()
+            # Responses that were already in flight report the same congestion; decrease once per round trip
+            if now - self._last_decrease < latency:
+                return
+            self._last_decrease = now
+            self.limit = max(self.minimum, self.limit / 2)
+
+class CircuitBreaker:
+    """Opens after consecutive failures; after `reset_timeout` one probe request decides whether to close."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (in half-open state, only the probe)."""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def abandon(self):
+        """An allowed request was not sent; let another probe through."""
+        with self._lock:
+            self._probing = False
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "0")))
+    except ValueError:
+        # HTTP-date form; fall back to our own backoff
+        return 0.0
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+    return random.uniform(0, min(UPSTREAM_BACKOFF_MAX, UPSTREAM_BACKOFF_BASE * 2 ** (attempt - 1)))
+
+class HostGuard:
+    """Rate limit, adaptive concurrency, retries and circuit breaker for one host."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.bucket = TokenBucket(UPSTREAM_RATE_LIMIT, UPSTREAM_RATE_BURST)
+        self.limit = AdaptiveLimit(UPSTREAM_CONCURRENCY_INITIAL, UPSTREAM_CONCURRENCY_MIN, UPSTREAM_CONCURRENCY_MAX)
+        self.breaker = CircuitBreaker(UPSTREAM_BREAKER_FAILURES, UPSTREAM_BREAKER_RESET)
+
+    def _start_attempt(self, deadline_at: float) -> float:
+        """Check the breaker and reserve a rate-limit token; returns the wait before sending."""
+        if not self.breaker.allow():
+            raise UpstreamUnavailable(self.host, "circuit_open")
+        wait = self.bucket.reserve()
+        if time.monotonic() + wait >= deadline_at:
+            self.breaker.abandon()
+            raise UpstreamUnavailable(self.host, "deadline", "rate limited")
+        return wait
+
+    def _finish_attempt(
+        self,
+        response: Optional[httpx.Response],
+        error: Optional[BaseException],
+        latency: float
+    ) -> Optional[Tuple[str, str, float]]:
+        """
+        Feed an attempt's outcome to the limiter and breaker.
+
+        Returns:
+            None if the response can be returned, else (outcome, detail, Retry-After seconds)
+        """
+        if response is not None and response.status_code != 429 and response.status_code < 500:
+            increment("wardrobe_upstream_requests_total", "Outbound requests by outcome", host=self.host, outcome="ok")
+            self.breaker.record_success()
+            if latency > UPSTREAM_SLOW_SECONDS:
+                self.limit.on_congestion(latency)
+            else:
+                self.limit.on_success()
+            return None
+
+        self.breaker.record_failure()
+        self.limit.on_congestion(latency)
+        if response is None:
+            outcome, detail, retry_after = "error", f"{type(error).__name__}: {error}", 0.0
+        else:
+            outcome = "throttled" if response.status_code == 429 else "error"
+            detail, retry_after = f"HTTP {response.status_code}", _retry_after(response)
+            if retry_after:
+                self.bucket.pause(retry_after)
+        increment("wardrobe_upstream_requests_total", "Outbound requests by outcome", host=self.host, outcome=outcome)
+        return outcome, detail, retry_after
+
+    def _retry_delay(self, attempt: int, failure: Tuple[str, str, float], deadline_at: float) -> float:
+        outcome, detail, retry_after = failure
+        if attempt >= UPSTREAM_MAX_ATTEMPTS:
+            raise UpstreamUnavailable(self.host, outcome, detail)
+        delay = max(retry_after, backoff_delay(attempt))
+        if time.monotonic() + delay >= deadline_at:
+            raise UpstreamUnavailable(self.host, "deadline", detail)
+        increment("wardrobe_upstream_retries_total", "Outbound request retries", host=self.host)
+        return delay
+
+    async def call_async(
+        self,
+        request: Callable[[], Awaitable[httpx.Response]],
+        deadline: Optional[float] = None
+    ) -> httpx.Response:
+        """
+        Send a request through the guard, retrying on 429, 5xx and transport errors.
+
+        Args:
+            request: Zero-argument coroutine function performing one attempt
+            deadline: Seconds the whole call may take (default UPSTREAM_DEADLINE)
+
+        Returns:
+            The first response that is neither 429 nor 5xx
+
+        Raises:
+            UpstreamUnavailable: If the breaker is open, retries are exhausted or the deadline passes
+        """
+        deadline_at = time.monotonic() + (deadline or UPSTREAM_DEADLINE)
+        for attempt in range(1, UPSTREAM_MAX_ATTEMPTS + 1):
+            wait = self._start_attempt(deadline_at)
+            try:
+                if wait:
+                    await asyncio.sleep(wait)
+                await asyncio.wait_for(self.limit.acquire(), deadline_at - time.monotonic())
+            except asyncio.TimeoutError:
+                self.breaker.abandon()
+                raise UpstreamUnavailable(self.host, "deadline", "waiting for a concurrency slot")
+            except asyncio.CancelledError:
+                self.breaker.abandon()
+                raise
+
+            response, error = None, None
+            start = time.monotonic()
+            try:
+                response = await asyncio.wait_for(request(), max(0.0, deadline_at - start))
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                error = e
+            except BaseException:
+                self.breaker.abandon()
+                raise
+            finally:
+                self.limit.release()
+
+            failure = self._finish_attempt(response, error, time.monotonic() - start)
+            if failure is None:
+                return response
+            await asyncio.sleep(self._retry_delay(attempt, failure, deadline_at))
+
+_guards: Dict[str, HostGuard] = {}
+_guards_lock = threading.Lock()
+
+def _guard_gauge(value: Callable[[HostGuard], float]) -> Callable[[], Dict[tuple, float]]:
+    def callback():
+        return {(("host", host),): value(guard) for host, guard in list(_guards.items())}
+    return callback
+
+def guard_for(url: str) -> HostGuard:
+    """Return the guard of a URL's host, creating it on first use."""
+    host = urlsplit(url).netloc.lower()
+    with _guards_lock:
+        guard = _guards.get(host)
+        if guard is None:
+            if not _guards and METRICS_ENABLED:
+                registry.gauge_callback("wardrobe_upstream_concurrency_limit", "Adaptive outbound concurrency limit",
+                                        _guard_gauge(lambda guard: int(guard.limit.limit)))
+                registry.gauge_callback("wardrobe_upstream_circuit_open", "1 while the host's circuit breaker is open",
+                                        _guard_gauge(lambda guard: float(guard.breaker.state != CircuitBreaker.CLOSED)))
+            guard = _guards[host] = HostGuard(host)
+        return guard
@@ -0,0 +1,361 @@
+"""
+Retailer adapters and federated product search.
+
+Each retailer is a `RetailerAdapter` yielding product dicts for a search.
+`WalmartAdapter` scrapes walmart.com; `FixtureRetailerAdapter` serves products
+from a local JSON file, for tests and offline development. `federated_search`
+fans one search out to every enabled retailer concurrently, keeps the
+products that arrived before the deadline, drops duplicates (same normalized
+name and URL) and ranks the rest by relevance, then price.
+
+Enable retailers with RETAILERS, a comma-separated list of `walmart` and
+`fixture:<path to JSON>` entries.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from tools.http_client import fetch_async
+from tools.resilience import UpstreamUnavailable, guard_for
+from tools.walmart_parser import WALMART_BASE_URL, extract_products
+from utils.metrics import increment, span
+from utils.pricing import parse_price
+
+RETAILERS = os.getenv("RETAILERS", "walmart")
+# Seconds a federated search waits for the slowest retailer
+FEDERATED_SEARCH_DEADLINE = float(os.getenv("FEDERATED_SEARCH_DEADLINE", "10"))
+
+# --- Walmart scraping ---
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+
+# Search result pages fetched at most per search, and pages fetched ahead of the one being consumed
+SCRAPE_MAX_PAGES = int(os.getenv("SCRAPE_MAX_PAGES", "5"))
+SCRAPE_PREFETCH_PAGES = int(os.getenv("SCRAPE_PREFETCH_PAGES", "1"))
+
+def walmart_search_url(query: str, page: int = 1) -> str:
+    """Build the Walmart search URL for a query and result page (1-based)."""
+    url = f"{WALMART_BASE_URL}/search?q={query.replace(' ', '+')}"
+    return f"{url}&page={page}" if page > 1 else url
+
+def is_valid_product(product: Dict[str, Any]) -> bool:
+    """Whether a scraped product has everything a recommendation needs."""
+    return bool(product.get("name") and product.get("product_url") and product.get("price_cents") is not None)
+
+def parse_walmart_products(html: str, theme: str, max_results: int) -> List[Dict[str, Any]]:
+    """Parse up to max_results valid products out of a Walmart search results page."""
+    with span("scrape_parse", chars=len(html)) as parse_span:
+        extracted = extract_products(html, max_results)
+        parse_span.set(items=len(extracted))
+    products = []
+    for product in extracted:
+        products.append({
+            "id": product["id"],
+            "name": product["name"],
+            "price": product["price"],
+            "price_cents": product["price_cents"],
+            "currency": product["currency"],
+            "retailer": "Walmart",
+            "image_url": product["image"] or "https://example.com/placeholder.jpg",
+            "product_url": product["url"],
+            "theme": theme,
+            "description": f"{product['name']} - Available at Walmart"
+        })
+    return [product for product in products if is_valid_product(product)]
+
+def _new_products(page_products: List[Dict[str, Any]], seen: set) -> List[Dict[str, Any]]:
+    """Products not yielded from an earlier page (Walmart repeats sponsored items)."""
+    fresh = []
+    for product in page_products:
+        key = product["id"] or product["product_url"]
+        if key not in seen:
+            seen.add(key)
+            fresh.append(product)
+    return fresh
+
+async def aiter_walmart_products(query: str, theme: str, max_results: int) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Async iterator over products from successive Walmart result pages.
+
+    While a page is consumed, the next SCRAPE_PREFETCH_PAGES pages are already
+    being fetched. Stops after max_results products, an empty page or
+    SCRAPE_MAX_PAGES pages; prefetches still running then are cancelled.
+
+    Raises:
+        UpstreamUnavailable: If the first page cannot be fetched (see tools/resilience.py)
+    """
+    async def fetch_page(page: int) -> str:
+        url = walmart_search_url(query, page)
+        with span("scrape_fetch", query=query, page=page) as fetch_span:
+            response = await guard_for(url).call_async(lambda: fetch_async(url, headers=HEADERS))
+            fetch_span.set(bytes=len(response.content), status=response.status_code)
+        return response.text
+
+    pending = deque()
+    next_page = 1
+
+    def schedule(count: int):
+        nonlocal next_page
+        while len(pending) < count and next_page <= SCRAPE_MAX_PAGES:
+            pending.append((next_page, asyncio.ensure_future(fetch_page(next_page))))
+            next_page += 1
+
+    seen, remaining = set(), max_results
+    schedule(1)
+    try:
+        while pending:
+            page, task = pending.popleft()
+            try:
+                html = await task
+            except UpstreamUnavailable:
+                if page == 1:
+                    raise
+                print(f"Stopping at page {page} of Walmart results: Walmart unavailable")
+                return
+            products = _new_products(parse_walmart_products(html, theme, remaining), seen)
+            if not products:
+                return
+            # Only when this page falls short, fetch the next ones while it is consumed
+            if len(products) < remaining:
+                schedule(SCRAPE_PREFETCH_PAGES)
+            for product in products[:remaining]:
+                yield product
+            remaining -= len(products)
+            if remaining <= 0:
+                return
+            schedule(1)
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+# --- Matching ---
+
+_TOKEN = re.compile(r"\w+")
+
+def _tokens(text: str) -> List[str]:
+    # Apostrophes are dropped first so "Men's" matches "mens"
+    return _TOKEN.findall((text or "").lower().replace("'", "").replace("\u2019", ""))
+
+def normalize_text(text: str) -> str:
+    """Lowercase words separated by single spaces, punctuation dropped."""
+    return " ".join(_tokens(text))
+
+def normalize_url(url: str) -> str:
+    """Scheme-less, lowercase host and path without query, fragment or trailing slash."""
+    parts = urlsplit((url or "").strip())
+    return f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+def product_key(product: Dict[str, Any]) -> str:
+    """Hash of the normalized name and URL; equal for the same listing reached twice."""
+    identity = f"{normalize_text(product.get('name'))}\n{normalize_url(product.get('product_url'))}"
+    return hashlib.blake2b(identity.encode("utf-8"), digest_size=8).hexdigest()
+
+def relevance(query: str, name: str) -> float:
+    """Fraction of the query's words found in a product name."""
+    query_tokens = set(_tokens(query))
+    if not query_tokens:
+        return 0.0
+    return len(query_tokens & set(_tokens(name))) / len(query_tokens)
+
+# --- Adapters ---
+
+class RetailerAdapter(ABC):
+    """A retailer that can be searched for products."""
+
+    name = "base"
+
+    @abstractmethod
+    def search(self, query: str, theme: str, max_results: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Search the retailer, yielding products as they arrive.
+
+        A search cut short (e.g. by the federated search deadline) keeps the
+        products yielded so far, so adapters should yield each page as soon as
+        it is fetched.
+
+        Args:
+            query: Search terms, theme and item type
+            theme: Theme the products are for
+            max_results: Maximum number of products
+
+        Yields:
+            Product dicts with id (unique across retailers), name, price,
+            price_cents, currency, retailer, image_url, product_url, theme and description
+
+        Raises:
+            UpstreamUnavailable: If the retailer cannot be reached
+        """
+
+class WalmartAdapter(RetailerAdapter):
+    """walmart.com search result pages, scraped through the per-host guard."""
+
+    name = "walmart"
+
+    async def search(self, query: str, theme: str, max_results: int) -> AsyncIterator[Dict[str, Any]]:
+        print(f"Searching Walmart for: {query}")
+        found = 0
+        try:
+            async for product in aiter_walmart_products(query, theme, max_results):
+                found += 1
+                yield product
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            print(f"Error searching Walmart: {e}")
+            return
+        print(f"Found {found} items on Walmart")
+
+class FixtureRetailerAdapter(RetailerAdapter):
+    """
+    Products from a local JSON file, matched on keywords in their names.
+
+    The file holds {"retailer": "Name", "products": [...]} (or just the list)
+    with name, price, image_url, product_url and optionally id and description.
+    `latency` delays every search, to exercise the federated search deadline.
+    """
+
+    name = "fixture"
+
+    def __init__(self, path: str, latency: float = 0.0):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            data = {"products": data}
+        self.retailer = data.get("retailer") or os.path.splitext(os.path.basename(path))[0]
+        self.latency = latency
+        prefix = normalize_text(self.retailer).replace(" ", "-")
+        self.products = []
+        for index, product in enumerate(data.get("products") or []):
+            price_cents, currency = parse_price(product.get("price"))
+            self.products.append({
+                "id": f"{prefix}-{product.get('id', index)}",
+                "name": product["name"],
+                "price": product.get("price"),
+                "price_cents": price_cents,
+                "currency": currency,
+                "retailer": self.retailer,
+                "image_url": product.get("image_url") or "https://example.com/placeholder.jpg",
+                "product_url": product["product_url"],
+                "description": product.get("description") or f"{product['name']} - Available at {self.retailer}",
+            })
+
+    async def search(self, query: str, theme: str, max_results: int) -> AsyncIterator[Dict[str, Any]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        scored = []
+        for product in self.products:
+            score = relevance(query, product["name"])
+            if score > 0:
+                scored.append((score, product))
+        scored.sort(key=lambda entry: -entry[0])
+        for _, product in scored[:max_results]:
+            yield {**product, "theme": theme}
+
+ADAPTERS = {
+    WalmartAdapter.name: WalmartAdapter,
+    FixtureRetailerAdapter.name: FixtureRetailerAdapter,
+}
+
+def create_retailers(spec: str = RETAILERS) -> List[RetailerAdapter]:
+    """Build the adapters named in a RETAILERS value, e.g. 'walmart,fixture:target.json'."""
+    retailers = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, argument = entry.partition(":")
+        if name not in ADAPTERS:
+            raise ValueError(f"Unknown retailer {name!r}; expected one of {sorted(ADAPTERS)}")
+        if name == FixtureRetailerAdapter.name:
+            if not argument:
+                raise ValueError("A fixture retailer needs a path: fixture:<path to JSON>")
+            retailers.append(FixtureRetailerAdapter(argument))
+        else:
+            retailers.append(ADAPTERS[name]())
+    return retailers
+
+retailers = create_retailers()
+
+def set_retailers(adapters: List[RetailerAdapter]):
+    """Replace the enabled retailers (e.g. with fixtures in tests)."""
+    global retailers
+    retailers = list(adapters)
+
+# --- Federated search ---
+
+def merge_results(query: str, results: List[List[Dict[str, Any]]], max_results: int) -> List[Dict[str, Any]]:
+    """Deduplicate products from several retailers and rank them by relevance, then price."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for products in results:
+        for product in products:
+            merged.setdefault(product_key(product), product)
+    ranked = sorted(
+        merged.values(),
+        key=lambda product: (
+            -relevance(query, product["name"]),
+            product.get("price_cents") is None,
+            product.get("price_cents") or 0,
+        )
+    )
+    return ranked[:max_results]
+
+async def federated_search(
+    query: str,
+    theme: str,
+    max_results: int,
+    adapters: Optional[List[RetailerAdapter]] = None,
+    deadline: float = FEDERATED_SEARCH_DEADLINE
+) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Search every enabled retailer concurrently.
+
+    Args:
+        query: Search terms, theme and item type
+        theme: Theme the products are for
+        max_results: Maximum number of products overall (and per retailer)
+        adapters: Retailers to search (default: those enabled in RETAILERS)
+        deadline: Seconds to wait; retailers still running are cancelled, keeping
+            the products they yielded so far
+
+    Returns:
+        (ranked products, {retailer name: error} for retailers that failed or timed out)
+    """
+    adapters = retailers if adapters is None else adapters
+    if not adapters:
+        return [], {}
+
+    async def collect(adapter: RetailerAdapter, products: List[Dict[str, Any]]):
+        async for product in adapter.search(query, theme, max_results):
+            products.append(product)
+
+    collected = [[] for _ in adapters]
+    tasks = [asyncio.ensure_future(collect(adapter, products)) for adapter, products in zip(adapters, collected)]
+    with span("federated_search", retailers=len(tasks)):
+        _, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        # Let cancelled searches clean up (e.g. cancel their page prefetches)
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results, errors = [], {}
+    for task, adapter, products in zip(tasks, adapters, collected):
+        retailer = getattr(adapter, "retailer", adapter.name)
+        # Products that arrived before a timeout or failure are kept
+        results.append(products)
+        if task in pending:
+            errors[retailer] = f"timed out after {deadline:g}s"
+        elif task.exception() is not None:
+            errors[retailer] = str(task.exception())
+        else:
+            continue
+        if products:
+            errors[retailer] += f" ({len(products)} products kept)"
+        increment("wardrobe_retailer_errors_total", "Retailer searches that failed or missed the deadline",
+                  retailer=retailer)
+    return merge_results(query, results, max_results), errors
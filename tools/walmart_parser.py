@@ -0,0 +1,306 @@
+"""
+Extraction engines for Walmart search result pages.
+
+Engines are tried in order until one returns products:
+
+- `JsonPayloadExtractor` reads the embedded `__NEXT_DATA__` JSON payload with
+  plain string scanning, without building any DOM.
+- `TileExtractor` builds only the product tile subtrees (via a SoupStrainer)
+  and queries them with precompiled selectors.
+- `SoupExtractor` is the original full-document BeautifulSoup path, kept as
+  the fallback for pages the faster engines do not understand.
+
+Every engine returns raw product dicts with `id`, `name`, `price`, `url` and
+`image` keys; `extract_products` adds the parsed `price_cents` and `currency`.
+Turning those into tool results is up to the caller.
+"""
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional
+
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+
+from utils.pricing import parse_price
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Overridable so benchmarks can point the scraper at a local stand-in server
+WALMART_BASE_URL = os.getenv("WALMART_BASE_URL", "https://www.walmart.com")
+
+PRICE_PATTERN = re.compile(r'\$\d[\d,]*\.?\d{0,2}')
+# Walmart renders dollars and cents in separate spans ("$8800"), with the
+# readable amount in a screen-reader label ("current price $88.00")
+CURRENT_PRICE_PATTERN = re.compile(r'current price (\$\d[\d,]*\.\d{2})')
+
+def _absolute_url(href: str) -> str:
+    url = href if href.startswith('http') else f"{WALMART_BASE_URL}{href}"
+    return url.split('?')[0]
+
+class ExtractionEngine(ABC):
+    """Base class for product extraction engines."""
+
+    name = "base"
+
+    @abstractmethod
+    def extract(self, html: str, limit: int) -> List[Dict[str, Any]]:
+        """Return up to `limit` raw products found in the page."""
+
+class JsonPayloadExtractor(ExtractionEngine):
+    """Read products from the page's embedded Next.js JSON payload."""
+
+    name = "json"
+
+    SCRIPT_START = re.compile(r'<script[^>]*\bid="__NEXT_DATA__"[^>]*>')
+
+    def extract(self, html: str, limit: int) -> List[Dict[str, Any]]:
+        match = self.SCRIPT_START.search(html)
+        if not match:
+            return []
+        end = html.find("</script>", match.end())
+        if end == -1:
+            return []
+        try:
+            payload = json.loads(html[match.end():end])
+        except json.JSONDecodeError:
+            return []
+
+        products = []
+        for item in self._iter_items(payload):
+            product = self._to_product(item)
+            if product:
+                products.append(product)
+                if len(products) >= limit:
+                    break
+        return products
+
+    def _iter_items(self, payload: dict) -> Iterator[dict]:
+        try:
+            stacks = payload["props"]["pageProps"]["initialData"]["searchResult"]["itemStacks"]
+        except (KeyError, TypeError):
+            return
+        for stack in stacks or []:
+            for item in stack.get("items") or []:
+                if item.get("__typename", "Product") == "Product":
+                    yield item
+
+    def _to_product(self, item: dict) -> Optional[Dict[str, Any]]:
+        product_id = item.get("usItemId") or item.get("id")
+        name = item.get("name")
+        url = item.get("canonicalUrl")
+        price_info = item.get("priceInfo") or {}
+        price_text = (
+            price_info.get("linePrice") or
+            (price_info.get("currentPrice") or {}).get("priceString") or
+            ""
+        )
+        price_match = PRICE_PATTERN.search(price_text)
+        if not (product_id and name and url and price_match):
+            return None
+        image_info = item.get("imageInfo") or {}
+        return {
+            "id": str(product_id),
+            "name": name.strip(),
+            "price": price_match.group(0),
+            "url": _absolute_url(url),
+            "image": image_info.get("thumbnailUrl") or item.get("image"),
+        }
+
+class TileExtractor(ExtractionEngine):
+    """Parse only the product tiles, using precompiled CSS selectors."""
+
+    name = "tiles"
+
+    TILE_STRAINER = SoupStrainer("div", attrs={"data-item-id": True})
+
+    NAME_SELECTORS = [soupsieve.compile(s) for s in (
+        "span[data-automation-id='product-title']",
+        "span.w_iUH7",
+        "span.normal",
+    )]
+    PRICE_SELECTORS = [soupsieve.compile(s) for s in (
+        "span[data-automation-id='product-price-1']",
+        "div[data-automation-id='product-price']",
+        "div.b_Wu1_",
+        "span.price-main",
+    )]
+    IMAGE_SELECTORS = [soupsieve.compile(s) for s in (
+        "img[data-automation-id='product-image']",
+        "img.absolute",
+        "img",
+    )]
+    LINK_SELECTOR = soupsieve.compile("a[href]")
+
+    @staticmethod
+    def _first(tile, selectors):
+        for selector in selectors:
+            elem = selector.select_one(tile)
+            if elem is not None:
+                return elem
+        return None
+
+    def extract(self, html: str, limit: int) -> List[Dict[str, Any]]:
+        soup = BeautifulSoup(html, HTML_PARSER, parse_only=self.TILE_STRAINER)
+        try:
+            products = []
+            for tile in soup.find_all("div", attrs={"data-item-id": True}, recursive=False):
+                product = self._to_product(tile)
+                if product:
+                    products.append(product)
+                    if len(products) >= limit:
+                        break
+            return products
+        finally:
+            soup.decompose()
+
+    def _to_product(self, tile) -> Optional[Dict[str, Any]]:
+        product_id = tile.get("data-item-id")
+        name_elem = self._first(tile, self.NAME_SELECTORS)
+        price_elem = self._first(tile, self.PRICE_SELECTORS)
+        if not (product_id and name_elem and price_elem):
+            return None
+        price_text = price_elem.get_text()
+        price_match = CURRENT_PRICE_PATTERN.search(price_text)
+        if price_match:
+            price = price_match.group(1).replace(",", "")
+        else:
+            price_match = PRICE_PATTERN.search(price_text)
+            if not price_match:
+                return None
+            price = price_match.group(0)
+
+        url = None
+        for link in self.LINK_SELECTOR.select(tile):
+            href = link["href"]
+            if product_id in href or '/ip/' in href:
+                url = _absolute_url(href)
+                break
+        if not url:
+            return None
+
+        image = None
+        img_elem = self._first(tile, self.IMAGE_SELECTORS)
+        if img_elem is not None:
+            image = img_elem.get('src')
+            if not image or image.startswith('data:'):
+                image = img_elem.get('data-src')
+
+        return {
+            "id": product_id,
+            "name": name_elem.get_text().strip(),
+            "price": price,
+            "url": url,
+            "image": image,
+        }
+
+def extract_product_name(item: BeautifulSoup) -> Optional[str]:
+    """Extract product name from a Walmart item."""
+    name_elem = (
+        item.select_one("span[data-automation-id='product-title']") or
+        item.select_one("span.w_iUH7") or
+        item.select_one("span.normal")
+    )
+    return name_elem.text.strip() if name_elem else None
+
+def extract_product_url(item: BeautifulSoup) -> Optional[str]:
+    """Extract product URL from a Walmart item."""
+    product_id = item.get('data-item-id')
+    if not product_id:
+        return None
+        
+    for link in item.select("a"):
+        href = link.get('href', '')
+        if product_id in href or '/ip/' in href:
+            url = href
+            if not url.startswith('http'):
+                url = f"{WALMART_BASE_URL}{url}"
+            return url.split('?')[0] if '?' in url else url
+    return None
+
+def extract_product_price(item: BeautifulSoup) -> Optional[str]:
+    """Extract product price from a Walmart item."""
+    price_elem = (
+        item.select_one("span[data-automation-id='product-price-1']") or
+        item.select_one("div[data-automation-id='product-price']") or
+        item.select_one("div.b_Wu1_") or
+        item.select_one("span.price-main")
+    )
+    if not price_elem:
+        return None
+        
+    price_text = price_elem.text.strip()
+    price_match = re.search(r'\$\d+\.?\d{0,2}', price_text)
+    return price_match.group(0) if price_match else None
+
+def extract_product_image(item: BeautifulSoup) -> Optional[str]:
+    """Extract product image URL from a Walmart item."""
+    img_elem = (
+        item.select_one("img[data-automation-id='product-image']") or
+        item.select_one("img.absolute") or
+        item.select_one("img")
+    )
+    if not img_elem:
+        return None
+        
+    image = img_elem.get('src')
+    if not image or image.startswith('data:'):
+        image = img_elem.get('data-src')
+    return image
+
+class SoupExtractor(ExtractionEngine):
+    """The original full-document BeautifulSoup extraction path."""
+
+    name = "soup"
+
+    def extract(self, html: str, limit: int) -> List[Dict[str, Any]]:
+        soup = BeautifulSoup(html, "html.parser")
+        try:
+            products = []
+            for item in soup.select("div[data-item-id]")[:limit]:
+                try:
+                    name = extract_product_name(item)
+                    url = extract_product_url(item)
+                    price = extract_product_price(item)
+                    image = extract_product_image(item)
+                except Exception as e:
+                    print(f"Error processing item: {e}")
+                    continue
+                if name and price and url:
+                    products.append({
+                        "id": item.get('data-item-id', ''),
+                        "name": name,
+                        "price": price,
+                        "url": url,
+                        "image": image,
+                    })
+            return products
+        finally:
+            soup.decompose()
+
+ENGINES = {
+    engine.name: engine
+    for engine in (JsonPayloadExtractor(), TileExtractor(), SoupExtractor())
+}
+
+DEFAULT_ENGINE_ORDER = ["json", "tiles", "soup"]
+
+def extract_products(html: str, limit: int, engine_order: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Run the extraction engines in order and return the first non-empty result."""
+    for name in engine_order or DEFAULT_ENGINE_ORDER:
+        try:
+            products = ENGINES[name].extract(html, limit)
+        except Exception as e:
+            print(f"Extraction engine '{name}' failed: {e}")
+            continue
+        if products:
+            # Parse prices once here so nothing downstream re-parses the strings
+            for product in products:
+                product["price_cents"], product["currency"] = parse_price(product["price"])
+            return products
+    return []
@@ -1,49 +1,265 @@
+"""
+Weather lookups for wardrobe recommendations.
+
+Weather comes from a pluggable provider chosen with WEATHER_PROVIDER:
+"static" (built-in table, the default), "file" (a JSON file at
+WEATHER_DATA_PATH, handy for tests and offline use) or "open-meteo" (live
+data from open-meteo.com through the shared async HTTP client and the
+per-host guard). Reports are cached per normalized location, each entry with
+its own expiry, and `prefetch_weather` warms the cache for many locations at
+once.
+"""
+import asyncio
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlencode
+
 from agents import function_tool
+from tools.http_client import fetch_async
+from tools.resilience import guard_for
+from utils.cache import TTLCache
+from utils.metrics import register_cache_gauges, span
+
+WEATHER_PROVIDER = os.getenv("WEATHER_PROVIDER", "static")
+WEATHER_DATA_PATH = os.getenv("WEATHER_DATA_PATH")
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "1024"))
+# Seconds a report stays cached; locations the provider does not know are
+# retried sooner
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "3600"))
+WEATHER_MISS_TTL = float(os.getenv("WEATHER_MISS_TTL", "300"))
+# Semicolon-separated locations to warm at startup, e.g. "Boston, MA;Miami;Seattle"
+WEATHER_PREFETCH_LOCATIONS = [
+    location.strip() for location in os.getenv("WEATHER_PREFETCH_LOCATIONS", "").split(";") if location.strip()
+]
+WEATHER_PREFETCH_CONCURRENCY = int(os.getenv("WEATHER_PREFETCH_CONCURRENCY", "8"))
+
+# Mock weather data for common locations
+STATIC_WEATHER = {
+    "boston": {
+        "current_temp": "45°F",
+        "conditions": "Partly cloudy",
+        "seasonal_range": "15°F to 85°F",
+        "precipitation": "Moderate rainfall, winter snow"
+    },
+    "miami": {
+        "current_temp": "82°F",
+        "conditions": "Sunny",
+        "seasonal_range": "65°F to 90°F",
+        "precipitation": "Occasional heavy rain, humid"
+    },
+    "seattle": {
+        "current_temp": "52°F",
+        "conditions": "Light rain",
+        "seasonal_range": "35°F to 75°F",
+        "precipitation": "Frequent light rain, occasional snow"
+    }
+}
+
+# Default data for unknown locations
+DEFAULT_WEATHER = {
+    "current_temp": "65°F",
+    "conditions": "Variable",
+    "seasonal_range": "Varies by season",
+    "precipitation": "Varies throughout the year"
+}
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+def normalize_location(location: str) -> str:
+    """Normalize a location for lookups: 'Boston, MA ' -> 'boston ma'."""
+    return " ".join(_NON_WORD.sub(" ", location.lower()).split())
+
+class WeatherProvider(ABC):
+    """Source of weather reports, keyed on normalized locations."""
+
+    name = "base"
+    # Seconds a report from this provider may be cached
+    ttl = WEATHER_CACHE_TTL
+
+    @abstractmethod
+    async def lookup(self, location_key: str) -> Optional[Dict[str, str]]:
+        """
+        Return a report with current_temp, conditions, seasonal_range and precipitation.
+
+        Args:
+            location_key: Location normalized with normalize_location
+
+        Returns:
+            The report, or None if the provider does not know the location
+        """
+
+class StaticWeatherProvider(WeatherProvider):
+    """
+    Reports from an in-memory table. A location matches the first table entry
+    that appears among its words, so 'downtown boston ma' matches 'boston'.
+    """
+
+    name = "static"
+
+    def __init__(self, data: Optional[Dict[str, Dict[str, str]]] = None):
+        data = STATIC_WEATHER if data is None else data
+        self.data = {normalize_location(key): report for key, report in data.items()}
+        self._max_words = max((len(key.split()) for key in self.data), default=0)
+
+    async def lookup(self, location_key: str) -> Optional[Dict[str, str]]:
+        words = location_key.split()
+        for start in range(len(words)):
+            for size in range(min(self._max_words, len(words) - start), 0, -1):
+                report = self.data.get(" ".join(words[start:start + size]))
+                if report is not None:
+                    return report
+        return None
+
+class FileWeatherProvider(StaticWeatherProvider):
+    """Reports from a JSON file mapping location names to report dicts."""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            super().__init__(json.load(f))
+
+class OpenMeteoWeatherProvider(WeatherProvider):
+    """Live current conditions and 7-day forecast from open-meteo.com (no API key needed)."""
+
+    name = "open-meteo"
+    geocoding_url = "https://geocoding-api.open-meteo.com/v1/search"
+    forecast_url = "https://api.open-meteo.com/v1/forecast"
+
+    # WMO weather interpretation codes, grouped
+    CONDITIONS = [
+        (0, "Clear"), (3, "Partly cloudy"), (48, "Fog"), (57, "Drizzle"),
+        (67, "Rain"), (77, "Snow"), (82, "Rain showers"), (86, "Snow showers"), (99, "Thunderstorms"),
+    ]
+
+    @staticmethod
+    async def _get_json(url: str) -> dict:
+        response = await guard_for(url).call_async(lambda: fetch_async(url))
+        response.raise_for_status()
+        return response.json()
+
+    async def lookup(self, location_key: str) -> Optional[Dict[str, str]]:
+        geocoding = await self._get_json(f"{self.geocoding_url}?{urlencode({'name': location_key, 'count': 1})}")
+        places = geocoding.get("results") or []
+        if not places:
+            return None
+
+        params = {
+            "latitude": places[0]["latitude"],
+            "longitude": places[0]["longitude"],
+            "current": "temperature_2m,weather_code",
+            "daily": "temperature_2m_min,temperature_2m_max,precipitation_sum",
+            "temperature_unit": "fahrenheit",
+            "precipitation_unit": "inch",
+            "timezone": "auto",
+        }
+        data = await self._get_json(f"{self.forecast_url}?{urlencode(params)}")
+        current, daily = data["current"], data["daily"]
+        return {
+            "current_temp": f"{round(current['temperature_2m'])}°F",
+            "conditions": self._conditions(current.get("weather_code", 0)),
+            "seasonal_range": f"{round(min(daily['temperature_2m_min']))}°F to "
+                              f"{round(max(daily['temperature_2m_max']))}°F over the next 7 days",
+            "precipitation": f"{sum(value or 0 for value in daily['precipitation_sum']):.1f} in expected over the next 7 days",
+        }
+
+    def _conditions(self, code: int) -> str:
+        for upper, label in self.CONDITIONS:
+            if code <= upper:
+                return label
+        return "Variable"
+
+PROVIDERS = {
+    StaticWeatherProvider.name: StaticWeatherProvider,
+    FileWeatherProvider.name: FileWeatherProvider,
+    OpenMeteoWeatherProvider.name: OpenMeteoWeatherProvider,
+}
+
+def create_provider(name: str = WEATHER_PROVIDER) -> WeatherProvider:
+    """Build the provider named by WEATHER_PROVIDER."""
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown weather provider {name!r}; expected one of {sorted(PROVIDERS)}")
+    if name == FileWeatherProvider.name:
+        if not WEATHER_DATA_PATH:
+            raise ValueError("WEATHER_PROVIDER=file requires WEATHER_DATA_PATH")
+        return FileWeatherProvider(WEATHER_DATA_PATH)
+    return PROVIDERS[name]()
+
+weather_provider = create_provider()
+
+# normalized location -> report without the "location" field
+weather_cache = TTLCache(max_size=WEATHER_CACHE_SIZE, ttl=WEATHER_CACHE_TTL)
+register_cache_gauges("weather", weather_cache)
+
+def set_weather_provider(provider: WeatherProvider):
+    """Swap the provider (e.g. for a stub in tests) and drop reports cached from the old one."""
+    global weather_provider
+    weather_provider = provider
+    weather_cache.clear()
+
+async def lookup_weather(location: str) -> Dict[str, str]:
+    """
+    Get weather for a location, from cache when possible.
+
+    Args:
+        location: City or region name
+
+    Returns:
+        Weather report including the requested location
+    """
+    location_key = normalize_location(location)
+    report = weather_cache.get(location_key)
+    if report is None:
+        provider = weather_provider
+        with span("weather_lookup", labels={"provider": provider.name}):
+            try:
+                found = await provider.lookup(location_key)
+            except Exception as e:
+                # Serve the default without caching it so the next call retries
+                print(f"Error looking up weather for {location}: {e}")
+                return {"location": location, **DEFAULT_WEATHER}
+        report = found or DEFAULT_WEATHER
+        weather_cache.set(location_key, report, ttl=provider.ttl if found else WEATHER_MISS_TTL)
+    return {"location": location, **report}
+
+async def prefetch_weather(
+    locations: Iterable[str],
+    max_concurrency: int = WEATHER_PREFETCH_CONCURRENCY
+) -> List[Dict[str, str]]:
+    """
+    Warm the cache for many locations concurrently, e.g. the most common ones at startup.
+
+    Args:
+        locations: City or region names
+        max_concurrency: Maximum concurrent provider lookups
+
+    Returns:
+        The reports, in the order of `locations`
+    """
+    locations = list(locations)
+    if not locations:
+        return []
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def lookup(location: str) -> Dict[str, str]:
+        async with semaphore:
+            return await lookup_weather(location)
+
+    with span("weather_prefetch", locations=len(locations)):
+        return list(await asyncio.gather(*(lookup(location) for location in locations)))
 
 @function_tool
-def get_weather_information(location: str):
+async def get_weather_information(location: str):
     """
     Get weather information for a location to help with wardrobe recommendations.
-    
+
     Args:
         location: City or region name
-        
+
     Returns:
         Weather information including temperature range and conditions
     """
-    # Mock weather data for common locations
-    weather_data = {
-        "boston": {
-            "current_temp": "45°F",
-            "conditions": "Partly cloudy",
-            "seasonal_range": "15°F to 85°F",
-            "precipitation": "Moderate rainfall, winter snow"
-        },
-        "miami": {
-            "current_temp": "82°F",
-            "conditions": "Sunny",
-            "seasonal_range": "65°F to 90°F",
-            "precipitation": "Occasional heavy rain, humid"
-        },
-        "seattle": {
-            "current_temp": "52°F",
-            "conditions": "Light rain",
-            "seasonal_range": "35°F to 75°F",
-            "precipitation": "Frequent light rain, occasional snow"
-        }
-    }
-    
-    # Default data for unknown locations
-    default_data = {
-        "current_temp": "65°F",
-        "conditions": "Variable",
-        "seasonal_range": "Varies by season",
-        "precipitation": "Varies throughout the year"
-    }
-    
-    location_key = location.lower().replace(" ", "")
-    for key in weather_data:
-        if key in location_key:
-            return {"location": location, **weather_data[key]}
-    
-    return {"location": location, **default_data} 
\ No newline at end of file
+    return await lookup_weather(location)
@@ -0,0 +1,116 @@
+"""
+Keyword-based clothing categorizer for the AI Wardrobe Assistant.
+
+Each item name is lowercased once and scanned once with a single precompiled
+regex built from the category taxonomy. Keywords match whole words (so "cap"
+does not match "capri") with an optional plural suffix. An item whose name
+matches several keywords goes into the category of the most specific one:
+a multi-word keyword ("top hat") beats single words, and among single words
+the last one wins, as it usually names the garment ("Dress Shoes",
+"Hoodie Sweatshirt"). Taxonomy order only decides between categories that
+share a keyword. One-piece garments (dresses, jumpsuits) count as tops.
+"""
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from models.clothing import ClothingItem
+
+CATEGORIES = ["tops", "bottoms", "outerwear", "headwear", "footwear", "accessories"]
+UNCATEGORIZED = "uncategorized"
+
+DEFAULT_TAXONOMY = {
+    "tops": [
+        "shirt", "tee", "t-shirt", "jersey", "blouse", "polo", "tank", "tank top", "camisole",
+        "cami", "henley", "tunic", "sweater", "pullover", "cardigan", "sweatshirt",
+        "turtleneck", "crop top", "top", "bodysuit", "button-down", "flannel",
+        "dress", "sundress", "gown", "jumpsuit", "romper", "playsuit",
+    ],
+    "bottoms": [
+        "pants", "jeans", "shorts", "skirt", "trousers", "chino", "leggings", "jogger",
+        "sweatpants", "slacks", "capri", "culottes", "overalls", "skort",
+    ],
+    "outerwear": [
+        "jacket", "hoodie", "coat", "parka", "blazer", "vest", "windbreaker", "raincoat",
+        "anorak", "puffer", "trench", "poncho", "shacket", "overcoat", "peacoat",
+    ],
+    "headwear": [
+        "hat", "cap", "beanie", "beret", "fedora", "visor", "bucket hat", "headband",
+        "balaclava", "snapback", "bandana", "trucker hat", "top hat",
+    ],
+    "footwear": [
+        "shoe", "sneaker", "boot", "sandal", "loafer", "heels", "flats", "slipper", "clog",
+        "mule", "espadrille", "sock", "trainer", "cleat", "slide",
+    ],
+    "accessories": [
+        "accessory", "accessories", "scarf", "scarves", "bag", "belt", "wallet", "watch",
+        "sunglasses", "necklace", "bracelet", "earring", "ring", "glove", "mitten",
+        "necktie", "bow tie", "backpack", "tote", "purse", "handbag", "jewelry", "umbrella",
+    ],
+}
+
+def load_taxonomy(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Load a category taxonomy from a JSON file ({"category": ["keyword", ...]}).
+
+    Falls back to the CATEGORY_TAXONOMY_PATH environment variable, then to
+    DEFAULT_TAXONOMY.
+    """
+    path = path or os.getenv("CATEGORY_TAXONOMY_PATH")
+    if not path:
+        return DEFAULT_TAXONOMY
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+class Categorizer:
+    """Assign clothing items to categories in a single pass over the item list."""
+
+    def __init__(self, taxonomy: Optional[Dict[str, List[str]]] = None):
+        self.taxonomy = taxonomy or DEFAULT_TAXONOMY
+        self._keyword_categories: Dict[str, List[str]] = {}
+        for category, keywords in self.taxonomy.items():
+            for keyword in keywords:
+                categories = self._keyword_categories.setdefault(keyword.lower(), [])
+                if category not in categories:
+                    categories.append(category)
+        # Longest keywords first so "tank top" wins over "top"
+        alternation = "|".join(
+            re.escape(keyword)
+            for keyword in sorted(self._keyword_categories, key=len, reverse=True)
+        )
+        self._pattern = re.compile(rf"\b({alternation})(?:e?s)?\b")
+
+    def classify(self, name: str) -> List[str]:
+        """Return the categories an item name belongs to, in order of first match."""
+        categories = []
+        for match in self._pattern.finditer(name.lower()):
+            for category in self._keyword_categories[match.group(1)]:
+                if category not in categories:
+                    categories.append(category)
+        return categories
+
+    def category(self, name: str) -> str:
+        """The one category an item name belongs to (see the module docstring), else uncategorized."""
+        best, best_rank = None, None
+        for match in self._pattern.finditer(name.lower()):
+            rank = (len(match.group(1).split()), match.start())
+            if best_rank is None or rank > best_rank:
+                best, best_rank = match.group(1), rank
+        if best is None:
+            return UNCATEGORIZED
+        return self._keyword_categories[best][0]
+
+    def categorize(self, items: Iterable[Dict[str, Any]]) -> Dict[str, List[ClothingItem]]:
+        """
+        Validate each item once and bucket it into its category.
+
+        Returns:
+            Dictionary with a list per taxonomy category plus an "uncategorized" list
+        """
+        buckets: Dict[str, List[ClothingItem]] = {category: [] for category in self.taxonomy}
+        buckets[UNCATEGORIZED] = []
+        for item in items:
+            clothing_item = ClothingItem(**item)
+            buckets[self.category(clothing_item.name)].append(clothing_item)
+        return buckets
@@ -0,0 +1,105 @@
+"""
+Compact encoding of product search results for the model context.
+
+Tool results are sent back to the model on every following turn, so they are
+shortened before the model sees them: one-letter keys, no repeated query or
+theme per product, descriptions that only restate the name are dropped and
+long ones are cut. Long image and product URLs are replaced by a short
+reference; the model writes "ref:<id>" in the URL fields and
+`resolve_ref` turns it back into the real URL after the run.
+"""
+import hashlib
+import os
+from typing import Any, Dict, List, Optional
+
+from utils.cache import TTLCache
+
+COMPACT_TOOL_RESULTS = os.getenv("COMPACT_TOOL_RESULTS", "1") == "1"
+COMPACT_DESCRIPTION_CHARS = int(os.getenv("COMPACT_DESCRIPTION_CHARS", "80"))
+PRODUCT_REF_CACHE_SIZE = int(os.getenv("PRODUCT_REF_CACHE_SIZE", "20000"))
+PRODUCT_REF_TTL = float(os.getenv("PRODUCT_REF_TTL", "86400"))
+
+REF_PREFIX = "ref:"
+
+# Explanation of the format, for the instructions of agents that read it
+COMPACT_FORMAT_NOTE = (
+    'Search results are compact: "q" query, "t" item type, "r" results, "e" error. '
+    'Each result has "ref" (product reference), "n" name, "p" price and optionally "d" description. '
+    '"s" is "degraded" when a retailer search failed and results may be incomplete or from earlier searches, '
+    'or "unavailable" when nothing was found; never invent products to make up for missing results. '
+    'For a found product, set both image_url and product_url to "ref:" followed by its ref, e.g. "ref:3f9a2c1d5e7b4a60".'
+)
+
+# ref -> {"image_url": ..., "product_url": ...}
+product_refs = TTLCache(max_size=PRODUCT_REF_CACHE_SIZE, ttl=PRODUCT_REF_TTL)
+
+def product_ref(product: Dict[str, Any]) -> str:
+    """Register a product's URLs and return its reference (stable for the same URLs)."""
+    image_url = product.get("image_url") or ""
+    product_url = product.get("product_url") or ""
+    # 64 bits keeps collisions (which would swap product URLs) negligible across the whole registry
+    ref = hashlib.blake2s(f"{product_url}\n{image_url}".encode("utf-8"), digest_size=8).hexdigest()
+    product_refs.set(ref, {"image_url": image_url, "product_url": product_url})
+    return ref
+
+def resolve_ref(value: str, field: str) -> Optional[str]:
+    """
+    Resolve a "ref:<id>" URL field value.
+
+    Args:
+        value: The field value written by the model
+        field: "image_url" or "product_url"
+
+    Returns:
+        The real URL, "" for an unknown reference, or None if `value` is not a reference
+    """
+    value = (value or "").strip()
+    if not value.lower().startswith(REF_PREFIX):
+        return None
+    urls = product_refs.get(value[len(REF_PREFIX):].strip().lower())
+    return urls[field] if urls else ""
+
+def resolve_item_refs(item) -> int:
+    """Replace reference URL fields of a ClothingItem in place; returns how many were replaced."""
+    resolved = 0
+    for field in ("image_url", "product_url"):
+        url = resolve_ref(getattr(item, field), field)
+        if url is not None:
+            setattr(item, field, url)
+            resolved += 1
+    return resolved
+
+def _compact_description(product: Dict[str, Any]) -> Optional[str]:
+    description = " ".join((product.get("description") or "").split())
+    name = product.get("name") or ""
+    # Scraped descriptions are "<name> - Available at <retailer>", which adds nothing
+    if not description or description.startswith(name):
+        return None
+    if len(description) > COMPACT_DESCRIPTION_CHARS:
+        description = description[:COMPACT_DESCRIPTION_CHARS - 3].rstrip() + "..."
+    return description
+
+def compact_product(product: Dict[str, Any]) -> Dict[str, Any]:
+    compact = {"ref": product_ref(product), "n": product.get("name"), "p": product.get("price")}
+    description = _compact_description(product)
+    if description:
+        compact["d"] = description
+    return compact
+
+def compact_search(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact one find_real_products result (query, item_type, status, results[, error])."""
+    if not COMPACT_TOOL_RESULTS:
+        return result
+    compact = {
+        "q": result.get("query"),
+        "t": result.get("item_type"),
+        "r": [compact_product(product) for product in result.get("results") or []],
+    }
+    if result.get("status", "ok") != "ok":
+        compact["s"] = result["status"]
+    if result.get("error"):
+        compact["e"] = result["error"]
+    return compact
+
+def compact_searches(searches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [compact_search(search) for search in searches]
@@ -1,16 +1,19 @@
-from agents import output_guardrail
+from agents import GuardrailFunctionOutput, output_guardrail
+from models.clothing import WardrobeRecommendation
+from utils.repair import has_single_price_tier
 
-@output_guardrail
-def validate_price_range(context, input_text):
-    """Ensure recommendations include various price points"""
-    if "only expensive" in input_text.lower() or "only luxury" in input_text.lower():
-        return False, "Please provide options at various price points"
-    return True, None
+# Defects that can be fixed locally (fake URLs, prices, duplicates, ...) are
+# repaired once the run is over (see utils.repair), so the tripwire - and the
+# agent rerun it costs - is reserved for problems repair cannot fix.
 
 @output_guardrail
-def validate_image_urls(context, input_text):
-    """Ensure all recommendations include image URLs"""
-    if "ClothingItem" in input_text and "image_url" in input_text:
-        if "example.com" in input_text and not "placeholder" in input_text.lower():
-            return False, "Please use realistic image URLs or indicate they are placeholders"
-    return True, None 
\ No newline at end of file
+def validate_price_range(context, agent, output) -> GuardrailFunctionOutput:
+    """Ensure recommendations include various price points"""
+    if not isinstance(output, WardrobeRecommendation):
+        return GuardrailFunctionOutput(output_info=None, tripwire_triggered=False)
+    if has_single_price_tier(output):
+        return GuardrailFunctionOutput(
+            output_info={"message": "Please provide options at various price points"},
+            tripwire_triggered=True
+        )
+    return GuardrailFunctionOutput(output_info=None, tripwire_triggered=False)
@@ -0,0 +1,308 @@
+"""
+Lightweight in-process metrics for the AI Wardrobe Assistant.
+
+Stages are timed with `span(...)` and aggregated into histograms that
+`render_prometheus()` exposes in the Prometheus text format. Agent turns,
+handoffs, guardrails and tool calls are timed from the agents SDK trace spans
+by `MetricsTraceProcessor`. Set WARDROBE_METRICS=0 to turn everything into
+no-ops.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("WARDROBE_METRICS", "1") == "1"
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+TOKEN_BUCKETS = (500, 1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Iterable[float]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # label key -> [bucket counts..., sum, count]
+        self._series: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, key: LabelKey):
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 2)
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative:g}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {series[-1]:g}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]:g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]:g}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelKey, float] = {}
+
+    def increment(self, amount: float, key: LabelKey):
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+class MetricsRegistry:
+    """Thread-safe collection of histograms, counters and gauge callbacks."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+        # name -> (help, callback returning {label key: value})
+        self._gauges: Dict[str, Tuple[str, Callable[[], Dict[LabelKey, float]]]] = {}
+
+    def histogram(self, name: str, help: str, buckets: Iterable[float] = DURATION_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help, buckets)
+            return self._metrics[name]
+
+    def counter(self, name: str, help: str) -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help)
+            return self._metrics[name]
+
+    def gauge_callback(self, name: str, help: str, callback: Callable[[], Dict[LabelKey, float]]):
+        """Register a gauge whose values are read from `callback` at render time."""
+        with self._lock:
+            self._gauges[name] = (help, callback)
+
+    def observe(self, metric: str, value: float, **labels):
+        with self._lock:
+            self._metrics[metric].observe(value, _label_key(labels))
+
+    def increment(self, metric: str, amount: float = 1, **labels):
+        with self._lock:
+            self._metrics[metric].increment(amount, _label_key(labels))
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            for metric in self._metrics.values():
+                lines.extend(metric.render())
+            gauges = list(self._gauges.items())
+        for name, (help, callback) in gauges:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} gauge")
+            try:
+                values = callback()
+            except Exception as e:
+                logger.warning(f"Gauge {name} failed: {e}")
+                continue
+            for key, value in sorted(values.items()):
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "wardrobe_stage_duration_seconds", "Time spent per pipeline stage"
+).name
+FETCH_BYTES = registry.histogram(
+    "wardrobe_fetch_bytes", "Bytes fetched per outbound page request", SIZE_BUCKETS
+).name
+ITEM_COUNT = registry.histogram(
+    "wardrobe_stage_items", "Items produced per stage invocation", COUNT_BUCKETS
+).name
+STAGE_ERRORS = registry.counter(
+    "wardrobe_stage_errors_total", "Stage invocations that raised an exception"
+).name
+
+class Span:
+    """Times one stage invocation. Use `set(...)` to attach attributes."""
+
+    __slots__ = ("stage", "labels", "attrs", "start")
+
+    def __init__(self, stage: str, labels: Dict[str, object], attrs: Dict[str, object]):
+        self.stage = stage
+        self.labels = labels
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        registry.observe(STAGE_SECONDS, duration, stage=self.stage, **self.labels)
+        if exc_type is not None:
+            registry.increment(STAGE_ERRORS, stage=self.stage, **self.labels)
+        if "bytes" in self.attrs:
+            registry.observe(FETCH_BYTES, self.attrs["bytes"], stage=self.stage, **self.labels)
+        if "items" in self.attrs:
+            registry.observe(ITEM_COUNT, self.attrs["items"], stage=self.stage, **self.labels)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"span {self.stage} {self.labels} {duration * 1000:.1f}ms {self.attrs}")
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(stage: str, labels: Optional[Dict[str, object]] = None, **attrs):
+    """
+    Time a stage: `with span("scrape_fetch", query=q) as s: ...; s.set(bytes=n)`.
+
+    `labels` become Prometheus labels (keep them low-cardinality); other
+    keyword attributes are only logged, except `bytes` and `items`, which also
+    feed their own histograms.
+    """
+    if not METRICS_ENABLED:
+        return _NOOP_SPAN
+    return Span(stage, labels or {}, attrs)
+
+def increment(metric: str, help: str, amount: float = 1, **labels):
+    """Increment a counter, registering it on first use."""
+    if METRICS_ENABLED:
+        registry.counter(metric, help)
+        registry.increment(metric, amount, **labels)
+
+def observe(metric: str, help: str, value: float, buckets: Iterable[float] = DURATION_BUCKETS, **labels):
+    """Record a histogram observation, registering the histogram on first use."""
+    if METRICS_ENABLED:
+        registry.histogram(metric, help, buckets)
+        registry.observe(metric, value, **labels)
+
+def record_token_usage(usages: Iterable[object], **labels) -> Dict[str, int]:
+    """
+    Total the agents SDK `Usage` of the runs behind one request and export it.
+
+    Args:
+        usages: `result.context_wrapper.usage` of each run (including failed attempts)
+        labels: Low-cardinality labels, e.g. mode
+
+    Returns:
+        Dict with requests, input_tokens, cached_input_tokens and output_tokens
+    """
+    totals = {"requests": 0, "input_tokens": 0, "cached_input_tokens": 0, "output_tokens": 0}
+    for usage in usages:
+        if usage is None:
+            continue
+        details = getattr(usage, "input_tokens_details", None)
+        totals["requests"] += usage.requests
+        totals["input_tokens"] += usage.input_tokens
+        totals["cached_input_tokens"] += getattr(details, "cached_tokens", 0) or 0
+        totals["output_tokens"] += usage.output_tokens
+
+    increment("wardrobe_llm_requests_total", "Model calls made", totals["requests"], **labels)
+    for kind in ("input", "cached_input", "output"):
+        increment("wardrobe_llm_tokens_total", "Model tokens used", totals[f"{kind}_tokens"], kind=kind, **labels)
+    observe("wardrobe_request_input_tokens", "Model input tokens per recommendation",
+            totals["input_tokens"], TOKEN_BUCKETS, **labels)
+    return totals
+
+_caches: Dict[str, object] = {}
+
+def _cache_stat(stat: str) -> Callable[[], Dict[LabelKey, float]]:
+    def callback():
+        return {(("cache", name),): cache.stats()[stat] for name, cache in list(_caches.items())}
+    return callback
+
+def register_cache_gauges(name: str, cache):
+    """Expose a utils.cache cache's counters as `wardrobe_cache_*{cache=name}` gauges."""
+    if not METRICS_ENABLED:
+        return
+    if not _caches:
+        for stat in ("size", "hits", "misses", "expirations", "evictions"):
+            registry.gauge_callback(f"wardrobe_cache_{stat}", f"Cache {stat} so far", _cache_stat(stat))
+    _caches[name] = cache
+
+def render_prometheus() -> str:
+    return registry.render()
+
+class MetricsTraceProcessor:
+    """
+    agents SDK trace processor that times agent runs, model calls, tool calls,
+    handoffs and guardrails. Register it with `agents.add_trace_processor`.
+    """
+
+    def __init__(self):
+        self._starts: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def on_trace_start(self, trace):
+        pass
+
+    def on_trace_end(self, trace):
+        pass
+
+    def on_span_start(self, span):
+        with self._lock:
+            self._starts[span.span_id] = time.perf_counter()
+
+    def on_span_end(self, span):
+        end = time.perf_counter()
+        with self._lock:
+            start = self._starts.pop(span.span_id, None)
+        if start is None:
+            return
+        data = span.span_data
+        labels = {}
+        if data.type in ("agent", "function", "guardrail"):
+            labels["name"] = getattr(data, "name", "") or ""
+        elif data.type == "handoff":
+            labels["name"] = getattr(data, "to_agent", "") or ""
+        registry.observe(STAGE_SECONDS, end - start, stage=f"agents_{data.type}", **labels)
+        if span.error:
+            registry.increment(STAGE_ERRORS, stage=f"agents_{data.type}", **labels)
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self):
+        pass
@@ -0,0 +1,157 @@
+"""
+Price filtering, sorting and budget-constrained outfit assembly for wardrobe
+recommendations.
+
+Everything works on the parsed `price_cents` of each ClothingItem (set once
+when the item is created), so no price strings are parsed here. Each category
+is turned into a sorted array of cents once; range filters and budget
+upgrades are binary searches over that array.
+"""
+import math
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from models.clothing import ClothingItem, WardrobeRecommendation
+from utils.categorizer import CATEGORIES
+from utils.pricing import price_to_cents
+
+SORT_ORDERS = ("price_asc", "price_desc")
+# Every list field of WardrobeRecommendation
+ITEM_LISTS = CATEGORIES + ["uncategorized"]
+
+class PriceOptions(BaseModel):
+    min_cents: Optional[int] = Field(None, description="Drop items cheaper than this")
+    max_cents: Optional[int] = Field(None, description="Drop items more expensive than this")
+    sort: Optional[str] = Field(None, description="price_asc or price_desc")
+    budget_cents: Optional[int] = Field(None, description="Assemble one item per category within this total")
+
+    @property
+    def active(self) -> bool:
+        return any(value is not None for value in (self.min_cents, self.max_cents, self.sort, self.budget_cents))
+
+    @classmethod
+    def from_request(cls, data: dict) -> "PriceOptions":
+        """
+        Read the optional min_price, max_price, sort and budget fields of a request body.
+
+        Prices may be numbers of dollars (150, 49.99) or price strings ("$150").
+
+        Raises:
+            ValueError: If a field is not a valid price or sort order
+        """
+        sort = data.get("sort")
+        if sort is not None and sort not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort {sort!r}; expected one of {list(SORT_ORDERS)}")
+        return cls(
+            min_cents=_request_cents(data, "min_price"),
+            max_cents=_request_cents(data, "max_price"),
+            sort=sort,
+            budget_cents=_request_cents(data, "budget"),
+        )
+
+def _request_cents(data: dict, field: str) -> Optional[int]:
+    value = data.get(field)
+    if value is None:
+        return None
+    # JSON bodies may carry NaN and Infinity, which have no amount in cents
+    if isinstance(value, bool) or (isinstance(value, float) and not math.isfinite(value)):
+        raise ValueError(f"Invalid {field}: {value!r}")
+    if isinstance(value, (int, float)):
+        cents = round(value * 100)
+    else:
+        cents = price_to_cents(str(value))
+    if cents is None or cents < 0:
+        raise ValueError(f"Invalid {field}: {value!r}")
+    return cents
+
+def sort_by_price(items: List[ClothingItem], descending: bool = False) -> List[ClothingItem]:
+    """Items ordered by price; items without a price always come last."""
+    priced = sorted((item for item in items if item.price_cents is not None),
+                    key=lambda item: item.price_cents, reverse=descending)
+    return priced + [item for item in items if item.price_cents is None]
+
+def _price_index(items: List[ClothingItem]) -> Tuple[List[int], List[ClothingItem]]:
+    """Priced items sorted by price, and the matching array of cents."""
+    priced = sort_by_price([item for item in items if item.price_cents is not None])
+    return [item.price_cents for item in priced], priced
+
+def filter_by_price(
+    items: List[ClothingItem],
+    min_cents: Optional[int] = None,
+    max_cents: Optional[int] = None
+) -> List[ClothingItem]:
+    """
+    Items priced within [min_cents, max_cents], cheapest first.
+
+    Items without a price are dropped when either bound is given.
+    """
+    if min_cents is None and max_cents is None:
+        return list(items)
+    cents, priced = _price_index(items)
+    start = bisect_left(cents, min_cents) if min_cents is not None else 0
+    end = bisect_right(cents, max_cents) if max_cents is not None else len(cents)
+    return priced[start:end]
+
+def assemble_outfit(
+    buckets: Dict[str, List[ClothingItem]],
+    budget_cents: int
+) -> Dict[str, List[ClothingItem]]:
+    """
+    Pick at most one item per category so the total stays within the budget.
+
+    The cheapest item of each category is taken first, covering as many
+    categories as the budget allows (cheapest categories first). The leftover
+    budget is then spread over the chosen categories, each upgrading to the
+    most expensive item it can afford with its share.
+
+    Args:
+        buckets: Category name -> candidate items
+        budget_cents: Total budget in cents
+
+    Returns:
+        Category name -> list holding the chosen item (empty if none fits)
+    """
+    indexes = {category: _price_index(items) for category, items in buckets.items()}
+    outfit: Dict[str, List[ClothingItem]] = {category: [] for category in buckets}
+
+    chosen: Dict[str, int] = {}
+    remaining = budget_cents
+    by_cheapest = sorted((index[0][0], category) for category, index in indexes.items() if index[0])
+    for cheapest, category in by_cheapest:
+        if cheapest > remaining:
+            break
+        chosen[category] = cheapest
+        remaining -= cheapest
+
+    # Upgrade the categories with the fewest options first, leftovers carry over
+    upgrade_order = sorted(chosen, key=lambda category: len(indexes[category][0]))
+    for position, category in enumerate(upgrade_order):
+        cents, priced = indexes[category]
+        share = remaining // (len(upgrade_order) - position)
+        best = bisect_right(cents, chosen[category] + share) - 1
+        remaining -= cents[best] - chosen[category]
+        outfit[category] = [priced[best]]
+    return outfit
+
+def apply_price_options(recommendation: WardrobeRecommendation, options: PriceOptions) -> WardrobeRecommendation:
+    """
+    Filter, sort or budget a recommendation's items.
+
+    Returns a copy when any option is set, so cached recommendations are never changed.
+    """
+    if not options.active:
+        return recommendation
+
+    buckets = {
+        category: filter_by_price(getattr(recommendation, category) or [], options.min_cents, options.max_cents)
+        for category in ITEM_LISTS
+    }
+    if options.budget_cents is not None:
+        outfit = assemble_outfit({category: buckets[category] for category in CATEGORIES}, options.budget_cents)
+        buckets = {**outfit, "uncategorized": []}
+    if options.sort is not None:
+        descending = options.sort == "price_desc"
+        buckets = {category: sort_by_price(items, descending) for category, items in buckets.items()}
+    return recommendation.model_copy(update=buckets)
@@ -0,0 +1,55 @@
+"""
+Price parsing and formatting helpers for the AI Wardrobe Assistant.
+"""
+import os
+import re
+from typing import Optional, Tuple
+
+# An amount: digits with "," or "." separators, ending in a digit
+_AMOUNT = re.compile(r"\d[\d.,]*\d|\d")
+_CURRENCY_CODE = re.compile(r"\b(USD|CAD|AUD|EUR|GBP)\b", re.IGNORECASE)
+_CURRENCY_SYMBOLS = {"€": "EUR", "£": "GBP", "$": "USD"}
+
+# Currency assumed for prices without a symbol or code
+DEFAULT_CURRENCY = os.getenv("DEFAULT_CURRENCY", "USD")
+
+def price_to_cents(price: Optional[str]) -> Optional[int]:
+    """
+    Parse a price string such as '$1,234.5' or '€1.234,50' into integer cents.
+
+    The last separator is the decimal separator when one or two digits follow
+    it (so '12,50' is 12.50, as written in many European locales); any other
+    separator groups thousands ('1,234' and '1.234' are both 1234).
+    """
+    match = _AMOUNT.search(price or "")
+    if not match:
+        return None
+    amount = match.group(0)
+    last = max(amount.rfind(","), amount.rfind("."))
+    whole, fraction = amount, ""
+    if last != -1 and len(amount) - last - 1 <= 2:
+        whole, fraction = amount[:last], amount[last + 1:]
+    units = int(whole.replace(",", "").replace(".", ""))
+    return units * 100 + int(fraction.ljust(2, "0"))
+
+def parse_price(price: Optional[str]) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Parse a price string into integer cents and an ISO 4217 currency code.
+
+    Returns:
+        (cents, currency), or (None, None) if the string holds no amount
+    """
+    cents = price_to_cents(price)
+    if cents is None:
+        return None, None
+    code = _CURRENCY_CODE.search(price)
+    if code:
+        return cents, code.group(1).upper()
+    for symbol, currency in _CURRENCY_SYMBOLS.items():
+        if symbol in price:
+            return cents, currency
+    return cents, DEFAULT_CURRENCY
+
+def format_cents(cents: int) -> str:
+    """Format integer cents as a display price, e.g. 3499 -> '$34.99'."""
+    return f"${cents // 100:,}.{cents % 100:02d}"
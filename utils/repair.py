@@ -0,0 +1,133 @@
+"""
+Deterministic validation and repair of wardrobe recommendations.
+
+Model output often has small defects: a category left out, prices written as
+"34.99" or "USD 34.99", made-up example.com links, or the same product listed
+twice. Rerunning the agent for these is slow and costly, so they are fixed in
+place here. Only defects that cannot be repaired locally (see
+`has_single_price_tier`) should trip an output guardrail.
+"""
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from models.clothing import ClothingItem, WardrobeRecommendation
+from utils.categorizer import CATEGORIES, UNCATEGORIZED
+from utils.compact import resolve_item_refs
+from utils.metrics import increment
+from utils.pricing import format_cents
+
+PLACEHOLDER_IMAGE_URL = "https://example.com/placeholder.jpg"
+PLACEHOLDER_PRODUCT_URL = "https://example.com/placeholder"
+PRICE_UNAVAILABLE = "Price unavailable"
+
+DEFAULT_THEME = "Personalized Wardrobe"
+DEFAULT_STYLING_TIPS = "Mix and match these pieces for a versatile and personalized wardrobe."
+
+# Phrases asking for a single price tier; the text has to be regenerated
+SINGLE_PRICE_TIER_PHRASES = ("only expensive", "only luxury")
+
+ITEM_FIELDS = CATEGORIES + [UNCATEGORIZED]
+
+def is_placeholder_url(url: str) -> bool:
+    return "placeholder" in url.lower()
+
+def is_fake_url(url: str) -> bool:
+    """True for empty URLs and example.com links that are not marked as placeholders."""
+    if not url or not url.strip():
+        return True
+    host = (urlsplit(url.strip()).hostname or "").lower()
+    is_example = host == "example.com" or host.endswith(".example.com")
+    return is_example and not is_placeholder_url(url)
+
+def repair_item(item: ClothingItem, repairs: Optional[Dict[str, int]] = None) -> ClothingItem:
+    """
+    Repair one item in place: resolve refs, trim the name, normalize the
+    price and replace fake URLs with placeholders. Repairs made are counted
+    into `repairs`; returns the item.
+    """
+    if repairs is None:
+        repairs = {}
+    resolved = resolve_item_refs(item)
+    if resolved:
+        repairs["ref"] = repairs.get("ref", 0) + resolved
+
+    name = item.name.strip()
+    if name != item.name:
+        item.name = name
+
+    # price_cents was parsed when the item was created; only USD prices are reformatted
+    if item.price_cents is not None and item.currency == "USD":
+        price = format_cents(item.price_cents)
+    else:
+        price = item.price.strip() or PRICE_UNAVAILABLE
+    if price != item.price:
+        item.price = price
+        repairs["price"] = repairs.get("price", 0) + 1
+
+    if is_fake_url(item.image_url):
+        item.image_url = PLACEHOLDER_IMAGE_URL
+        repairs["image_url"] = repairs.get("image_url", 0) + 1
+    if is_fake_url(item.product_url):
+        item.product_url = PLACEHOLDER_PRODUCT_URL
+        repairs["product_url"] = repairs.get("product_url", 0) + 1
+    return item
+
+def _item_key(item: ClothingItem) -> Tuple[str, str]:
+    url = "" if is_placeholder_url(item.product_url) else item.product_url.strip().rstrip("/").lower()
+    return " ".join(item.name.lower().split()), url
+
+def repair_recommendation(recommendation: WardrobeRecommendation) -> Dict[str, int]:
+    """
+    Repair a recommendation in place.
+
+    Missing categories become empty lists, blank theme and styling tips get
+    defaults, "ref:<id>" URLs from compact search results are resolved,
+    USD prices are normalized to "$X.XX", fake URLs are replaced with
+    explicit placeholders, and nameless or duplicate items (same name and
+    product URL, in any category) are dropped. Repairing an already repaired
+    recommendation changes nothing.
+
+    Args:
+        recommendation: Recommendation to repair
+
+    Returns:
+        Dict mapping repair kind to the number of repairs made
+    """
+    repairs: Dict[str, int] = {}
+    if not (recommendation.theme or "").strip():
+        recommendation.theme = DEFAULT_THEME
+        repairs["theme"] = 1
+    if not (recommendation.styling_tips or "").strip():
+        recommendation.styling_tips = DEFAULT_STYLING_TIPS
+        repairs["styling_tips"] = 1
+
+    seen = set()
+    for category in ITEM_FIELDS:
+        items = getattr(recommendation, category)
+        if items is None:
+            setattr(recommendation, category, [])
+            repairs["missing_category"] = repairs.get("missing_category", 0) + 1
+            continue
+        kept = []
+        for item in items:
+            repair_item(item, repairs)
+            if not item.name:
+                repairs["unnamed_item"] = repairs.get("unnamed_item", 0) + 1
+                continue
+            key = _item_key(item)
+            if key in seen:
+                repairs["duplicate"] = repairs.get("duplicate", 0) + 1
+                continue
+            seen.add(key)
+            kept.append(item)
+        if len(kept) != len(items):
+            setattr(recommendation, category, kept)
+
+    for kind, count in repairs.items():
+        increment("wardrobe_repairs_total", "Recommendation defects repaired locally", count, kind=kind)
+    return repairs
+
+def has_single_price_tier(recommendation: WardrobeRecommendation) -> bool:
+    """True when the text restricts the outfit to one price tier (cannot be repaired locally)."""
+    text = f"{recommendation.theme} {recommendation.styling_tips}".lower()
+    return any(phrase in text for phrase in SINGLE_PRICE_TIER_PHRASES)
@@ -0,0 +1,170 @@
+"""
+HTTP response encoding for recommendation payloads, shared by the Flask and
+ASGI routes.
+
+Recommendations are serialized straight from the pydantic model to JSON bytes
+(pydantic-core's Rust encoder), compressed with brotli or gzip according to
+Accept-Encoding, and tagged with a strong ETag so clients holding a cached
+copy get a 304. Encoded bodies of recently served recommendations are kept, so
+serving the same cached recommendation again costs no serialization or
+compression.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import random
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic_core import to_json
+
+from models.clothing import WardrobeRecommendation
+from utils.cache import TTLCache
+
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+# Fraction of response payloads written to the DEBUG log
+PAYLOAD_LOG_SAMPLE_RATE = float(os.getenv("PAYLOAD_LOG_SAMPLE_RATE", "0.01"))
+PAYLOAD_LOG_MAX_CHARS = 2000
+
+def _load_brotli():
+    """Brotli support requires the optional `brotli` (or `brotlicffi`) package."""
+    for module in ("brotli", "brotlicffi"):
+        try:
+            return __import__(module)
+        except ImportError:
+            continue
+    return None
+
+brotli = _load_brotli()
+
+def _compress_gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+
+def _compress_brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY)
+
+# Content codings in order of preference
+COMPRESSORS = [("br", _compress_brotli)] if brotli is not None else []
+COMPRESSORS.append(("gzip", _compress_gzip))
+
+class EncodedBody:
+    """A serialized payload, its ETag and its compressed variants (built on demand)."""
+
+    __slots__ = ("source", "body", "etag", "_variants")
+
+    def __init__(self, source: object, body: bytes):
+        # Holding the source keeps its id() from being reused while this is cached
+        self.source = source
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self._variants: Dict[str, bytes] = {}
+
+    def variant(self, coding: str) -> bytes:
+        if coding not in self._variants:
+            compress = dict(COMPRESSORS)[coding]
+            self._variants[coding] = compress(self.body)
+        return self._variants[coding]
+
+# id(recommendation) -> EncodedBody; cached recommendations are served repeatedly
+_encoded = TTLCache(max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "256")), ttl=600)
+
+def encode_recommendation(recommendation: WardrobeRecommendation) -> EncodedBody:
+    """JSON bytes and ETag for a recommendation, reusing earlier work for the same object."""
+    key = str(id(recommendation))
+    encoded = _encoded.get(key)
+    if encoded is None or encoded.source is not recommendation:
+        encoded = EncodedBody(recommendation, to_json(recommendation))
+        _encoded.set(key, encoded)
+    return encoded
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+def choose_encoding(accept_encoding: Optional[str], size: int) -> Optional[str]:
+    """Preferred content coding the client accepts, or None to send the body as is."""
+    if size < RESPONSE_COMPRESSION_MIN_BYTES:
+        return None
+    accepted = parse_accept_encoding(accept_encoding)
+    best, best_q = None, 0.0
+    for coding, _ in COMPRESSORS:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches the payload's ETag.
+
+    Uses weak comparison as RFC 9110 requires for If-None-Match, so the tag of
+    any content coding of the same payload matches.
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"').split("-", 1)[0] == etag:
+            return True
+    return False
+
+def recommendation_response(
+    recommendation: WardrobeRecommendation,
+    accept_encoding: Optional[str] = None,
+    if_none_match: Optional[str] = None
+) -> Tuple[int, bytes, List[Tuple[str, str]]]:
+    """
+    Build a recommendation response independent of the web framework.
+
+    Args:
+        recommendation: Recommendation to send
+        accept_encoding: The request's Accept-Encoding header
+        if_none_match: The request's If-None-Match header
+
+    Returns:
+        (status, body, headers); status is 304 with an empty body when the client's copy is current
+    """
+    encoded = encode_recommendation(recommendation)
+    coding = choose_encoding(accept_encoding, len(encoded.body))
+    # Each content coding is a separate representation with its own strong ETag
+    etag = f'"{encoded.etag}-{coding}"' if coding else f'"{encoded.etag}"'
+    headers = [("ETag", etag), ("Vary", "Accept-Encoding")]
+    if etag_matches(if_none_match, encoded.etag):
+        return 304, b"", headers
+
+    body = encoded.variant(coding) if coding else encoded.body
+    headers.append(("Content-Type", "application/json"))
+    if coding:
+        headers.append(("Content-Encoding", coding))
+    return 200, body, headers
+
+def log_payload(logger: logging.Logger, message: str, payload: Callable[[], bytes]):
+    """
+    Log a sample of response payloads at DEBUG, truncated.
+
+    `payload` returns the body and is only called for a sampled payload, so
+    the others cost no encoding or formatting.
+    """
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < PAYLOAD_LOG_SAMPLE_RATE:
+        body = payload()
+        logger.debug("%s (%d bytes): %.*s", message, len(body), PAYLOAD_LOG_MAX_CHARS, body.decode("utf-8", "replace"))
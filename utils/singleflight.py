@@ -0,0 +1,71 @@
+"""
+Single-flight request coalescing for the AI Wardrobe Assistant.
+
+Concurrent callers asking for the same key share one in-flight computation
+instead of each starting their own. The computation runs as its own task, so
+a caller that times out or is cancelled does not abort it for the others.
+Once every caller still waiting has been cancelled, nobody needs the result
+and the computation is cancelled too; a timed-out caller leaves it running
+(e.g. to fill a cache).
+"""
+import asyncio
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.metrics import increment
+
+class SingleFlight:
+    """Deduplicate concurrent async calls by key (per event loop)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        # loop -> {key: task}
+        self._calls = weakref.WeakKeyDictionary()
+        # task -> callers waiting for it
+        self._waiting = weakref.WeakKeyDictionary()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        Return the result of `fn()`, sharing it with concurrent callers using the same key.
+
+        Args:
+            key: Identity of the computation
+            fn: Zero-argument coroutine function, only called if no call for `key` is in flight
+            timeout: Optional seconds this caller waits; raises asyncio.TimeoutError when exceeded
+
+        Exceptions raised by `fn` propagate to every caller sharing the call.
+        Cancelling the last caller waiting for the call cancels it.
+        """
+        loop = asyncio.get_running_loop()
+        calls: Dict[str, asyncio.Task] = self._calls.setdefault(loop, {})
+        task = calls.get(key)
+        if task is None:
+            task = loop.create_task(fn())
+            calls[key] = task
+            task.add_done_callback(lambda done: self._finished(calls, key, done))
+        else:
+            increment("wardrobe_singleflight_shared_total", "Calls served by an already in-flight computation", flight=self.name)
+
+        self._waiting[task] = self._waiting.get(task, 0) + 1
+        try:
+            if timeout:
+                return await asyncio.wait_for(asyncio.shield(task), timeout)
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiting[task] == 1:
+                task.cancel()
+            raise
+        finally:
+            self._waiting[task] -= 1
+
+    @staticmethod
+    def _finished(calls: Dict[str, asyncio.Task], key: str, task: asyncio.Task):
+        if calls.get(key) is task:
+            del calls[key]
+        # Mark the exception as retrieved even if every caller gave up waiting
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        """Number of in-flight calls on the running event loop."""
+        return len(self._calls.get(asyncio.get_running_loop(), {}))
@@ -0,0 +1,115 @@
+"""
+Streaming helpers for the AI Wardrobe Assistant.
+
+`RecommendationStreamParser` consumes the agent's JSON output as text deltas
+and emits recommendation fields as soon as each one is complete, so clients
+can render the theme, styling tips and individual items before the run ends.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from models.clothing import ClothingItem
+from utils.categorizer import CATEGORIES, Categorizer
+from utils.repair import repair_item
+
+TEXT_FIELDS = ["theme", "styling_tips"]
+# Flat item lists that need categorizing, as produced by the product search agent
+FLAT_ITEM_LISTS = ["items", "results"]
+
+_WHITESPACE = re.compile(r"\s*")
+
+def format_sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class RecommendationStreamParser:
+    """
+    Incrementally extract recommendation fields from partial JSON text.
+
+    `feed` returns a list of `{"event": ..., "data": ...}` dicts:
+    - `theme` / `styling_tips` with the string value
+    - `item` with `{"category": ..., "item": {...}}` for each complete, valid item
+    """
+
+    def __init__(self, categorizer: Optional[Categorizer] = None):
+        self.categorizer = categorizer or Categorizer()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pending_fields = list(TEXT_FIELDS)
+        # key -> offset of the next unread array element, or None once the array closed
+        self._arrays: Dict[str, Optional[int]] = {}
+        self._array_keys = CATEGORIES + FLAT_ITEM_LISTS
+        self._key_patterns = {
+            key: re.compile(rf'"{key}"\s*:\s*') for key in TEXT_FIELDS + self._array_keys
+        }
+
+    def feed(self, delta: str) -> List[Dict[str, Any]]:
+        self._buffer += delta
+        events = []
+
+        for field in list(self._pending_fields):
+            value = self._decode_value(field)
+            if isinstance(value, str):
+                events.append({"event": field, "data": value})
+                self._pending_fields.remove(field)
+
+        for key in self._array_keys:
+            if key not in self._arrays:
+                match = self._key_patterns[key].search(self._buffer)
+                if not match or match.end() >= len(self._buffer):
+                    continue
+                if self._buffer[match.end()] != "[":
+                    self._arrays[key] = None
+                    continue
+                self._arrays[key] = match.end() + 1
+            events.extend(self._read_array_items(key))
+
+        return events
+
+    def _decode_value(self, key: str) -> Any:
+        match = self._key_patterns[key].search(self._buffer)
+        if not match:
+            return None
+        try:
+            value, _ = self._decoder.raw_decode(self._buffer, match.end())
+        except json.JSONDecodeError:
+            return None
+        return value
+
+    def _read_array_items(self, key: str) -> List[Dict[str, Any]]:
+        events = []
+        pos = self._arrays[key]
+        while pos is not None:
+            pos = _WHITESPACE.match(self._buffer, pos).end()
+            if pos >= len(self._buffer):
+                break
+            char = self._buffer[pos]
+            if char == ",":
+                pos += 1
+                continue
+            if char == "]":
+                pos = None
+                break
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                break
+            pos = end
+            events.extend(self._item_events(key, value))
+        self._arrays[key] = pos
+        return events
+
+    def _item_events(self, key: str, value: Any) -> List[Dict[str, Any]]:
+        if not isinstance(value, dict):
+            return []
+        try:
+            item = ClothingItem(**value)
+        except (TypeError, ValidationError):
+            return []
+        # Same per-item repair as the final recommendation, so streamed items match it
+        repair_item(item)
+        category = self.categorizer.category(item.name) if key in FLAT_ITEM_LISTS else key
+        return [{"event": "item", "data": {"category": category, "item": item.model_dump()}}]
@@ -1,69 +1,516 @@
-from openai import OpenAI
-from agents import Runner
-from my_agents.wardrobe_agents import wardrobe_agent
 from models.clothing import WardrobeRecommendation, ClothingItem
+from utils.cache import TTLCache
+from utils.categorizer import Categorizer, CATEGORIES, UNCATEGORIZED, load_taxonomy
+from utils.streaming import RecommendationStreamParser
+from utils.metrics import METRICS_ENABLED, MetricsTraceProcessor, increment, record_token_usage, register_cache_gauges, span
+from utils.repair import DEFAULT_STYLING_TIPS, DEFAULT_THEME, repair_recommendation
+from utils.singleflight import SingleFlight
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
 import json
 import os
+import re
+import threading
+import time
+import weakref
 from dotenv import load_dotenv
 import asyncio
-import nest_asyncio
-from colorama import init, Fore, Style, Back
-import agentops
-# Initialize colorama
-init()
-
-# Apply nest_asyncio to allow nested event loops
-nest_asyncio.apply()
 
 load_dotenv()
 
+# The agents SDK, the agent definitions and the tools behind them make up most
+# of the import time, so they are imported on first use (or by preload()), not
+# when the API server starts.
+_agents_lock = threading.Lock()
+_agents_loaded = False
+
+def load_agents():
+    """Import the agents stack once and register the metrics trace processor."""
+    global _agents_loaded
+    if _agents_loaded:
+        return
+    with _agents_lock:
+        if _agents_loaded:
+            return
+        from agents import add_trace_processor
+        import my_agents.wardrobe_agents  # noqa: F401
+        # Time agent turns, handoffs, guardrails and tool calls from the SDK's trace spans
+        if METRICS_ENABLED:
+            add_trace_processor(MetricsTraceProcessor())
+        _agents_loaded = True
+
+# Maximum number of agent runs in flight per event loop
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("WARDROBE_MAX_CONCURRENCY", "16"))
+
+# Finished recommendations are served from cache while fresh, and served stale
+# (while being refreshed in the background) for a further stale window
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "512"))
+RECOMMENDATION_CACHE_TTL = float(os.getenv("RECOMMENDATION_CACHE_TTL", "600"))
+RECOMMENDATION_CACHE_STALE_TTL = float(os.getenv("RECOMMENDATION_CACHE_STALE_TTL", "3600"))
+
+# Seconds a caller waits for a recommendation run (0 = no limit). Runs shared by
+# several callers keep going when one of them times out.
+RECOMMENDATION_TIMEOUT = float(os.getenv("RECOMMENDATION_TIMEOUT", "180"))
+
+# Extra agent runs allowed when an output guardrail trips. Fixable defects are
+# repaired locally (utils/repair.py), so only unrecoverable output gets here.
+GUARDRAIL_MAX_RERUNS = int(os.getenv("GUARDRAIL_MAX_RERUNS", "1"))
+
+# How a recommendation is produced (overridable per request):
+#   handoff  - the wardrobe agent hands off to the product search agent
+#   parallel - the style advisor and product search agents run concurrently and
+#              their outputs are merged in code, saving the sequential LLM turns
+PIPELINE_MODES = ("handoff", "parallel")
+DEFAULT_PIPELINE_MODE = os.getenv("WARDROBE_PIPELINE_MODE", "handoff")
+if DEFAULT_PIPELINE_MODE not in PIPELINE_MODES:
+    raise ValueError(f"WARDROBE_PIPELINE_MODE must be one of {PIPELINE_MODES}")
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt for cache lookups: case, whitespace, punctuation and token order."""
+    return " ".join(sorted(_PUNCTUATION.sub(" ", prompt.lower()).split()))
+
 class WardrobeService:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self._client = None
+        self.max_concurrency = max_concurrency
+        # normalized prompt -> (created_at, WardrobeRecommendation)
+        self.recommendation_cache = TTLCache(
+            max_size=RECOMMENDATION_CACHE_SIZE,
+            ttl=RECOMMENDATION_CACHE_TTL + RECOMMENDATION_CACHE_STALE_TTL
+        )
+        register_cache_gauges("recommendations", self.recommendation_cache)
+        # Identical normalized prompts in flight at the same time share one agent run
+        self._inflight = SingleFlight("recommendations")
+        self._refreshing = set()
+        self._background_tasks = set()
+        self.categorizer = Categorizer(load_taxonomy())
+        # One semaphore per event loop, since asyncio primitives are loop-bound
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """OpenAI client, created on first access."""
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._client
+
+    def preload(self):
+        """
+        Import the agents stack now rather than on the first request.
         
-    def _ensure_event_loop(self):
-        """Ensure there's an event loop available in the current thread."""
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        return loop
+        Call from a background thread at startup so a new worker accepts
+        connections immediately and is usually warm by its first request.
+        """
+        with span("preload"):
+            load_agents()
+
+    def prefetch_weather_sync(self, locations: List[str]) -> List[Dict[str, str]]:
+        """Warm the weather cache for `locations` on the shared background loop."""
+        from tools.weather import prefetch_weather
+        return self._run_sync(prefetch_weather(locations))
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Return the concurrency limiter for the running event loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
 
-    def create_wardrobe_recommendation(self, user_prompt: str) -> WardrobeRecommendation:
+    def _get_background_loop(self) -> asyncio.AbstractEventLoop:
+        """Start (once) a shared event loop in a daemon thread for sync callers."""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="wardrobe-service-loop",
+                    daemon=True
+                )
+                thread.start()
+                self._loop = loop
+        return self._loop
+
+    def _run_sync(self, coro):
+        """Run a coroutine on the shared background loop and wait for its result."""
+        future = asyncio.run_coroutine_threadsafe(coro, self._get_background_loop())
+        return future.result()
+
+    async def create_wardrobe_recommendation(
+        self,
+        user_prompt: str,
+        use_cache: bool = True,
+        mode: Optional[str] = None,
+        latency_budget: Optional[float] = None
+    ) -> WardrobeRecommendation:
         """
         Generate a wardrobe recommendation based on user prompt.
         
+        Results are cached by normalized prompt, whichever mode produced them. A
+        stale cached result is returned immediately while a background run
+        refreshes it.
+        
         Args:
             user_prompt: User's request for a wardrobe recommendation
+            use_cache: Set to False to bypass cached results (the fresh result is still stored)
+            mode: Pipeline mode from PIPELINE_MODES (default: WARDROBE_PIPELINE_MODE)
+            latency_budget: Seconds the model turns may take, falling back to faster
+                model tiers, then to a cached result (default: LATENCY_BUDGET, 0 = none)
             
         Returns:
             WardrobeRecommendation object
         """
-        # Ensure we have an event loop
-        loop = self._ensure_event_loop()
-        
-        # Run the agent in the event loop
-        result = loop.run_until_complete(
-            Runner.run(
-                wardrobe_agent,
-                user_prompt
+        mode = mode or DEFAULT_PIPELINE_MODE
+        if mode not in PIPELINE_MODES:
+            raise ValueError(f"Unknown pipeline mode {mode!r}; expected one of {PIPELINE_MODES}")
+        with span("recommendation", labels={"mode": mode}) as request_span:
+            cache_key = normalize_prompt(user_prompt)
+            if use_cache:
+                entry = self.recommendation_cache.get(cache_key)
+                if entry is not None:
+                    created_at, recommendation = entry
+                    if time.time() - created_at > RECOMMENDATION_CACHE_TTL:
+                        self._schedule_refresh(cache_key, user_prompt, mode)
+                        request_span.set(cache="stale")
+                    else:
+                        request_span.set(cache="hit")
+                    return recommendation
+            
+            request_span.set(cache="miss")
+            return await self._inflight.do(
+                cache_key,
+                lambda: self._generate_and_cache(cache_key, user_prompt, mode, latency_budget),
+                timeout=RECOMMENDATION_TIMEOUT
             )
-        )
+
+    def create_wardrobe_recommendation_sync(
+        self,
+        user_prompt: str,
+        use_cache: bool = True,
+        mode: Optional[str] = None,
+        latency_budget: Optional[float] = None
+    ) -> WardrobeRecommendation:
+        """
+        Blocking variant of create_wardrobe_recommendation for sync callers (CLI, WSGI).
+        
+        All sync callers share one background event loop, so requests from
+        different threads still overlap their I/O.
+        """
+        return self._run_sync(self.create_wardrobe_recommendation(
+            user_prompt, use_cache=use_cache, mode=mode, latency_budget=latency_budget
+        ))
+
+    async def replay(self, trace_path: str, speed: float = 1.0) -> WardrobeRecommendation:
+        """
+        Re-run a recorded session (see WARDROBE_RECORD_DIR) without network access.
+        
+        Model responses and tool outputs come from the trace, so only local
+        work (agent loop, parsing, repair, categorization) is measured. Caches
+        are bypassed, nothing is stored and no latency budget applies.
+        
+        Args:
+            trace_path: Trace file written by a recorded session
+            speed: Divides the recorded model and tool durations; 0 replays without waiting
+            
+        Returns:
+            WardrobeRecommendation object
+        """
+        load_agents()
+        from my_agents.recording import Session, replaying
+        session = Session.load(trace_path, speed=speed)
+        with replaying(session), span("replay", labels={"mode": session.mode}):
+            return await self._run_agent(session.prompt, session.mode, latency_budget=0)
+
+    def replay_sync(self, trace_path: str, speed: float = 1.0) -> WardrobeRecommendation:
+        """Blocking variant of replay."""
+        return self._run_sync(self.replay(trace_path, speed=speed))
+
+    async def stream_wardrobe_recommendation(self, user_prompt: str, use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a recommendation, yielding partial results as they become available.
+        
+        Yields `{"event": ..., "data": ...}` dicts: `status` (agent, handoff and tool
+        progress), `theme`, `styling_tips`, `item` (one per categorized item) and
+        finally `recommendation` with the complete result. Always uses the
+        handoff pipeline.
+        """
+        cache_key = normalize_prompt(user_prompt)
+        if use_cache:
+            entry = self.recommendation_cache.get(cache_key)
+            if entry is not None and time.time() - entry[0] <= RECOMMENDATION_CACHE_TTL:
+                for event in self._recommendation_events(entry[1]):
+                    yield event
+                return
+        
+        load_agents()
+        from agents import Runner
+        from my_agents.routing import run_config
+        from my_agents.wardrobe_agents import wardrobe_agent
+        async with self._get_semaphore():
+            result = Runner.run_streamed(wardrobe_agent, user_prompt, run_config=run_config())
+            parser = RecommendationStreamParser(self.categorizer)
+            async for event in result.stream_events():
+                if event.type == "raw_response_event":
+                    if event.data.type == "response.output_text.delta":
+                        for partial in parser.feed(event.data.delta):
+                            yield partial
+                elif event.type == "agent_updated_stream_event":
+                    # Each agent writes its own JSON document
+                    parser = RecommendationStreamParser(self.categorizer)
+                    yield {"event": "status", "data": {"stage": "agent", "agent": event.new_agent.name}}
+                elif event.type == "run_item_stream_event" and event.name == "tool_called":
+                    tool_name = getattr(event.item.raw_item, "name", None)
+                    yield {"event": "status", "data": {"stage": "tool_called", "tool": tool_name}}
+        
+        self._record_usage([self._usage_of(result)], "stream")
+        recommendation = self._parse_agent_output(result.final_output)
+        self.recommendation_cache.set(cache_key, (time.time(), recommendation))
+        yield {"event": "recommendation", "data": recommendation.model_dump()}
+
+    def stream_wardrobe_recommendation_sync(self, user_prompt: str, use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+        """Blocking iterator over stream_wardrobe_recommendation for sync callers."""
+        loop = self._get_background_loop()
+        events = self.stream_wardrobe_recommendation(user_prompt, use_cache=use_cache)
+        try:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(events.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    return
+        finally:
+            asyncio.run_coroutine_threadsafe(events.aclose(), loop).result()
+
+    def _recommendation_events(self, recommendation: WardrobeRecommendation) -> Iterator[Dict[str, Any]]:
+        """The stream events for an already finished recommendation."""
+        yield {"event": "theme", "data": recommendation.theme}
+        yield {"event": "styling_tips", "data": recommendation.styling_tips}
+        for category in CATEGORIES + [UNCATEGORIZED]:
+            for item in getattr(recommendation, category) or []:
+                yield {"event": "item", "data": {"category": category, "item": item.model_dump()}}
+        yield {"event": "recommendation", "data": recommendation.model_dump()}
+
+    async def _run_agent(
+        self,
+        user_prompt: str,
+        mode: str = "handoff",
+        latency_budget: Optional[float] = None
+    ) -> WardrobeRecommendation:
+        """
+        Run the agent pipeline for a prompt.
+        
+        At most `max_concurrency` pipeline runs execute at once on a given event
+        loop; additional callers wait for a free slot. A handoff run whose output
+        trips a guardrail is retried up to GUARDRAIL_MAX_RERUNS times. Token usage
+        of all runs, failed ones included, is logged and exported as metrics.
+        With WARDROBE_RECORD_DIR set, the session is recorded for replay.
+        
+        Model turns run under the latency budget (see my_agents/routing.py); the
+        tiers that served them are logged and exported as metrics.
+        """
+        load_agents()
+        from my_agents.recording import recording
+        from my_agents.routing import LATENCY_BUDGET, LatencyBudget, budgeted
+        with span("queue_wait"):
+            await self._get_semaphore().acquire()
+        usages = []
+        budget = LatencyBudget(LATENCY_BUDGET if latency_budget is None else latency_budget)
+        try:
+            with recording(user_prompt, mode), budgeted(budget):
+                if mode == "parallel":
+                    return await self._run_parallel(user_prompt, usages)
+                result = await self._run_handoff(user_prompt, usages)
+        finally:
+            self._get_semaphore().release()
+            self._record_usage(usages, mode)
+            self._record_route(budget, mode)
         
         return self._parse_agent_output(result.final_output)
+
+    async def _run_handoff(self, user_prompt: str, usages: List[Any]):
+        """
+        Run the wardrobe agent, rerunning it when an output guardrail trips.
+        The runs' token usage is appended to `usages`; returns the run result.
+        """
+        from agents import OutputGuardrailTripwireTriggered, Runner
+        from my_agents.routing import run_config
+        from my_agents.wardrobe_agents import wardrobe_agent
+        for attempt in range(GUARDRAIL_MAX_RERUNS + 1):
+            try:
+                with span("agent_run"):
+                    result = await Runner.run(
+                        wardrobe_agent,
+                        user_prompt,
+                        run_config=run_config()
+                    )
+                usages.append(self._usage_of(result))
+                return result
+            except OutputGuardrailTripwireTriggered as e:
+                usages.append(self._usage_of(e))
+                guardrail = e.guardrail_result.guardrail.get_name()
+                if attempt == GUARDRAIL_MAX_RERUNS:
+                    raise ValueError(f"Agent output failed guardrail {guardrail}: {e.guardrail_result.output.output_info}")
+                increment("wardrobe_guardrail_reruns_total", "Agent reruns caused by a tripped output guardrail", guardrail=guardrail)
+                print(f"Guardrail {guardrail} tripped, rerunning agent (attempt {attempt + 2})")
+
+    @staticmethod
+    def _usage_of(result):
+        """Token usage of a run result, or of a failed run from its exception (if available)."""
+        if isinstance(result, BaseException):
+            run_data = getattr(result, "run_data", None)
+            return run_data.context_wrapper.usage if run_data is not None else None
+        return result.context_wrapper.usage
+
+    @staticmethod
+    def _record_usage(usages: List[Any], mode: str):
+        """Log and export the model token usage behind one recommendation."""
+        if not usages:
+            return
+        totals = record_token_usage(usages, mode=mode)
+        print(
+            f"Token usage ({mode}): {totals['requests']} model calls, {totals['input_tokens']} input tokens "
+            f"({totals['cached_input_tokens']} cached), {totals['output_tokens']} output tokens"
+        )
+
+    @staticmethod
+    def _record_route(budget, mode: str):
+        """Log and export which model tiers served one recommendation."""
+        if not budget.turns:
+            return
+        route = "fallback" if budget.fell_back else "routed"
+        increment("wardrobe_model_route_total", "Recommendations by the model tiers that served them",
+                  route=route, tiers=budget.served_by, mode=mode)
+        print(f"Model tiers ({mode}, {route}): {budget.summary()}")
+
+    async def _run_parallel(self, user_prompt: str, usages: List[Any]) -> WardrobeRecommendation:
+        """
+        Run the style advisor and product search agents concurrently and merge
+        their outputs in code. If one of them fails, the other's output is used
+        alone. The runs' token usage is appended to `usages`.
+        """
+        from agents import Runner
+        from my_agents.routing import run_config
+        from my_agents.wardrobe_agents import product_search_agent, style_advisor_agent
+        with span("agent_run", labels={"mode": "parallel"}):
+            advice, products = await asyncio.gather(
+                Runner.run(style_advisor_agent, user_prompt, run_config=run_config()),
+                Runner.run(product_search_agent, user_prompt, run_config=run_config()),
+                return_exceptions=True
+            )
+        usages.extend([self._usage_of(advice), self._usage_of(products)])
+        if isinstance(advice, BaseException) and isinstance(products, BaseException):
+            raise products
+        for name, result in (("style advisor", advice), ("product search", products)):
+            if isinstance(result, BaseException):
+                print(f"Error from {name} agent, continuing without it: {result}")
+
+        with span("parse_agent_output", labels={"mode": "parallel"}):
+            recommendation = self._merge_parallel_outputs(
+                None if isinstance(advice, BaseException) else advice.final_output,
+                None if isinstance(products, BaseException) else products.final_output
+            )
+            repair_recommendation(recommendation)
+            return recommendation
+
+    def _merge_parallel_outputs(self, advice_output, products_output) -> WardrobeRecommendation:
+        """
+        Merge style advisor output (theme, tips, suggested_items) with product
+        search output (items). Found products come first; a suggested item is
+        dropped when a found product has the same name. Found products are
+        bucketed by the categorizer, suggested items keep the advisor's category.
+        """
+        advice = self._output_to_dict(advice_output) if advice_output is not None else {}
+        found = self._output_to_dict(products_output) if products_output is not None else {}
+        found_items = found.get("items") or found.get("results") or []
+
+        buckets = self.categorizer.categorize(found_items)
+        found_names = {" ".join(item.name.lower().split()) for bucket in buckets.values() for item in bucket}
+        suggested = advice.get("suggested_items") or {
+            category: advice.get(category) or [] for category in CATEGORIES
+        }
+        for category in CATEGORIES:
+            for item in suggested.get(category) or []:
+                try:
+                    suggestion = ClothingItem(**item)
+                except Exception as e:
+                    print(f"Skipping malformed suggested item: {e}")
+                    continue
+                if " ".join(suggestion.name.lower().split()) not in found_names:
+                    buckets.setdefault(category, []).append(suggestion)
+
+        return WardrobeRecommendation(
+            theme=advice.get("theme") or found.get("theme") or DEFAULT_THEME,
+            styling_tips=advice.get("styling_tips") or DEFAULT_STYLING_TIPS,
+            uncategorized=buckets.get(UNCATEGORIZED, []),
+            **{category: buckets.get(category, []) for category in CATEGORIES}
+        )
+
+    async def _generate_and_cache(
+        self,
+        cache_key: str,
+        user_prompt: str,
+        mode: str = "handoff",
+        latency_budget: Optional[float] = None
+    ) -> WardrobeRecommendation:
+        from my_agents.routing import LatencyBudgetExceeded
+        try:
+            recommendation = await self._run_agent(user_prompt, mode, latency_budget)
+        except LatencyBudgetExceeded as e:
+            # Any cached result for the prompt, even a stale one, beats no answer
+            entry = self.recommendation_cache.get(cache_key)
+            if entry is None:
+                raise
+            print(f"{e}; serving the cached recommendation")
+            increment("wardrobe_model_route_total", "Recommendations by the model tiers that served them",
+                      route="cache", tiers="none", mode=mode)
+            return entry[1]
+        self.recommendation_cache.set(cache_key, (time.time(), recommendation))
+        return recommendation
+
+    def _schedule_refresh(self, cache_key: str, user_prompt: str, mode: str = "handoff"):
+        """Refresh a stale cache entry in the background, at most once at a time per key."""
+        if cache_key in self._refreshing:
+            return
+        self._refreshing.add(cache_key)
+        task = asyncio.get_running_loop().create_task(self._refresh(cache_key, user_prompt, mode))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _refresh(self, cache_key: str, user_prompt: str, mode: str = "handoff"):
+        try:
+            await self._inflight.do(cache_key, lambda: self._generate_and_cache(cache_key, user_prompt, mode))
+        except Exception as e:
+            print(f"Error refreshing cached recommendation: {e}")
+        finally:
+            self._refreshing.discard(cache_key)
     
     def _parse_agent_output(self, output) -> WardrobeRecommendation:
-        """Parse the agent's output into a WardrobeRecommendation object."""
+        """Parse the agent's output into a WardrobeRecommendation object and repair local defects."""
+        with span("parse_agent_output"):
+            recommendation = self._parse_agent_output_data(output)
+            repair_recommendation(recommendation)
+            return recommendation
+
+    @staticmethod
+    def _output_to_dict(output) -> dict:
+        """Decode an agent's JSON output (string, dict or pydantic model) into a dict."""
         if isinstance(output, str):
             try:
-                data = json.loads(output)
+                return json.loads(output)
             except json.JSONDecodeError as e:
                 raise ValueError(f"Agent output is not valid JSON: {e}")
-        elif isinstance(output, dict):
-            data = output
-        else:
-            return output  # Already a WardrobeRecommendation object
+        if isinstance(output, dict):
+            return output
+        return output.model_dump()
+
+    def _parse_agent_output_data(self, output) -> WardrobeRecommendation:
+        if isinstance(output, WardrobeRecommendation):
+            return output
+        data = self._output_to_dict(output)
             
         try:
             # Handle different output formats
@@ -80,23 +527,17 @@ class WardrobeService:
     
     def _create_from_items(self, data: dict) -> WardrobeRecommendation:
         """Create WardrobeRecommendation from items format."""
-        items = data["items"]
-        return WardrobeRecommendation(
-            theme=data.get("theme", "Personalized Wardrobe"),
-            styling_tips=data.get("styling_tips", "Mix and match these pieces for a versatile and personalized wardrobe."),
-            tops=[ClothingItem(**item) for item in items if "shirt" in item["name"].lower() or "tee" in item["name"].lower() or "jersey" in item["name"].lower()],
-            bottoms=[ClothingItem(**item) for item in items if "pants" in item["name"].lower() or "jeans" in item["name"].lower() or "shorts" in item["name"].lower()],
-            outerwear=[ClothingItem(**item) for item in items if "jacket" in item["name"].lower() or "hoodie" in item["name"].lower() or "coat" in item["name"].lower()],
-            headwear=[ClothingItem(**item) for item in items if "hat" in item["name"].lower() or "cap" in item["name"].lower() or "beanie" in item["name"].lower()],
-            footwear=[ClothingItem(**item) for item in items if "shoes" in item["name"].lower() or "sneaker" in item["name"].lower() or "boots" in item["name"].lower()],
-            accessories=[ClothingItem(**item) for item in items if "accessory" in item["name"].lower() or "scarf" in item["name"].lower() or "bag" in item["name"].lower()]
+        return self._create_from_categorized(
+            data["items"],
+            theme=data.get("theme", DEFAULT_THEME),
+            styling_tips=data.get("styling_tips", DEFAULT_STYLING_TIPS)
         )
     
     def _create_from_suggested_items(self, data: dict) -> WardrobeRecommendation:
         """Create WardrobeRecommendation from suggested_items format."""
         return WardrobeRecommendation(
-            theme=data.get("theme", "Personalized Wardrobe"),
-            styling_tips=data.get("styling_tips", "Mix and match these pieces for a versatile and personalized wardrobe."),
+            theme=data.get("theme", DEFAULT_THEME),
+            styling_tips=data.get("styling_tips", DEFAULT_STYLING_TIPS),
             tops=[ClothingItem(**item) for item in data["suggested_items"].get("tops", [])],
             bottoms=[ClothingItem(**item) for item in data["suggested_items"].get("bottoms", [])],
             outerwear=[ClothingItem(**item) for item in data["suggested_items"].get("outerwear", [])],
@@ -107,68 +548,22 @@ class WardrobeService:
     
     def _create_from_results(self, data: dict) -> WardrobeRecommendation:
         """Create WardrobeRecommendation from search_real_products results format."""
-        return WardrobeRecommendation(
-            theme=data.get("theme", "Personalized Wardrobe"),
-            styling_tips="Mix and match these pieces for a versatile and personalized wardrobe.",
-            tops=[ClothingItem(**item) for item in data["results"] if "shirt" in item["name"].lower() or "tee" in item["name"].lower() or "jersey" in item["name"].lower()],
-            bottoms=[ClothingItem(**item) for item in data["results"] if "pants" in item["name"].lower() or "jeans" in item["name"].lower() or "shorts" in item["name"].lower()],
-            outerwear=[ClothingItem(**item) for item in data["results"] if "jacket" in item["name"].lower() or "hoodie" in item["name"].lower() or "coat" in item["name"].lower()],
-            headwear=[ClothingItem(**item) for item in data["results"] if "hat" in item["name"].lower() or "cap" in item["name"].lower() or "beanie" in item["name"].lower()],
-            footwear=[ClothingItem(**item) for item in data["results"] if "shoes" in item["name"].lower() or "sneaker" in item["name"].lower() or "boots" in item["name"].lower()],
-            accessories=[ClothingItem(**item) for item in data["results"] if "accessory" in item["name"].lower() or "scarf" in item["name"].lower() or "bag" in item["name"].lower()]
+        return self._create_from_categorized(
+            data["results"],
+            theme=data.get("theme", DEFAULT_THEME),
+            styling_tips=DEFAULT_STYLING_TIPS
         )
     
-def print_item(item: ClothingItem):
-    """Print a single clothing item with formatting."""
-    print(f"\n{Fore.WHITE}{Style.BRIGHT}• {item.name}{Style.RESET_ALL}")
-    print(f"  {Fore.YELLOW}Price:{Style.RESET_ALL} {item.price}")
-    if item.description:
-        print(f"  {Fore.CYAN}Description:{Style.RESET_ALL} {item.description}")
-    print(f"  {Fore.BLUE}Product URL:{Style.RESET_ALL} {item.product_url}")
-    print(f"  {Fore.MAGENTA}Image URL:{Style.RESET_ALL} {item.image_url}")
-
-def print_section(title: str, items: list[ClothingItem]):
-    """Print a section of clothing items with formatting."""
-    print(f"\n{Back.WHITE}{Fore.BLACK}{Style.BRIGHT}=== {title} ==={Style.RESET_ALL}")
-    if not items:
-        print(f"{Fore.RED}No items found{Style.RESET_ALL}")
-    for item in items:
-        print_item(item)
-
-def main():
-    """Test the wardrobe service with a sample prompt."""
-    # agentops.init(os.getenv("AGENTOPS_API_KEY"))
-    service = WardrobeService()
-    
-    test_prompt = str(input("Enter a prompt: "))
-
-    
-    try:
-        # Print request
-        print(f"\n{Back.BLUE}{Fore.WHITE}{Style.BRIGHT} WARDROBE REQUEST {Style.RESET_ALL}")
-        print(f"{Fore.CYAN}Prompt:{Style.RESET_ALL} {test_prompt}")
-        
-        # Get recommendation
-        recommendation = service.create_wardrobe_recommendation(test_prompt)
-        
-        # Print theme and styling tips
-        print(f"\n{Back.GREEN}{Fore.BLACK}{Style.BRIGHT} WARDROBE RECOMMENDATION {Style.RESET_ALL}")
-        print(f"\n{Fore.GREEN}{Style.BRIGHT}Theme:{Style.RESET_ALL} {recommendation.theme}")
-        print(f"\n{Fore.GREEN}{Style.BRIGHT}Styling Tips:{Style.RESET_ALL} {recommendation.styling_tips}")
-        
-        # Print each section
-        print_section("TOPS", recommendation.tops)
-        print_section("BOTTOMS", recommendation.bottoms)
-        print_section("OUTERWEAR", recommendation.outerwear)
-        print_section("HEADWEAR", recommendation.headwear)
-        print_section("FOOTWEAR", recommendation.footwear)
-        print_section("ACCESSORIES", recommendation.accessories)
-            
-    except Exception as e:
-        print(f"\n{Back.RED}{Fore.WHITE}{Style.BRIGHT} ERROR {Style.RESET_ALL}")
-        print(f"{Fore.RED}{str(e)}{Style.RESET_ALL}")
-
-    # agentops.end_session('Success')
+    def _create_from_categorized(self, items: list, theme: str, styling_tips: str) -> WardrobeRecommendation:
+        """Bucket a flat item list by category in one pass; unmatched items go to `uncategorized`."""
+        buckets = self.categorizer.categorize(items)
+        return WardrobeRecommendation(
+            theme=theme,
+            styling_tips=styling_tips,
+            uncategorized=buckets[UNCATEGORIZED],
+            **{category: buckets.get(category, []) for category in CATEGORIES}
+        )
 
 if __name__ == "__main__":
+    from cli import main
     main()